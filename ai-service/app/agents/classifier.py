@@ -2,11 +2,15 @@
 Classifier Agent - Delegates to ClassifierService for message classification.
 """
 
-from typing import Optional, List
+import asyncio
+from typing import AsyncIterator, Optional, List
 
-from app.schemas.input import ContextIn, ChatMessage
-from app.schemas.output import ClassifyOut
+from app.config.settings import settings
+from app.schemas.input import BulkClassifyItem, ContextIn, ChatMessage
+from app.schemas.output import BulkClassifyLine, ClassifyOut, ClassifiedMessage
 from app.services.classifier_service import classifier_service
+from app.services.base import logger
+from app.services.classify_batcher import classify_batcher
 
 
 async def classify_messages(
@@ -25,4 +29,71 @@ async def classify_messages(
     Returns:
         ClassifyOut with classified messages and explanation
     """
+    if settings.CLASSIFY_BATCH_ENABLED:
+        return await classify_batcher.classify(messages, context)
     return await classifier_service.classify(messages, context)
+
+
+def stream_classifications(
+    messages: List[ChatMessage], context: Optional[ContextIn] = None
+) -> AsyncIterator[ClassifiedMessage]:
+    """
+    Classify chat messages, yielding each result as soon as it is available.
+    
+    Args:
+        messages: List of chat messages to classify
+        context: Optional historical context
+    
+    Returns:
+        Async iterator of ClassifiedMessage, in completion order
+    """
+    return classifier_service.classify_stream(messages, context)
+
+
+async def classify_bulk(items: List[BulkClassifyItem]) -> AsyncIterator[BulkClassifyLine]:
+    """
+    Classify many conversations, at most BULK_CLASSIFY_MAX_PARALLEL at a time.
+    
+    Args:
+        items: Conversations to classify
+    
+    Returns:
+        Async iterator of BulkClassifyLine, one per item in completion order;
+        a failing item carries `error` instead of failing the rest
+    """
+    pending = iter(enumerate(items))
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def worker() -> None:
+        for index, item in pending:
+            try:
+                result = await classify_messages(item.messages, item.context)
+                line = BulkClassifyLine(conversation_id=item.conversation_id, index=index, result=result)
+            except Exception as e:
+                logger.error(f"Bulk classify of {item.conversation_id} failed: {e}", exc_info=True)
+                line = BulkClassifyLine(conversation_id=item.conversation_id, index=index, error=str(e))
+            await queue.put(line)
+    
+    workers = [
+        asyncio.ensure_future(worker())
+        for _ in range(max(1, min(settings.BULK_CLASSIFY_MAX_PARALLEL, len(items))))
+    ]
+    try:
+        for _ in items:
+            yield await queue.get()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def invalidate_classifications(messages: List[ChatMessage]) -> int:
+    """
+    Forget memoized classifications for edited messages.
+    
+    Args:
+        messages: The previous (pre-edit) versions of the messages
+    
+    Returns:
+        Number of memo entries removed
+    """
+    return classifier_service.invalidate(messages)
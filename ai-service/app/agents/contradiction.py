@@ -4,13 +4,16 @@ Contradiction Agent - Delegates to ContradictionService for conflict detection.
 
 from typing import Optional, List
 
+from app.schemas.context import RequestContext
 from app.schemas.input import ContextIn, ChatMessage
 from app.schemas.output import ContradictOut
 from app.services.contradiction_service import contradiction_service
 
 
 async def find_contradictions(
-    messages: List[ChatMessage], context: Optional[ContextIn] = None
+    messages: List[ChatMessage],
+    context: Optional[ContextIn] = None,
+    request_context: Optional[RequestContext] = None
 ) -> ContradictOut:
     """
     Detect contradictions in messages given prior context using LLM.
@@ -21,8 +24,9 @@ async def find_contradictions(
     Args:
         messages: List of chat messages to analyze
         context: Prior decisions, actions, assumptions to check against
+        request_context: Its conversation_id enables incremental checking
     
     Returns:
         ContradictOut with detected contradictions and consistency flag
     """
-    return await contradiction_service.detect(messages, context)
+    return await contradiction_service.detect(messages, context, request_context)
@@ -2,7 +2,7 @@
 Summary Agent - Delegates to SummaryService for conversation summarization.
 """
 
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
 
 from app.schemas.input import ContextIn, ChatMessage
 from app.schemas.output import SummarizeOut
@@ -10,7 +10,9 @@ from app.services.summary_service import summary_service
 
 
 async def summarize_text(
-    messages: List[ChatMessage], context: Optional[ContextIn] = None
+    messages: List[ChatMessage],
+    context: Optional[ContextIn] = None,
+    previous: Optional[SummarizeOut] = None
 ) -> SummarizeOut:
     """
     Generate a concise summary of messages using LLM.
@@ -20,8 +22,29 @@ async def summarize_text(
     Args:
         messages: List of chat messages to summarize
         context: Optional historical context
+        previous: Earlier result to update with only the new messages
     
     Returns:
         SummarizeOut with concise summary and confidence
     """
-    return await summary_service.summarize(messages, context)
+    return await summary_service.summarize(messages, context, previous)
+
+
+def stream_summary(
+    messages: List[ChatMessage],
+    context: Optional[ContextIn] = None,
+    previous: Optional[SummarizeOut] = None
+) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Summarize messages, yielding partial results as the LLM generates them.
+    
+    Args:
+        messages: List of chat messages to summarize
+        context: Optional historical context
+        previous: Earlier result to update with only the new messages
+    
+    Returns:
+        Async iterator of (event, payload): summary_delta, key_point,
+        timeline_item, and a final done carrying the SummarizeOut
+    """
+    return summary_service.summarize_stream(messages, context, previous)
@@ -1,21 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from app.schemas.input import ActionRequest
 from app.schemas.output import ActionOut
 from app.services.action_service import action_service
+from app.services.payload_store import payload_store
 
 router = APIRouter()
 
 @router.post("/action", response_model=ActionOut)
-async def extract_actions(request: ActionRequest):
+async def extract_actions(request: ActionRequest, response: Response):
     """
     Extract all ACTION items from messages.
     Includes assignee, deadline, and priority (critical/high/medium/low).
     Sorted by priority.
     """
+    messages, context = payload_store.resolve(request, response)
     try:
         result = await action_service.extract_actions(
-            messages=request.messages,
-            context=request.context
+            messages=messages,
+            context=context
         )
         return result
     except Exception as e:
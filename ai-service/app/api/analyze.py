@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Response
+
+from app.schemas.input import AnalyzeRequest
+from app.schemas.output import AnalyzeOut
+from app.services.analyze_service import analyze_service
+from app.services.payload_store import payload_store
+
+router = APIRouter()
+
+
+@router.post("/analyze", response_model=AnalyzeOut)
+async def analyze(req: AnalyzeRequest, response: Response) -> AnalyzeOut:
+    """
+    Run filter, classify, actions, contradictions and summary over one message list.
+    
+    Stages run concurrently under one budget; pick a subset with `stages`.
+    Returns every requested result plus per-stage timings and errors.
+    """
+    messages, context = payload_store.resolve(req, response)
+    return await analyze_service.analyze(messages, context, req.stages)
@@ -1,22 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from app.schemas.input import AskRequest
 from app.schemas.output import AskOut
 from app.services.ask_service import ask_service
+from app.services.payload_store import payload_store
 
 router = APIRouter()
 
 @router.post("/ask", response_model=AskOut)
-async def ask_query(request: AskRequest):
+async def ask_query(request: AskRequest, response: Response):
     """
     Query specific message types (DECISION, ACTION, etc.) from a conversation.
     Supports query_type like 'DECISION', '/decision', 'suggestion', etc.
     """
+    messages, context = payload_store.resolve(request, response)
     try:
         result = await ask_service.ask(
             category=request.query_type,
-            messages=request.messages,
+            messages=messages,
             query=request.query,
-            context=request.context
+            context=context
         )
         return result
     except Exception as e:
@@ -1,17 +1,59 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from fastapi.responses import StreamingResponse
 
-from app.schemas.input import ClassifyRequest
-from app.schemas.output import ClassifyOut
-from app.agents.classifier import classify_messages
+from app.schemas.input import BulkClassifyRequest, ClassifyRequest, InvalidateRequest
+from app.schemas.output import ClassifyOut, InvalidateOut
+from app.agents.classifier import classify_bulk, classify_messages, invalidate_classifications, stream_classifications
+from app.services.payload_store import payload_store
+from app.api.responses import stream_headers
 
 router = APIRouter()
 
 
 @router.post("/classify", response_model=ClassifyOut)
-async def classify(req: ClassifyRequest) -> ClassifyOut:
+async def classify(req: ClassifyRequest, response: Response) -> ClassifyOut:
     """
     Classify multiple chat messages into signal categories.
     
     Returns: DECISION, ACTION, ASSUMPTION, SUGGESTION, CONSTRAINT, QUESTION (can be multiple per message)
     """
-    return await classify_messages(req.messages, req.context)
+    messages, context = payload_store.resolve(req, response)
+    return await classify_messages(messages, context)
+
+
+@router.post("/classify/stream")
+async def classify_stream(req: ClassifyRequest) -> StreamingResponse:
+    """
+    Classify messages and stream results as NDJSON, one ClassifiedMessage per line,
+    as soon as each classification is known (completion order, not input order).
+    """
+    handles = Response()
+    messages, context = payload_store.resolve(req, handles)
+    
+    async def lines():
+        async for item in stream_classifications(messages, context):
+            yield item.model_dump_json() + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=stream_headers(handles))
+
+
+@router.post("/classify/bulk")
+async def classify_bulk_route(req: BulkClassifyRequest) -> StreamingResponse:
+    """
+    Classify many conversations in one request and stream NDJSON, one
+    BulkClassifyLine per conversation as it finishes (completion order).
+    A failing conversation gets a line with `error`; the others still complete.
+    """
+    async def lines():
+        async for line in classify_bulk(req.items):
+            yield line.model_dump_json() + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/classify/invalidate", response_model=InvalidateOut)
+async def invalidate(req: InvalidateRequest) -> InvalidateOut:
+    """
+    Forget memoized classifications for edited messages so the next batch re-classifies them.
+    """
+    return InvalidateOut(invalidated=invalidate_classifications(req.messages))
@@ -1,17 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
 from app.schemas.input import ContradictRequest
 from app.schemas.output import ContradictOut
 from app.agents.contradiction import find_contradictions
+from app.services.payload_store import payload_store
 
 router = APIRouter()
 
 
 @router.post("/contradict", response_model=ContradictOut)
-async def contradict(req: ContradictRequest) -> ContradictOut:
+async def contradict(req: ContradictRequest, response: Response) -> ContradictOut:
     """
     Detect contradictions in chat messages given prior context.
     
     Flags conflicts with prior decisions, assumptions, or actions.
+    Send request_context.conversation_id to only check new messages and skip known contradictions.
     """
-    return await find_contradictions(req.messages, req.context)
+    messages, context = payload_store.resolve(req, response)
+    return await find_contradictions(messages, context, req.request_context)
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
+from app.services.circuit_breaker import gemini_breaker
+
 router = APIRouter()
 
 
 @router.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "gemini_circuit": gemini_breaker.snapshot()}
@@ -0,0 +1,92 @@
+import time
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.circuit_breaker import gemini_breaker
+from app.services.claim_store import claim_store
+from app.services.classification_memo import classification_memo
+from app.services.classify_batcher import classify_batcher
+from app.services.context_cache import context_cache
+from app.services.context_index import context_index_cache
+from app.services.metrics import EndpointMetrics, metrics, stats_collector
+from app.services.payload_store import payload_store
+from app.services.rate_limiter import gemini_rate_limiter
+from app.services.response_cache import response_cache
+from app.services.singleflight import llm_singleflight
+from app.services.tracing import trace_exporter
+
+router = APIRouter()
+
+metrics.add_collector(stats_collector({
+    "response_cache": response_cache.stats,
+    "classification_memo": classification_memo.stats,
+    "context_index_cache": context_index_cache.stats,
+    "payload_store": payload_store.stats,
+    "claim_store": claim_store.stats,
+    "context_cache": context_cache.stats,
+    "gemini_circuit": gemini_breaker.snapshot,
+    "gemini_rate_limiter": gemini_rate_limiter.stats,
+    "llm_singleflight": llm_singleflight.stats,
+    "classify_batcher": classify_batcher.stats,
+    "trace_exporter": trace_exporter.stats,
+}))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Latency histograms, Gemini call sizes and errors, fallback counts and
+    cache stats in Prometheus text exposition format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-endpoint latency, status counts and
+    in-flight requests. Endpoints are the paths of matched routes (learned
+    as requests are routed); unmatched paths are counted as "other".
+    Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._endpoints: Dict[str, EndpointMetrics] = {"other": EndpointMetrics("other")}
+
+    def _resolve(self, scope) -> EndpointMetrics:
+        """Endpoint of a routed request, registering the path on first sight"""
+        route = scope.get("route")
+        if route is None:
+            return self._endpoints["other"]
+        path = getattr(route, "path", "other") if scope.get("path_params") else scope["path"]
+        bound = self._endpoints.get(path)
+        if bound is None:
+            bound = self._endpoints[path] = EndpointMetrics(path)
+        return bound
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Known before routing only for paths seen already; in-flight of a first request counts as "other"
+        pending = self._endpoints.get(scope["path"]) or self._endpoints["other"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        pending.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            pending.in_flight.dec()
+            bound = self._resolve(scope)
+            bound.latency.observe(time.perf_counter() - started)
+            bound.status(status).inc()
@@ -0,0 +1,10 @@
+from typing import Optional
+
+from fastapi import Response
+
+
+def stream_headers(response: Response, extra: Optional[dict] = None) -> dict:
+    """Headers set on a route's placeholder `response`, for a StreamingResponse"""
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    headers.update(extra or {})
+    return headers
@@ -1,15 +1,53 @@
-from fastapi import APIRouter
+import json
+
+from fastapi import APIRouter, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
 from app.schemas.input import SummarizeRequest
 from app.schemas.output import SummarizeOut
-from app.agents.summary import summarize_text
+from app.agents.summary import stream_summary, summarize_text
+from app.services.payload_store import payload_store
+from app.api.responses import stream_headers
 
 router = APIRouter()
 
 
 @router.post("/summarize", response_model=SummarizeOut)
-async def summarize(req: SummarizeRequest) -> SummarizeOut:
+async def summarize(req: SummarizeRequest, response: Response) -> SummarizeOut:
     """
     Generate a concise summary of chat messages.
+    
+    Pass the previous result as `previous` to only summarize what is new since its watermark.
+    """
+    messages, context = payload_store.resolve(req, response)
+    return await summarize_text(messages, context, req.previous)
+
+
+
+def _sse(event: str, payload) -> str:
+    data = payload.model_dump_json() if isinstance(payload, BaseModel) else json.dumps({"text": payload})
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post("/summarize/stream")
+async def summarize_stream(req: SummarizeRequest) -> StreamingResponse:
+    """
+    Generate a summary and stream it as server-sent events while Gemini writes it.
+    
+    Events: `summary_delta` ({"text"}), `key_point` ({"text"}), `timeline_item`
+    (TimelineItem), then `done` with the complete SummarizeOut. If the stream
+    fails, the fallback summary arrives as the `done` event.
     """
-    return await summarize_text(req.messages, req.context)
+    handles = Response()
+    messages, context = payload_store.resolve(req, handles)
+    
+    async def events():
+        async for event, payload in stream_summary(messages, context, req.previous):
+            yield _sse(event, payload)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=stream_headers(handles, {"Cache-Control": "no-cache"})
+    )
@@ -1,9 +1,128 @@
+from typing import Any, Dict, List
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     GEMINI_API_KEY: str = ""
     MODEL: str = "gemini-2.5-flash-lite"
+    # Point at a local fake Gemini for testing (see app/services/http_client.py)
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+
+    # Shared outbound HTTP client (see app/services/http_client.py)
+    HTTP2_ENABLED: bool = True
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 60.0
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # LLM response cache (see app/services/response_cache.py)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: float = 300.0
+    LLM_CACHE_CLASSIFIER: bool = True
+    LLM_CACHE_SUMMARY: bool = True
+    LLM_CACHE_CONTRADICTION: bool = True
+    LLM_CACHE_ACTION: bool = True
+    LLM_CACHE_ASK: bool = True
+    LLM_CACHE_FILTER: bool = True
+
+    # Coalesce identical concurrent LLM calls (see app/services/singleflight.py)
+    LLM_SINGLEFLIGHT_ENABLED: bool = True
+
+    # Adaptive outbound rate limiting (see app/services/rate_limiter.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RPM: float = 1000.0
+    RATE_LIMIT_TPM: float = 1000000.0
+    RATE_LIMIT_MIN_RPM: float = 10.0
+    RATE_LIMIT_INCREASE_RPM: float = 5.0
+    RATE_LIMIT_DECREASE_FACTOR: float = 0.5
+    RATE_LIMIT_BURST_SECONDS: float = 5.0
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0
+
+    # Retries and request hedging (see app/services/retry.py)
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_RETRY_STATUSES: List[int] = [429, 500, 502, 503, 504]
+    # Per-service overrides, e.g. {"summary": {"max_attempts": 2}}
+    LLM_RETRY_OVERRIDES: Dict[str, Dict[str, Any]] = {}
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY: float = 0.5
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+
+    # Circuit breaker for Gemini (see app/services/circuit_breaker.py)
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_WINDOW_SECONDS: float = 30.0
+    CIRCUIT_MIN_CALLS: int = 10
+    CIRCUIT_ERROR_RATE: float = 0.5
+    CIRCUIT_SLOW_CALL_SECONDS: float = 20.0
+    CIRCUIT_SLOW_RATE: float = 0.8
+    CIRCUIT_OPEN_SECONDS: float = 15.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 3
+
+    # Token-budget chunking of large message batches (see app/utils/chunking.py)
+    CHUNK_INPUT_TOKEN_BUDGET: int = 8000
+    CHUNK_OUTPUT_TOKENS_PER_MESSAGE: int = 40
+    CHUNK_MAX_PARALLEL: int = 4
+
+    # Per-message classification memo (see app/services/classification_memo.py)
+    CLASSIFY_MEMO_ENABLED: bool = True
+    CLASSIFY_MEMO_MAX_ENTRIES: int = 50000
+
+    # Cross-request classify micro-batching (see app/services/classify_batcher.py)
+    CLASSIFY_BATCH_ENABLED: bool = False
+    CLASSIFY_BATCH_WINDOW_MS: float = 5.0
+    CLASSIFY_BATCH_MAX_MESSAGES: int = 200
+
+    # Local noise pre-filter on the classify path (see FilterService.noise_confidence)
+    CLASSIFY_PREFILTER_ENABLED: bool = False
+    CLASSIFY_PREFILTER_THRESHOLD: float = 0.85
+
+    # Line-oriented prompts with user aliases and relative times (see app/utils/prompt_encoding.py)
+    COMPACT_PROMPTS: bool = False
+
+    # Gemini cachedContents for static system prompts (see app/services/context_cache.py)
+    GEMINI_CONTEXT_CACHE_ENABLED: bool = False
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+    GEMINI_CONTEXT_CACHE_REFRESH_SECONDS: float = 300.0
+    GEMINI_CONTEXT_CACHE_RETRY_SECONDS: float = 600.0
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS: int = 1024
+
+    # Caps on what an incremental summary carries forward (see app/services/summary_service.py)
+    SUMMARY_MAX_KEY_POINTS: int = 30
+    SUMMARY_MAX_TIMELINE_ITEMS: int = 100
+
+    # Per-conversation contradiction claim store (see app/services/claim_store.py)
+    CLAIM_STORE_MAX_CONVERSATIONS: int = 1000
+    CLAIM_STORE_MAX_MESSAGES: int = 5000
+    # Earlier checked messages sent with each check as prior claims
+    CLAIM_STORE_MAX_CLAIMS: int = 100
+    CLAIM_STORE_MAX_CONTEXT_ITEMS: int = 200
+
+    # Content-addressed message windows and context blocks (see app/services/payload_store.py)
+    PAYLOAD_STORE_ENABLED: bool = True
+    PAYLOAD_STORE_MAX_WINDOWS: int = 2000
+    PAYLOAD_STORE_MAX_CONTEXTS: int = 2000
+    # Window length kept when extending a window_handle without max_window
+    PAYLOAD_STORE_MAX_WINDOW_MESSAGES: int = 500
+
+    # Conversations classified concurrently per /ai/classify/bulk request (see app/agents/classifier.py)
+    BULK_CLASSIFY_MAX_PARALLEL: int = 4
+
+    # Concurrent stages per /ai/analyze request (see app/services/analyze_service.py)
+    ANALYZE_MAX_PARALLEL: int = 3
+
+    # Per-request stage spans and Server-Timing header (see app/services/tracing.py)
+    TRACING_ENABLED: bool = True
+    # OTLP/JSON export: append to a file and/or POST to a collector's base URL (e.g. http://localhost:4318)
+    TRACE_EXPORT_FILE: str = ""
+    TRACE_EXPORT_ENDPOINT: str = ""
+    TRACE_SERVICE_NAME: str = "signaldesk-ai"
 
     class Config:
         env_file = ".env"
@@ -1,13 +1,39 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import classify, action, contradict, summarize, ask, health
+from app.api import classify, action, contradict, summarize, ask, health, analyze, metrics
 from app.config.logging import configure_logging
+from app.services.http_client import start_http_client, close_http_client
+from app.services.payload_store import UnknownHandleError
+from app.services.tracing import TracingMiddleware
 
 configure_logging()
 
-app = FastAPI(title="SignalDesk AI")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP/2 client for all Gemini calls, closed on shutdown
+    await start_http_client()
+    try:
+        yield
+    finally:
+        await close_http_client()
+
+
+app = FastAPI(title="SignalDesk AI", lifespan=lifespan)
+
+@app.exception_handler(UnknownHandleError)
+async def unknown_handle(request: Request, exc: UnknownHandleError):
+    # The caller should resend the full window/context
+    return JSONResponse(
+        status_code=409,
+        content={"error": "unknown_handle", "kind": exc.kind, "handle": exc.handle}
+    )
+
 
 # CORS Configuration
 app.add_middleware(
@@ -17,6 +43,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last, so they wrap CORS and time the full streamed body
+app.add_middleware(metrics.MetricsMiddleware)
+# Server-Timing header and optional OTLP export (see app/services/tracing.py)
+app.add_middleware(TracingMiddleware)
 
 app.include_router(classify.router, prefix="/ai")
 app.include_router(action.router, prefix="/ai")
@@ -24,6 +54,8 @@ app.include_router(contradict.router, prefix="/ai")
 app.include_router(summarize.router, prefix="/ai")
 app.include_router(ask.router, prefix="/ai")
 app.include_router(health.router, prefix="/ai")
+app.include_router(analyze.router, prefix="/ai")
+app.include_router(metrics.router, prefix="/ai")
 
 
 if __name__ == "__main__":
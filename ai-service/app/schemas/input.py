@@ -1,5 +1,8 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Literal
+
+from app.schemas.context import RequestContext
+from app.schemas.output import SummarizeOut
 
 
 class ChatMessage(BaseModel):
@@ -20,33 +23,79 @@ class ContextIn(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
-class ClassifyRequest(BaseModel):
-    """Classify multiple chat messages into categories (decision, action, etc.)"""
+class WindowRequest(BaseModel):
+    """
+    Message window plus optional context, sent in full or as deltas.
+    `window_handle` / `context_handle` refer to X-Window-Handle / X-Context-Handle
+    from an earlier response: the window is the stored one plus `messages`,
+    and the stored context is used when `context` is omitted. Only the stored
+    part of a window is trimmed to `max_window`. An unknown handle gets
+    409 {"error": "unknown_handle", "kind", "handle"}.
+    """
     messages: List[ChatMessage]
     context: Optional[ContextIn] = None
+    window_handle: Optional[str] = None
+    context_handle: Optional[str] = None
+    max_window: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Trim the stored window so the result has at most N messages; sent messages are always kept"
+    )
 
 
-class ActionRequest(BaseModel):
-    """Request to extract actions with assignees and deadlines"""
-    messages: List[ChatMessage]
-    context: Optional[ContextIn] = None
+class ClassifyRequest(WindowRequest):
+    """Classify multiple chat messages into categories (decision, action, etc.)"""
 
 
-class ContradictRequest(BaseModel):
-    """Detect contradictions in messages given context"""
+class BulkClassifyItem(BaseModel):
+    """One conversation's messages in a bulk classify request"""
+    conversation_id: str
     messages: List[ChatMessage]
     context: Optional[ContextIn] = None
 
 
-class SummarizeRequest(BaseModel):
-    """Summarize messages concisely"""
+class BulkClassifyRequest(BaseModel):
+    """Many conversations to classify in one request"""
+    items: List[BulkClassifyItem] = Field(..., min_length=1)
+
+
+class InvalidateRequest(BaseModel):
+    """Previous versions of edited messages whose classifications should be forgotten"""
     messages: List[ChatMessage]
-    context: Optional[ContextIn] = None
 
 
-class AskRequest(BaseModel):
+class ActionRequest(WindowRequest):
+    """Request to extract actions with assignees and deadlines"""
+
+
+class ContradictRequest(WindowRequest):
+    """
+    Detect contradictions in messages given context.
+    With request_context.conversation_id, only messages not checked before in
+    that conversation are analysed and known contradictions are suppressed.
+    """
+    request_context: Optional[RequestContext] = None
+
+
+class SummarizeRequest(WindowRequest):
+    """
+    Summarize messages concisely.
+    With `previous`, only messages after its watermark are summarized into it;
+    the window must still include the watermark message, otherwise the
+    summary is rebuilt from scratch.
+    """
+    previous: Optional[SummarizeOut] = None
+
+
+AnalyzeStage = Literal["filter", "classify", "actions", "contradictions", "summary"]
+
+
+class AnalyzeRequest(WindowRequest):
+    """Run several analyses over one message list in a single call"""
+    stages: List[AnalyzeStage] = ["filter", "classify", "actions", "contradictions", "summary"]
+
+
+class AskRequest(WindowRequest):
     """Ask a specific question or query a category from messages"""
     query_type: str  # e.g., "DECISION", "ACTION", etc.
-    messages: List[ChatMessage]
     query: Optional[str] = None
-    context: Optional[ContextIn] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
 
@@ -36,6 +36,19 @@ class ClassifyOut(BaseModel):
     explanation: Optional[str] = None
 
 
+class BulkClassifyLine(BaseModel):
+    """One NDJSON line of /classify/bulk: a conversation's result or its error"""
+    conversation_id: str
+    index: int = Field(description="Position of the item in the request")
+    result: Optional[ClassifyOut] = None
+    error: Optional[str] = None
+
+
+class InvalidateOut(BaseModel):
+    """Result of dropping memoized classifications"""
+    invalidated: int
+
+
 class ActionItem(BaseModel):
     """Detailed action item with assignment and priority"""
     task: str
@@ -64,6 +77,7 @@ class ContradictOut(BaseModel):
     """Contradiction detection result"""
     contradictions: List[Contradiction]
     is_consistent: bool
+    suppressed: int = Field(0, description="Contradictions found again but already reported for this conversation")
 
 
 class TimelineItem(BaseModel):
@@ -80,6 +94,7 @@ class SummarizeOut(BaseModel):
     key_points: List[str] = []
     timeline: List[TimelineItem] = []
     confidence: ConfidenceScore
+    watermark: Optional[str] = Field(None, description="Hashes of the last messages covered; send this result back as `previous` to update incrementally")
 
 
 class AskItem(BaseModel):
@@ -93,3 +108,22 @@ class AskOut(BaseModel):
     items: List[AskItem]
     query_type: str
     ai_insight: Optional[str] = Field(None, description="AI's own analysis or additional suggestions based on the query type")
+
+
+class FilteredMessage(BaseModel):
+    """Signal vs noise verdict for one message"""
+    useful: bool
+    reason: str
+    confidence: float
+    text: str
+
+
+class AnalyzeOut(BaseModel):
+    """Composite result of /analyze; stages that were not requested are null"""
+    filter: Optional[List[FilteredMessage]] = None
+    classify: Optional[ClassifyOut] = None
+    actions: Optional[ActionOut] = None
+    contradictions: Optional[ContradictOut] = None
+    summary: Optional[SummarizeOut] = None
+    timings_ms: Dict[str, float] = Field(default_factory=dict, description="Wall time per stage and 'total'")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Stages that failed, with the error")
@@ -4,9 +4,11 @@ Action Service - Extracts detailed actions with assignees, deadlines and priorit
 
 from typing import List, Optional
 
+from app.config.settings import settings
 from app.schemas.input import ChatMessage, ContextIn
 from app.schemas.output import ActionOut, ActionItem
 from app.services.base import LLMClient, logger
+from app.utils.prompt_encoding import CompactCodec
 
 
 class ActionService(LLMClient[ActionOut]):
@@ -14,9 +16,11 @@ class ActionService(LLMClient[ActionOut]):
     
     def __init__(self):
         super().__init__(
+            name="action",
             prompt_file="action.txt",
             temperature=0.1,
-            max_tokens=2048
+            max_tokens=2048,
+            template_in_prompt=True  # build_user_prompt formats the template itself
         )
     
     def build_user_prompt(
@@ -27,10 +31,13 @@ class ActionService(LLMClient[ActionOut]):
         """Build action extraction prompt"""
         
         # Format conversation
-        conversation = "\n".join([
-            f"[{msg.timestamp or 'N/A'}] {msg.user}: {msg.message}"
-            for msg in messages
-        ])
+        if settings.COMPACT_PROMPTS:
+            conversation = CompactCodec(messages).encode(messages, index=False)
+        else:
+            conversation = "\n".join([
+                f"[{msg.timestamp or 'N/A'}] {msg.user}: {msg.message}"
+                for msg in messages
+            ])
         
         # Build context
         context_str = "None"
@@ -51,6 +58,8 @@ class ActionService(LLMClient[ActionOut]):
         text = response.get("response", "{}")
         logger.debug(f"Parsing action response: {text}")
         parsed = self.parse_json(text)
+        if parsed is None:
+            self._metrics.parse_failures.inc()
         
         if isinstance(parsed, dict) and "actions" in parsed:
              return parsed
@@ -65,10 +74,14 @@ class ActionService(LLMClient[ActionOut]):
         """Extract all actions with metadata"""
         logger.info(f"Extracting actions from {len(messages)} messages")
         
-        user_prompt = self.build_user_prompt(messages, context)
+        with self.span("prompt"):
+            user_prompt = self.build_user_prompt(messages, context)
         response = await self.query(user_prompt)
         
-        result_data = self.parse_response(response)
+        with self.span("parse"):
+            result_data = self.parse_response(response)
+        if settings.COMPACT_PROMPTS:
+            result_data = CompactCodec(messages).decode(result_data)
         
         actions = []
         for item in result_data.get("actions", []):
@@ -0,0 +1,73 @@
+"""
+Analyze Service - Runs several analyses over one message list concurrently.
+"""
+
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.agents.classifier import classify_messages
+from app.agents.contradiction import find_contradictions
+from app.agents.summary import summarize_text
+from app.config.settings import settings
+from app.schemas.input import ChatMessage, ContextIn
+from app.schemas.output import AnalyzeOut, FilteredMessage
+from app.services.action_service import action_service
+from app.services.base import logger
+from app.services.filter_service import filter_service
+from app.utils.chunking import gather_bounded
+
+
+class AnalyzeService:
+    """Fans one validated request out to the filter, classify, action, contradiction and summary services"""
+
+    async def analyze(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None,
+        stages: Optional[List[str]] = None
+    ) -> AnalyzeOut:
+        """
+        Run the requested stages concurrently, at most ANALYZE_MAX_PARALLEL
+        at a time. A failing stage is reported in `errors` and does not fail
+        the others.
+        """
+        runners: Dict[str, Callable[[], Awaitable]] = {
+            "filter": lambda: self._filter(messages),
+            "classify": lambda: classify_messages(messages, context),
+            "actions": lambda: action_service.extract_actions(messages, context),
+            "contradictions": lambda: find_contradictions(messages, context),
+            "summary": lambda: summarize_text(messages, context),
+        }
+        requested = list(dict.fromkeys(stages or runners))
+        logger.info(f"Analyzing {len(messages)} messages, stages={requested}")
+
+        results = {}
+        timings = {}
+        errors = {}
+
+        async def run(stage: str) -> None:
+            started = time.perf_counter()
+            try:
+                results[stage] = await runners[stage]()
+            except Exception as e:
+                logger.error(f"Analyze stage '{stage}' failed: {e}", exc_info=True)
+                errors[stage] = str(e)
+            finally:
+                timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+
+        started = time.perf_counter()
+        await gather_bounded(
+            [lambda stage=stage: run(stage) for stage in requested],
+            settings.ANALYZE_MAX_PARALLEL
+        )
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+        return AnalyzeOut(**results, timings_ms=timings, errors=errors)
+
+    @staticmethod
+    async def _filter(messages: List[ChatMessage]) -> List[FilteredMessage]:
+        return [FilteredMessage(**r.to_dict()) for r in await filter_service.filter_messages(messages)]
+
+
+# Singleton instance
+analyze_service = AnalyzeService()
@@ -5,10 +5,12 @@ Ask Service - Queries specific categories from conversation history.
 from typing import List, Optional
 import json
 
+from app.config.settings import settings
 from app.schemas.input import ChatMessage, ContextIn
 from app.schemas.output import AskOut, AskItem, ConfidenceScore
 from app.services.base import LLMClient, logger
 from app.utils.confidence import normalize_confidence
+from app.utils.prompt_encoding import CompactCodec
 
 
 class AskService(LLMClient[AskOut]):
@@ -16,9 +18,11 @@ class AskService(LLMClient[AskOut]):
     
     def __init__(self):
         super().__init__(
+            name="ask",
             prompt_file="ask.txt",
             temperature=0.1,
-            max_tokens=2048
+            max_tokens=2048,
+            template_in_prompt=True  # build_user_prompt formats the template itself
         )
     
     def build_user_prompt(
@@ -31,10 +35,13 @@ class AskService(LLMClient[AskOut]):
         """Build the ask prompt"""
         
         # Format conversation
-        conversation = "\n".join([
-            f"[{msg.user}]: {msg.message}"
-            for msg in messages
-        ])
+        if settings.COMPACT_PROMPTS:
+            conversation = CompactCodec(messages).encode(messages, index=False, timestamps=False)
+        else:
+            conversation = "\n".join([
+                f"[{msg.user}]: {msg.message}"
+                for msg in messages
+            ])
         
         # Build context
         context_str = "None"
@@ -60,6 +67,8 @@ class AskService(LLMClient[AskOut]):
         text = response.get("response", "{}")
         logger.debug(f"Parsing ask response: {text}")
         parsed = self.parse_json(text)
+        if parsed is None:
+            self._metrics.parse_failures.inc()
         
         items = []
         insight = None
@@ -87,10 +96,15 @@ class AskService(LLMClient[AskOut]):
             
         logger.info(f"Asking for {mapped_category} (original: {category}) in {len(messages)} messages")
         
-        user_prompt = self.build_user_prompt(mapped_category, messages, query, context)
+        with self.span("prompt"):
+            user_prompt = self.build_user_prompt(mapped_category, messages, query, context)
         response = await self.query(user_prompt)
         
-        items_data, ai_insight = self.parse_response(response)
+        with self.span("parse"):
+            items_data, ai_insight = self.parse_response(response)
+        if settings.COMPACT_PROMPTS:
+            codec = CompactCodec(messages)
+            items_data, ai_insight = codec.decode(items_data), codec.decode(ai_insight)
         
         final_items = []
         for i, item in enumerate(items_data):
@@ -127,11 +141,13 @@ class AskService(LLMClient[AskOut]):
         """Simple keyword-based fallback for Ask"""
         from app.services.classifier_service import classifier_service
         
+        self._metrics.fallbacks.inc()
+        
         cat_upper = category.strip().strip("/").upper()
         results = []
         
-        for msg in messages:
-            types, score = classifier_service._fallback_classify(msg.message)
+        fallbacks = classifier_service._fallback_classify_batch([msg.message for msg in messages])
+        for msg, (types, score) in zip(messages, fallbacks):
             # If our fallback classifier thinks it matches the category
             if any(t.upper() == cat_upper for t in types):
                 results.append(
@@ -3,9 +3,11 @@ Base LLM client for Gemini API calls.
 All service-specific clients inherit from this.
 """
 
+import asyncio
 import json
 import logging
-from typing import Optional, Any, TypeVar, Generic
+import time
+from typing import Optional, Any, TypeVar, Generic, List, AsyncIterator
 from pathlib import Path
 from abc import ABC, abstractmethod
 
@@ -13,21 +15,61 @@ import httpx
 from pydantic import BaseModel
 
 from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.services.circuit_breaker import gemini_breaker
+from app.services.context_cache import context_cache
+from app.services.http_client import gemini_url, get_http_client
+from app.services.metrics import ServiceMetrics
+from app.services.rate_limiter import RateLimitExceeded, gemini_rate_limiter, parse_retry_after
+from app.services.response_cache import ResponseCache, response_cache
+from app.services.retry import LatencyTracker, RetryPolicy
+from app.services.singleflight import llm_singleflight
+from app.services.tracing import span
+from app.utils.chunking import chunk_indices
+from app.utils.json_extract import extract_json
+from app.utils.tokens import estimate_tokens
 
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T", bound=BaseModel)
 
+# Per-message prompt overhead (index, keys, punctuation) on top of its text
+MESSAGE_OVERHEAD_TOKENS = 16
+# Same for a compact `index|user|time|text` record (see app/utils/prompt_encoding.py)
+COMPACT_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+# Stage names a service can time with LLMClient.span()
+SPAN_STAGES = ("prompt", "query", "gemini", "parse", "build")
+
+
+class LLMStreamError(Exception):
+    """Raised when a streaming LLM call cannot be completed"""
+
 
 class LLMClient(ABC, Generic[T]):
     """Base class for all LLM service clients"""
     
-    def __init__(self, prompt_file: str, temperature: float = 0.3, max_tokens: int = 1024):
+    def __init__(
+        self,
+        name: str,
+        prompt_file: str,
+        temperature: float = 0.3,
+        max_tokens: int = 1024,
+        template_in_prompt: bool = False
+    ):
+        self.name = name
         self.prompt_file = prompt_file
         self.temperature = temperature
         self.max_tokens = max_tokens
+        # Services that format the template into their user prompt send no systemInstruction
+        self.template_in_prompt = template_in_prompt
         self._prompt_template: Optional[str] = None
+        self._retry_policy: Optional[RetryPolicy] = None
+        self._latency = LatencyTracker()
+        self._metrics = ServiceMetrics(name)
+        self._span_names = {stage: f"{name}.{stage}" for stage in SPAN_STAGES}
     
     @property
     def prompt_template(self) -> str:
@@ -37,6 +79,39 @@ class LLMClient(ABC, Generic[T]):
             self._prompt_template = prompt_path.read_text()
         return self._prompt_template
     
+    @property
+    def system_instruction(self) -> Optional[str]:
+        """Static instructions sent as Gemini systemInstruction (or from its context cache)"""
+        return None if self.template_in_prompt else self.prompt_template
+    
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """Lazily built retry policy for this service"""
+        if self._retry_policy is None:
+            self._retry_policy = RetryPolicy.for_service(self.name)
+        return self._retry_policy
+    
+    @property
+    def cache_enabled(self) -> bool:
+        """Whether responses for this service go through the response cache"""
+        if not settings.LLM_CACHE_ENABLED:
+            return False
+        return bool(getattr(settings, f"LLM_CACHE_{self.name.upper()}", False))
+    
+    def chunk_messages(self, messages: List[ChatMessage]) -> List[List[int]]:
+        """
+        Split a message list into index chunks that fit the prompt budget
+        and whose expected output fits in max_tokens.
+        """
+        overhead = COMPACT_MESSAGE_OVERHEAD_TOKENS if settings.COMPACT_PROMPTS else MESSAGE_OVERHEAD_TOKENS
+        costs = [
+            estimate_tokens(msg.user) + estimate_tokens(msg.message)
+            + estimate_tokens(msg.timestamp or "") + overhead
+            for msg in messages
+        ]
+        max_items = max(1, self.max_tokens // settings.CHUNK_OUTPUT_TOKENS_PER_MESSAGE)
+        return chunk_indices(costs, settings.CHUNK_INPUT_TOKEN_BUDGET, max_items)
+    
     @abstractmethod
     def build_user_prompt(self, *args, **kwargs) -> str:
         """Build the user prompt for the specific task"""
@@ -52,7 +127,19 @@ class LLMClient(ABC, Generic[T]):
         Query Gemini API with system + user prompt.
         Returns raw response dict.
         """
-        full_prompt = f"{self.prompt_template}\n\n{user_prompt}"
+        metrics = self._metrics
+        metrics.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            with self.span("query"):
+                return await self._query(user_prompt)
+        finally:
+            metrics.in_flight.dec()
+            metrics.latency.observe(time.perf_counter() - started)
+    
+    async def _query(self, user_prompt: str) -> dict:
+        """Cache lookup, then a (possibly coalesced) Gemini call"""
+        full_prompt = f"{self.system_instruction or ''}\n\n{user_prompt}"
         
         logger.debug(f"Querying {settings.MODEL} with prompt length: {len(full_prompt)}")
         # logger.debug(f"Full Prompt: {full_prompt}") # Uncomment only if needed, can be very large
@@ -62,50 +149,288 @@ class LLMClient(ABC, Generic[T]):
             logger.warning("GEMINI_API_KEY not set, using mock response")
             return await self._mock_response(user_prompt)
         
+        prompt_key = ResponseCache.make_key(
+            settings.MODEL, self.temperature, self.max_tokens, full_prompt
+        )
+        if self.cache_enabled:
+            cached = response_cache.get(prompt_key, self.name)
+            if cached is not None:
+                logger.debug(f"Response cache hit for {self.name}")
+                return cached
+        
+        if settings.LLM_SINGLEFLIGHT_ENABLED:
+            # Identical concurrent prompts share one Gemini call
+            result = await llm_singleflight.do(
+                prompt_key, lambda: self._fetch(user_prompt, prompt_key)
+            )
+            return dict(result)
+        return await self._fetch(user_prompt, prompt_key)
+    
+    async def _fetch(self, user_prompt: str, prompt_key: str) -> dict:
+        """Send the prompt and store successful responses in the cache"""
+        result = await self._send(user_prompt)
+        if self.cache_enabled and result.get("success"):
+            response_cache.set(prompt_key, result)
+        return result
+    
+    async def _send(self, user_prompt: str) -> dict:
+        """Send the prompt with the service's retry policy (and optional hedging)"""
+        policy = self.retry_policy
+        attempt = 1
+        while True:
+            if settings.LLM_HEDGE_ENABLED:
+                result = await self._post_hedged(user_prompt)
+            else:
+                result = await self._post(user_prompt)
+            
+            if result.get("success") or attempt >= policy.max_attempts or not policy.is_retryable(result):
+                return result
+            
+            delay = policy.backoff(attempt)
+            logger.warning(
+                f"{self.name}: attempt {attempt}/{policy.max_attempts} failed ({result.get('error')}), "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def _post_hedged(self, user_prompt: str) -> dict:
+        """
+        Send the prompt; if no response arrives within the observed latency
+        percentile, send a duplicate and keep whichever succeeds first.
+        """
+        hedge_delay = None
+        if len(self._latency) >= settings.LLM_HEDGE_MIN_SAMPLES:
+            hedge_delay = max(
+                settings.LLM_HEDGE_MIN_DELAY,
+                self._latency.percentile(settings.LLM_HEDGE_PERCENTILE)
+            )
+        if hedge_delay is None:
+            return await self._post(user_prompt)
+        
+        pending = {asyncio.ensure_future(self._post(user_prompt))}
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                logger.info(f"POST request to Gemini API ({settings.MODEL})")
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return done.pop().result()
+            
+            logger.info(f"{self.name}: no response after {hedge_delay:.2f}s, sending hedged request")
+            pending.add(asyncio.ensure_future(self._post(user_prompt)))
+            result = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.get("success"):
+                        return result
+            return result
+        finally:
+            # Cancel the losing request
+            for task in pending:
+                task.cancel()
+    
+    async def _post(self, user_prompt: str) -> dict:
+        """POST the prompt to Gemini once, reporting the outcome to the circuit breaker"""
+        breaker = settings.CIRCUIT_BREAKER_ENABLED
+        if breaker and not gemini_breaker.allow_request():
+            logger.debug(f"{self.name}: Gemini circuit open, skipping LLM call")
+            self._metrics.error("circuit_open")
+            return {"response": "{}", "success": False, "error": "Gemini circuit open", "error_kind": "circuit_open"}
+        
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await self._post_once(user_prompt)
+            if not result.get("success"):
+                self._metrics.error(result.get("error_kind"))
+            return result
+        finally:
+            if breaker:
+                if result is None or result.get("error_kind") == "rate_limited":
+                    gemini_breaker.release()
+                else:
+                    gemini_breaker.record(self._healthy(result), time.perf_counter() - started)
+    
+    @staticmethod
+    def _healthy(result: dict) -> bool:
+        """Whether a call result says Gemini is healthy (client errors and 429s do not count against it)"""
+        kind = result.get("error_kind")
+        if kind in ("timeout", "network", "unexpected"):
+            return False
+        if kind == "http":
+            return result.get("status_code", 500) < 500
+        return True
+    
+    async def _post_once(self, user_prompt: str) -> dict:
+        """POST the prompt to Gemini once and extract the response text"""
+        metrics = self._metrics
+        try:
+            system = self.system_instruction
+            prompt_tokens = estimate_tokens(system or "") + estimate_tokens(user_prompt)
+            if settings.RATE_LIMIT_ENABLED:
+                await gemini_rate_limiter.acquire(prompt_tokens)
+            metrics.prompt_chars.observe(len(system or "") + len(user_prompt))
+            metrics.prompt_tokens.inc(prompt_tokens)
+            
+            client = get_http_client()
+            cached_content = await context_cache.get(system)
+            started = time.perf_counter()
+            logger.info(f"POST request to Gemini API ({settings.MODEL})")
+            with self.span("gemini"):
                 response = await client.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{settings.MODEL}:generateContent",
+                    self._endpoint("generateContent"),
                     headers={"Content-Type": "application/json"},
                     params={"key": settings.GEMINI_API_KEY},
-                    json={
-                        "contents": [{"parts": [{"text": full_prompt}]}],
-                        "generationConfig": {
-                            "temperature": self.temperature,
-                            "maxOutputTokens": self.max_tokens,
-                            "responseMimeType": "application/json"
-                        }
-                    }
+                    json=self._payload(user_prompt, cached_content)
                 )
+                if cached_content and response.status_code in (400, 403, 404):
+                    # Cache expired or was deleted server-side: forget it and resend inline
+                    logger.warning(f"Gemini rejected context cache {cached_content} ({response.status_code}), sending prompt inline")
+                    context_cache.invalidate(system)
+                    response = await client.post(
+                        self._endpoint("generateContent"),
+                        headers={"Content-Type": "application/json"},
+                        params={"key": settings.GEMINI_API_KEY},
+                        json=self._payload(user_prompt)
+                    )
+            
+            metrics.roundtrip.observe(time.perf_counter() - started)
+            logger.debug(f"Gemini API Response Status: {response.status_code}")
+            
+            if response.status_code != 200:
+                logger.error(f"Gemini API Error: {response.status_code} - {response.text}")
+            
+            if settings.RATE_LIMIT_ENABLED:
+                if response.status_code in (429, 503):
+                    gemini_rate_limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                elif response.status_code == 200:
+                    gemini_rate_limiter.on_success()
+            
+            response.raise_for_status()
+            result = response.json()
+            
+            # Extract text from Gemini response
+            candidates = result.get("candidates", [])
+            if not candidates:
+                logger.warning(f"No candidates in response: {result}")
+                return {"response": "{}", "success": False, "error": "No candidates"}
+            
+            text = candidates[0].get("content", {}).get("parts", [{}])[0].get("text", "{}")
+            logger.debug(f"Gemini Response Text: {text[:500]}...") # Log start of response
+            metrics.response_chars.observe(len(text))
+            metrics.response_tokens.inc(estimate_tokens(text))
+            
+            self._latency.record(time.perf_counter() - started)
+            return {"response": text, "success": True}
                 
-                logger.debug(f"Gemini API Response Status: {response.status_code}")
-                
-                if response.status_code != 200:
-                    logger.error(f"Gemini API Error: {response.status_code} - {response.text}")
-                
-                response.raise_for_status()
-                result = response.json()
-                
-                # Extract text from Gemini response
-                candidates = result.get("candidates", [])
-                if not candidates:
-                    logger.warning(f"No candidates in response: {result}")
-                    return {"response": "{}", "success": False, "error": "No candidates"}
-                
-                text = candidates[0].get("content", {}).get("parts", [{}])[0].get("text", "{}")
-                logger.debug(f"Gemini Response Text: {text[:500]}...") # Log start of response
-                
-                return {"response": text, "success": True}
-                
+        except RateLimitExceeded as e:
+            logger.warning(str(e))
+            return {"response": "{}", "success": False, "error": str(e), "error_kind": "rate_limited"}
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Gemini API HTTP error: {str(e)}")
+            logger.error(f"Error body: {e.response.text}")
+            return {
+                "response": "{}", "success": False, "error": str(e),
+                "error_kind": "http", "status_code": e.response.status_code
+            }
+        except httpx.TimeoutException as e:
+            logger.error(f"Gemini API timeout: {type(e).__name__}")
+            return {"response": "{}", "success": False, "error": f"Timeout ({type(e).__name__})", "error_kind": "timeout"}
         except httpx.HTTPError as e:
             logger.error(f"Gemini API HTTP error: {str(e)}")
-            if hasattr(e, 'response') and e.response:
-                logger.error(f"Error body: {e.response.text}")
-            return {"response": "{}", "success": False, "error": str(e)}
+            return {"response": "{}", "success": False, "error": str(e), "error_kind": "network"}
         except Exception as e:
             logger.error(f"Unexpected error during Gemini query: {str(e)}", exc_info=True)
-            return {"response": "{}", "success": False, "error": str(e)}
+            return {"response": "{}", "success": False, "error": str(e), "error_kind": "unexpected"}
+    
+    @staticmethod
+    def _endpoint(method: str) -> str:
+        return gemini_url(f"models/{settings.MODEL}:{method}")
+    
+    def _payload(self, user_prompt: str, cached_content: Optional[str] = None) -> dict:
+        payload = {
+            "contents": [{"role": "user", "parts": [{"text": user_prompt}]}],
+            "generationConfig": {
+                "temperature": self.temperature,
+                "maxOutputTokens": self.max_tokens,
+                "responseMimeType": "application/json"
+            }
+        }
+        if cached_content:
+            payload["cachedContent"] = cached_content
+        elif self.system_instruction:
+            payload["systemInstruction"] = {"parts": [{"text": self.system_instruction}]}
+        return payload
+    
+    async def query_stream(self, user_prompt: str) -> AsyncIterator[str]:
+        """
+        Stream response text from Gemini's streamGenerateContent (SSE) endpoint.
+        Yields text chunks as they arrive; raises LLMStreamError on failure.
+        Streams are not cached, coalesced or retried.
+        """
+        system = self.system_instruction
+        logger.debug(f"Streaming {settings.MODEL} with prompt length: {len(system or '') + len(user_prompt)}")
+        
+        if not settings.GEMINI_API_KEY:
+            raise LLMStreamError("GEMINI_API_KEY not configured or using mock mode")
+        
+        breaker = settings.CIRCUIT_BREAKER_ENABLED
+        if breaker and not gemini_breaker.allow_request():
+            raise LLMStreamError("Gemini circuit open")
+        
+        started = time.perf_counter()
+        healthy = None
+        try:
+            if settings.RATE_LIMIT_ENABLED:
+                await gemini_rate_limiter.acquire(estimate_tokens(system or "") + estimate_tokens(user_prompt))
+            
+            client = get_http_client()
+            cached_content = await context_cache.get(system)
+            logger.info(f"Streaming POST request to Gemini API ({settings.MODEL})")
+            async with client.stream(
+                "POST",
+                self._endpoint("streamGenerateContent"),
+                headers={"Content-Type": "application/json"},
+                params={"key": settings.GEMINI_API_KEY, "alt": "sse"},
+                json=self._payload(user_prompt, cached_content)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    logger.error(f"Gemini API Error: {response.status_code} - {body[:500]!r}")
+                    if settings.RATE_LIMIT_ENABLED and response.status_code in (429, 503):
+                        gemini_rate_limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                    healthy = response.status_code < 500
+                    if cached_content and response.status_code in (400, 403, 404):
+                        context_cache.invalidate(system)
+                    raise LLMStreamError(f"Gemini API HTTP {response.status_code}")
+                if settings.RATE_LIMIT_ENABLED:
+                    gemini_rate_limiter.on_success()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    try:
+                        event = json.loads(line[5:])
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping malformed stream event: {line[:200]}")
+                        continue
+                    candidates = event.get("candidates") or [{}]
+                    for part in candidates[0].get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+            healthy = True
+        except RateLimitExceeded as e:
+            raise LLMStreamError(str(e)) from e
+        except httpx.HTTPError as e:
+            healthy = False
+            logger.error(f"Gemini stream HTTP error: {str(e)}")
+            raise LLMStreamError(str(e)) from e
+        finally:
+            if breaker:
+                if healthy is None:
+                    gemini_breaker.release()
+                else:
+                    gemini_breaker.record(healthy, time.perf_counter() - started)
     
     async def _mock_response(self, prompt: str) -> dict:
         """Mock response for development/testing"""
@@ -117,60 +442,18 @@ class LLMClient(ABC, Generic[T]):
             "note": "Please set GEMINI_API_KEY in .env"
         }
     
+    def span(self, stage: str):
+        """Time a stage (one of SPAN_STAGES) of this service in the current request's trace"""
+        return span(self._span_names[stage])
+    
     @staticmethod
     def parse_json(text: str) -> Optional[Any]:
         """
-        Extremely robust JSON extraction from LLM responses.
-        Handles markdown, leading/trailing crap, and logs specific errors.
+        Extract the first complete JSON object/array from an LLM response.
+        Handles markdown fences and text before/after the JSON in one linear,
+        string-aware pass (see app/utils/json_extract.py).
         """
-        if not text:
-            return None
-        
-        import re
-        import json
-        
-        cleaned_text = text.strip()
-        
-        # 1. Try direct parse
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.debug(f"Direct JSON parse failed: {str(e)}")
-            
-        # 2. Try extracting from markdown blocks
-        markdown_match = re.search(r"```(?:json)?\s*(\{.*\}|\[.*\])\s*```", cleaned_text, re.DOTALL | re.IGNORECASE)
-        if markdown_match:
-            try:
-                return json.loads(markdown_match.group(1).strip())
-            except json.JSONDecodeError as e:
-                logger.debug(f"Markdown JSON parse failed: {str(e)}")
-        
-        # 3. Find outermost balance (handles text before/after JSON)
-        try:
-            start_idx = cleaned_text.find('{')
-            if start_idx == -1:
-                start_idx = cleaned_text.find('[')
-            
-            if start_idx != -1:
-                # Find matching end
-                bracket_type = cleaned_text[start_idx]
-                close_type = '}' if bracket_type == '{' else ']'
-                
-                # Simple balanced bracket search
-                stack = 0
-                for i in range(start_idx, len(cleaned_text)):
-                    if cleaned_text[i] == bracket_type:
-                        stack += 1
-                    elif cleaned_text[i] == close_type:
-                        stack -= 1
-                        if stack == 0:
-                            candidate = cleaned_text[start_idx:i+1]
-                            try:
-                                return json.loads(candidate)
-                            except json.JSONDecodeError as e:
-                                logger.warning(f"Balanced segment parse failed at index {i}: {str(e)}")
-                                # Continue search if this wasn't the "real" end or if multiple JSONs
-        except Exception as e:
-            logger.error(f"Error during bracket matching: {str(e)}")
-
-        return None
+        result = extract_json(text)
+        if result is None and text:
+            logger.debug(f"No parseable JSON in LLM response ({len(text)} chars)")
+        return result
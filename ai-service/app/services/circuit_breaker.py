@@ -0,0 +1,158 @@
+"""
+Circuit breaker for Gemini calls.
+Opens on a high error rate or slow-call rate over a sliding window so
+services go straight to their keyword fallbacks, then lets a few probes
+through (half-open) to test recovery.
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+from app.config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by error rate and latency"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        min_calls: int = 10,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        slow_rate_threshold: float = 0.8,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 3,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = self.CLOSED
+        # (timestamp, failed, slow) per finished call, with running totals
+        self._window: deque = deque()
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._window and self._window[0][0] < cutoff:
+            _, failed, slow = self._window.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _reset_window(self) -> None:
+        self._window.clear()
+        self._failures = 0
+        self._slow = 0
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = self.OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened += 1
+        logger.warning(f"Gemini circuit opened: {reason}")
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now. Every allowed call must be followed by record() or release()."""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.open_seconds:
+                self.short_circuited += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.info("Gemini circuit half-open, probing")
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.short_circuited += 1
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Give back an allowed call that finished without a health signal"""
+        if self.state == self.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record(self, success: bool, latency: float) -> None:
+        """Record the outcome of an allowed call"""
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not success or slow:
+                self._open(now, "probe failed")
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self.state = self.CLOSED
+                self._reset_window()
+                logger.info("Gemini circuit closed, upstream recovered")
+            return
+        if self.state == self.OPEN:
+            return
+
+        self._window.append((now, int(not success), int(slow)))
+        self._failures += not success
+        self._slow += slow
+        self._evict(now)
+
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return
+        if self._failures / calls >= self.error_rate_threshold:
+            self._open(now, f"error rate {self._failures}/{calls}")
+        elif self._slow / calls >= self.slow_rate_threshold:
+            self._open(now, f"slow calls {self._slow}/{calls}")
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        self._evict(now)
+        calls = len(self._window)
+        retry_in: Optional[float] = None
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.open_seconds - (now - self._opened_at))
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "error_rate": self._failures / calls if calls else 0.0,
+            "slow_rate": self._slow / calls if calls else 0.0,
+            "retry_in_seconds": retry_in,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+# Singleton instance shared by all LLM services
+gemini_breaker = CircuitBreaker(
+    window_seconds=settings.CIRCUIT_WINDOW_SECONDS,
+    min_calls=settings.CIRCUIT_MIN_CALLS,
+    error_rate_threshold=settings.CIRCUIT_ERROR_RATE,
+    slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS,
+    slow_rate_threshold=settings.CIRCUIT_SLOW_RATE,
+    open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+    half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+)
@@ -0,0 +1,106 @@
+"""
+Per-conversation claim store for incremental contradiction checking.
+Remembers, per RequestContext.conversation_id, which messages were already
+checked and what they said, which contradictions were already reported, and
+the prior context seen so far, so repeated /contradict calls over a sliding
+window only analyse new messages, check them against earlier ones, and do
+not re-alert.
+"""
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+from app.schemas.input import ChatMessage, ContextIn
+from app.schemas.output import Contradiction
+from app.utils.message_hash import message_key
+
+
+# ContextIn list fields merged across calls
+CONTEXT_FIELDS = ("prior_decisions", "prior_actions", "prior_assumptions", "prior_suggestions", "prior_constraints")
+
+
+def _bounded_add(entries: "OrderedDict[str, None]", key: str, limit: int) -> None:
+    entries[key] = None
+    entries.move_to_end(key)
+    while len(entries) > limit:
+        entries.popitem(last=False)
+
+
+class ConversationClaims:
+    """Claims and contradictions known for one conversation"""
+
+    def __init__(self):
+        self.checked: "OrderedDict[str, None]" = OrderedDict()
+        # Text of the most recent checked messages, checked against new ones
+        self.claims: "OrderedDict[str, str]" = OrderedDict()
+        self.reported: "OrderedDict[str, None]" = OrderedDict()
+        self.context: Dict[str, "OrderedDict[str, None]"] = {field: OrderedDict() for field in CONTEXT_FIELDS}
+        # Serializes checks for the same conversation
+        self.lock = asyncio.Lock()
+
+    def merge_context(self, context: Optional[ContextIn]) -> ContextIn:
+        """Add the request's context to the stored one and return the union"""
+        limit = settings.CLAIM_STORE_MAX_CONTEXT_ITEMS
+        for field in CONTEXT_FIELDS:
+            for item in (getattr(context, field, None) or []):
+                _bounded_add(self.context[field], item, limit)
+        merged = {field: list(items) or None for field, items in self.context.items()}
+        return ContextIn(**merged, metadata=context.metadata if context else None)
+
+    def unchecked(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        return [msg for msg in messages if message_key(msg) not in self.checked]
+
+    def earlier_claims(self) -> List[str]:
+        """Claims of checked messages, oldest first"""
+        return list(self.claims.values())
+
+    def mark_checked(self, messages: List[ChatMessage]) -> None:
+        for msg in messages:
+            key = message_key(msg)
+            _bounded_add(self.checked, key, settings.CLAIM_STORE_MAX_MESSAGES)
+            self.claims[key] = f"[{msg.user}]: {msg.message}"
+            self.claims.move_to_end(key)
+            while len(self.claims) > settings.CLAIM_STORE_MAX_CLAIMS:
+                self.claims.popitem(last=False)
+
+    def report(self, contradiction: Contradiction) -> bool:
+        """Record a contradiction; False if it was already reported"""
+        raw = f"{contradiction.claim_a.strip().lower()}\x00{contradiction.claim_b.strip().lower()}"
+        key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        if key in self.reported:
+            return False
+        _bounded_add(self.reported, key, settings.CLAIM_STORE_MAX_MESSAGES)
+        return True
+
+
+class ClaimStore:
+    """LRU of ConversationClaims keyed by conversation_id"""
+
+    def __init__(self, max_conversations: int = 1000):
+        self.max_conversations = max_conversations
+        self._conversations: "OrderedDict[str, ConversationClaims]" = OrderedDict()
+
+    def get(self, conversation_id: str) -> ConversationClaims:
+        claims = self._conversations.get(conversation_id)
+        if claims is None:
+            claims = self._conversations[conversation_id] = ConversationClaims()
+        self._conversations.move_to_end(conversation_id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+        return claims
+
+    def forget(self, conversation_id: str) -> bool:
+        return self._conversations.pop(conversation_id, None) is not None
+
+    def clear(self) -> None:
+        self._conversations.clear()
+
+    def stats(self) -> dict:
+        return {"conversations": len(self._conversations)}
+
+
+# Singleton instance
+claim_store = ClaimStore(max_conversations=settings.CLAIM_STORE_MAX_CONVERSATIONS)
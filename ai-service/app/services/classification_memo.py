@@ -0,0 +1,77 @@
+"""
+Per-message classification memo.
+Remembers LLM classifications by a hash of (user, message, timestamp) so
+overlapping classify batches only send unseen messages to the LLM.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.schemas.output import ConfidenceScore, MessageType
+from app.utils.message_hash import message_key
+
+
+# (types, confidence) as produced by the LLM for one message
+MemoEntry = Tuple[List[MessageType], ConfidenceScore]
+
+
+class ClassificationMemo:
+    """Size-bounded LRU of per-message classifications"""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, MemoEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key_for(msg: ChatMessage) -> str:
+        """Content hash of the fields that identify a message"""
+        return message_key(msg)
+
+    def get(self, key: str) -> Optional[MemoEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, entry: MemoEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, msg: ChatMessage) -> bool:
+        """Forget a message (e.g. after it was edited). Returns True if it was stored."""
+        removed = self._entries.pop(self.key_for(msg), None) is not None
+        if removed:
+            self.invalidations += 1
+        return removed
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+classification_memo = ClassificationMemo(max_entries=settings.CLASSIFY_MEMO_MAX_ENTRIES)
@@ -2,11 +2,19 @@
 Classifier Service - Classifies chat messages into signal categories.
 """
 
-from typing import List, Optional
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+from app.config.settings import settings
 from app.schemas.input import ChatMessage, ContextIn
 from app.schemas.output import ClassifyOut, ClassifiedMessage, MessageType, ConfidenceScore
-from app.services.base import LLMClient
+from app.services.base import LLMClient, LLMStreamError
+from app.services.classification_memo import classification_memo
+from app.services.fallback_rules import CLASSIFIER_RULES
+from app.services.filter_service import filter_service
+from app.utils.chunking import gather_bounded
+from app.utils.json_stream import JsonStreamParser
+from app.utils.prompt_encoding import CompactCodec, decode_index
 from app.utils.confidence import normalize_confidence
 
 
@@ -15,6 +23,7 @@ class ClassifierService(LLMClient[ClassifyOut]):
     
     def __init__(self):
         super().__init__(
+            name="classifier",
             prompt_file="classifier.txt",
             temperature=0.1,
             max_tokens=4096
@@ -27,18 +36,20 @@ class ClassifierService(LLMClient[ClassifyOut]):
     ) -> str:
         """Build classification prompt for batch of messages"""
         
-        # Format messages as JSON-like structure
-        messages_json = []
-        for i, msg in enumerate(messages):
-            messages_json.append({
-                "index": i,
-                "user": msg.user,
-                "message": msg.message,
-                "timestamp": msg.timestamp or ""
-            })
-        
         import json
-        messages_str = json.dumps(messages_json, indent=2)
+        if settings.COMPACT_PROMPTS:
+            messages_str = CompactCodec(messages).encode(messages)
+        else:
+            # Format messages as JSON-like structure
+            messages_json = []
+            for i, msg in enumerate(messages):
+                messages_json.append({
+                    "index": i,
+                    "user": msg.user,
+                    "message": msg.message,
+                    "timestamp": msg.timestamp or ""
+                })
+            messages_str = json.dumps(messages_json, indent=2)
         
         # Build context string
         context_str = ""
@@ -80,6 +91,8 @@ Return a JSON array with one object per message:
         from app.services.base import logger
         logger.debug(f"Parsing classifier response text: {text}")
         parsed = self.parse_json(text)
+        if parsed is None:
+            self._metrics.parse_failures.inc()
         
         if not parsed:
             logger.warning("LLM response could not be parsed as JSON")
@@ -110,79 +123,45 @@ Return a JSON array with one object per message:
         from app.services.base import logger
         logger.info(f"Classifying batch of {len(messages)} messages")
         
-        # Build prompt and query LLM
-        user_prompt = self.build_user_prompt(messages, context)
-        response = await self.query(user_prompt)
+        results: List[Optional[ClassifiedMessage]] = [None] * len(messages)
+        pending = list(range(len(messages)))
         
-        # Parse response
-        classifications = self.parse_response(response)
+        # Reuse classifications for messages seen in earlier batches
+        memo_keys = None
+        if settings.CLASSIFY_MEMO_ENABLED:
+            memo_keys = [classification_memo.key_for(msg) for msg in messages]
+            pending = []
+            for i, key in enumerate(memo_keys):
+                entry = classification_memo.get(key)
+                if entry:
+                    results[i] = self._from_memo(messages[i], entry)
+                else:
+                    pending.append(i)
+            logger.info(f"Classification memo reused {len(messages) - len(pending)}/{len(messages)} messages")
+        reused = len(messages) - len(pending)
         
-        # Build output with fallback
-        classified_messages = []
-        llm_error = response.get("error") if not response.get("success") else None
+        # Obvious noise is tagged OTHER locally
+        noise, pending = self._split_noise(messages, pending)
+        for i, item in noise.items():
+            results[i] = item
         
-        for i, msg in enumerate(messages):
-            # Find matching classification (robust to string vs int index)
-            classification = None
-            if isinstance(classifications, list):
-                # Search by index field
-                classification = next(
-                    (c for c in classifications if str(c.get("index")) == str(i)),
-                    None
-                )
-            
-            if classification:
-                # Support multiple key names commonly used by LLMs
-                raw_types = classification.get("types", classification.get("type", classification.get("category", [])))
-                if isinstance(raw_types, str):
-                    raw_types = [raw_types]
-                
-                confidence = float(classification.get("confidence", 0.7))
-                reason = classification.get("reason", "LLM classification")
-                logger.debug(f"Msg {i} matched LLM result: {raw_types}")
-            else:
-                # Fallback to keyword-based
-                raw_types, confidence = self._fallback_classify(msg.message)
-                reason = "Fallback keyword classification"
-                if llm_error:
-                    reason += f" (LLM failure: {llm_error})"
-                else:
-                    reason += " (No LLM match for index)"
-                logger.info(f"Msg {i} using fallback. LLM Error: {llm_error}")
-            
-            # Convert to MessageType enums
-            message_types = []
-            for t in raw_types:
-                try:
-                    t_clean = str(t).upper().strip().replace(" ", "_")
-                    # Handle common synonyms
-                    if t_clean == "RESOLVED": t_clean = "DECISION"
-                    if t_clean == "TASK": t_clean = "ACTION"
-                    
-                    message_types.append(MessageType[t_clean])
-                except (KeyError, AttributeError):
-                    logger.warning(f"Unknown type '{t}' for Msg {i}")
-                    pass
-            
-            if not message_types:
-                # If conversion failed, try mapping or default to OTHER
-                message_types = [MessageType.OTHER]
-            
-            classified_messages.append(
-                ClassifiedMessage(
-                    user=msg.user,
-                    message=msg.message,
-                    timestamp=msg.timestamp,
-                    type=message_types,
-                    confidence=ConfidenceScore(
-                        score=normalize_confidence(confidence),
-                        reason=reason
-                    ),
-                    metadata=msg.metadata
-                )
-            )
+        # Only unseen, substantive messages go to the LLM; indices are remapped back below
+        llm_error = None
+        if pending:
+            batch = [messages[i] for i in pending]
+            classified, from_llm, llm_error = await self._classify_chunked(batch, context)
+            for i, item, llm_hit in zip(pending, classified, from_llm):
+                results[i] = item
+                if memo_keys is not None and llm_hit:
+                    classification_memo.set(memo_keys[i], (item.type, item.confidence))
+        
+        classified_messages = [r for r in results if r is not None]
         
         explanation = f"Classified {len(classified_messages)} message(s)"
+        if reused:
+            explanation += f" ({reused} reused from earlier batches)"
+        if noise:
+            explanation += f" ({len(noise)} tagged as noise locally)"
         if llm_error:
             explanation += f" [LLM Note: {llm_error}]"
         
@@ -192,38 +171,311 @@ Return a JSON array with one object per message:
             explanation=explanation
         )
     
-    def _fallback_classify(self, text: str) -> tuple:
-        """Fallback keyword-based classification"""
-        text_lower = text.lower()
-        types = []
+    def _split_noise(
+        self,
+        messages: List[ChatMessage],
+        indices: List[int]
+    ) -> Tuple[Dict[int, ClassifiedMessage], List[int]]:
+        """
+        Local noise pre-filter: messages whose noise confidence reaches
+        CLASSIFY_PREFILTER_THRESHOLD are tagged OTHER without an LLM call.
+        Returns the tagged messages by index and the indices still to classify.
+        """
+        if not settings.CLASSIFY_PREFILTER_ENABLED:
+            return {}, indices
         
-        # Decision Markers
-        if any(w in text_lower for w in ["decided", "choose", "go with", "confirmed", "agreed", "settled on", "final", "approved", "decision", "resolv", "finalize"]):
-            types.append("DECISION")
+        noise = {}
+        remaining = []
+        for i in indices:
+            msg = messages[i]
+            score, reason = filter_service.noise_confidence(msg.message)
+            if score >= settings.CLASSIFY_PREFILTER_THRESHOLD:
+                noise[i] = ClassifiedMessage(
+                    user=msg.user,
+                    message=msg.message,
+                    timestamp=msg.timestamp,
+                    type=[MessageType.OTHER],
+                    confidence=ConfidenceScore(score=score, reason=f"Local noise filter: {reason}"),
+                    metadata=msg.metadata
+                )
+            else:
+                remaining.append(i)
+        return noise, remaining
+    
+    def invalidate(self, messages: List[ChatMessage]) -> int:
+        """Drop memoized classifications for edited messages (pass the old versions)"""
+        return sum(1 for msg in messages if classification_memo.invalidate(msg))
+    
+    @staticmethod
+    def _from_memo(msg: ChatMessage, entry: tuple) -> ClassifiedMessage:
+        """Rebuild a ClassifiedMessage for msg from a memoized classification"""
+        message_types, confidence = entry
+        return ClassifiedMessage(
+            user=msg.user,
+            message=msg.message,
+            timestamp=msg.timestamp,
+            type=list(message_types),
+            confidence=confidence,
+            metadata=msg.metadata
+        )
+    
+    async def _classify_chunked(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> Tuple[List[ClassifiedMessage], List[bool], Optional[str]]:
+        """Split large batches by token budget and classify the chunks concurrently"""
+        from app.services.base import logger
         
-        # Action Markers
-        if any(w in text_lower for w in ["will do", "implement", "build", "create", "complete", "finish", "deliver", "ship", "send", "deploy", "by tomorrow", "task", "follow up"]):
-            types.append("ACTION")
+        chunks = self.chunk_messages(messages)
+        if len(chunks) <= 1:
+            return await self._classify_batch(messages, context)
         
-        # Assumption Markers
-        if any(w in text_lower for w in ["assume", "assuming", "probably", "think", "believe", "expect", "likely", "should be", "guess", "trust"]):
-            types.append("ASSUMPTION")
+        logger.info(f"Splitting {len(messages)} messages into {len(chunks)} chunks (parallel={settings.CHUNK_MAX_PARALLEL})")
+        outputs = await gather_bounded(
+            [lambda chunk=chunk: self._classify_batch([messages[i] for i in chunk], context) for chunk in chunks],
+            settings.CHUNK_MAX_PARALLEL
+        )
         
-        # Suggestion Markers
-        if any(w in text_lower for w in ["suggest", "maybe", "consider", "could", "might", "try", "what if", "how about", "perhaps", "proposal", "idea"]):
-            types.append("SUGGESTION")
+        # Merge chunk results back into global positions
+        classified: List[Optional[ClassifiedMessage]] = [None] * len(messages)
+        from_llm = [False] * len(messages)
+        errors = []
+        for chunk, (items, hits, error) in zip(chunks, outputs):
+            for i, item, hit in zip(chunk, items, hits):
+                classified[i] = item
+                from_llm[i] = hit
+            if error:
+                errors.append(error)
         
-        # Constraint Markers
-        if any(w in text_lower for w in ["must", "should", "have to", "need to", "required", "cannot", "can't", "limit", "restriction", "mandatory", "never", "only"]):
-            types.append("CONSTRAINT")
-
-        # Question Markers
-        if "?" in text_lower or any(w in text_lower for w in ["how", "why", "when", "who", "what", "where", "whether", "if "]):
-            types.append("QUESTION")
+        return classified, from_llm, (errors[0] if errors else None)
+    
+    async def _classify_batch(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> Tuple[List[ClassifiedMessage], List[bool], Optional[str]]:
+        """
+        Classify one batch with a single LLM call.
+        Returns the classified messages, whether each came from the LLM
+        (as opposed to the keyword fallback), and the LLM error if any.
+        """
+        from app.services.base import logger
         
+        # Build prompt and query LLM
+        with self.span("prompt"):
+            user_prompt = self.build_user_prompt(messages, context)
+        response = await self.query(user_prompt)
+        
+        # Parse response
+        with self.span("parse"):
+            classifications = self.parse_response(response)
+            if settings.COMPACT_PROMPTS:
+                classifications = CompactCodec(messages).decode(classifications)
+        
+        with self.span("build"):
+            # Build output with fallback
+            classified_messages = []
+            from_llm = []
+            llm_error = response.get("error") if not response.get("success") else None
+            
+            # Index LLM results by their index field ("3", 3, "#3", ...)
+            by_index = {}
+            if isinstance(classifications, list):
+                for c in classifications:
+                    if isinstance(c, dict):
+                        by_index.setdefault(decode_index(c.get("index"), len(messages)), c)
+            
+            # Keyword fallback for every unmatched message in one pass
+            unmatched = [i for i in range(len(messages)) if i not in by_index]
+            fallbacks = dict(zip(unmatched, self._fallback_classify_batch([messages[i].message for i in unmatched])))
+            
+            for i, msg in enumerate(messages):
+                classification = by_index.get(i)
+                classified_messages.append(
+                    self._to_classified(i, msg, classification, fallbacks.get(i), llm_error)
+                )
+                from_llm.append(classification is not None)
+        
+        return classified_messages, from_llm, llm_error
+    
+    def _to_classified(
+        self,
+        i: int,
+        msg: ChatMessage,
+        classification: Optional[dict],
+        fallback: Optional[tuple],
+        llm_error: Optional[str]
+    ) -> ClassifiedMessage:
+        """Build the output for one message from its LLM classification or keyword fallback"""
+        from app.services.base import logger
+        
+        if classification:
+            # Support multiple key names commonly used by LLMs
+            raw_types = classification.get("types", classification.get("type", classification.get("category", [])))
+            if isinstance(raw_types, str):
+                raw_types = [raw_types]
+            
+            confidence = float(classification.get("confidence", 0.7))
+            reason = classification.get("reason", "LLM classification")
+            logger.debug(f"Msg {i} matched LLM result: {raw_types}")
+        else:
+            # Fallback to keyword-based
+            self._metrics.fallbacks.inc()
+            raw_types, confidence = fallback or self._fallback_classify(msg.message)
+            reason = "Fallback keyword classification"
+            if llm_error:
+                reason += f" (LLM failure: {llm_error})"
+            else:
+                reason += " (No LLM match for index)"
+            logger.info(f"Msg {i} using fallback. LLM Error: {llm_error}")
+        
+        # Convert to MessageType enums
+        message_types = []
+        for t in raw_types:
+            try:
+                t_clean = str(t).upper().strip().replace(" ", "_")
+                # Handle common synonyms
+                if t_clean == "RESOLVED": t_clean = "DECISION"
+                if t_clean == "TASK": t_clean = "ACTION"
+                
+                message_types.append(MessageType[t_clean])
+            except (KeyError, AttributeError):
+                logger.warning(f"Unknown type '{t}' for Msg {i}")
+                pass
+        
+        if not message_types:
+            # If conversion failed, try mapping or default to OTHER
+            message_types = [MessageType.OTHER]
+        
+        return ClassifiedMessage(
+            user=msg.user,
+            message=msg.message,
+            timestamp=msg.timestamp,
+            type=message_types,
+            confidence=ConfidenceScore(
+                score=normalize_confidence(confidence),
+                reason=reason
+            ),
+            metadata=msg.metadata
+        )
+    
+    async def classify_stream(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> AsyncIterator[ClassifiedMessage]:
+        """
+        Classify messages, yielding each ClassifiedMessage as soon as it is known:
+        memoized messages first, then LLM results as Gemini streams them,
+        then keyword fallbacks for anything the stream did not cover.
+        """
+        from app.services.base import logger
+        logger.info(f"Streaming classification of {len(messages)} messages")
+        
+        pending = list(range(len(messages)))
+        memo_keys = None
+        if settings.CLASSIFY_MEMO_ENABLED:
+            memo_keys = [classification_memo.key_for(msg) for msg in messages]
+            pending = []
+            for i, key in enumerate(memo_keys):
+                entry = classification_memo.get(key)
+                if entry:
+                    yield self._from_memo(messages[i], entry)
+                else:
+                    pending.append(i)
+        noise, pending = self._split_noise(messages, pending)
+        for item in noise.values():
+            yield item
+        if not pending:
+            return
+        
+        # Chunks stream concurrently; items are forwarded in arrival order
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(1, settings.CHUNK_MAX_PARALLEL))
+        
+        async def run(indices: List[int]) -> None:
+            async with semaphore:
+                batch = [messages[i] for i in indices]
+                emitted = set()
+                try:
+                    async for local, item, llm_hit in self._stream_batch(batch, context):
+                        if memo_keys is not None and llm_hit:
+                            classification_memo.set(memo_keys[indices[local]], (item.type, item.confidence))
+                        emitted.add(local)
+                        await queue.put(item)
+                except Exception as e:
+                    # Whatever the chunk did not emit still gets a keyword fallback line
+                    logger.error(f"Streaming classification chunk failed: {e}", exc_info=True)
+                    missing = [j for j in range(len(batch)) if j not in emitted]
+                    fallbacks = self._fallback_classify_batch([batch[j].message for j in missing])
+                    for j, fallback in zip(missing, fallbacks):
+                        await queue.put(self._to_classified(j, batch[j], None, fallback, str(e)))
+        
+        async def run_all() -> None:
+            chunks = self.chunk_messages([messages[i] for i in pending])
+            results = await asyncio.gather(
+                *(run([pending[j] for j in chunk]) for chunk in chunks),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Streaming classification chunk failed: {result}")
+            await queue.put(None)
+        
+        producer = asyncio.ensure_future(run_all())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            producer.cancel()
+    
+    async def _stream_batch(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> AsyncIterator[Tuple[int, ClassifiedMessage, bool]]:
+        """Stream one batch: yields (batch index, classified message, from LLM)"""
+        user_prompt = self.build_user_prompt(messages, context)
+        codec = CompactCodec(messages) if settings.COMPACT_PROMPTS else None
+        parser = JsonStreamParser()
+        emitted = set()
+        llm_error = None
+        
+        try:
+            async for text in self.query_stream(user_prompt):
+                for event in parser.feed(text):
+                    if event.key not in ("classifications", "extracted", None) or not isinstance(event.value, dict):
+                        continue
+                    i = decode_index(event.value.get("index"), len(messages))
+                    if i is not None and i not in emitted:
+                        emitted.add(i)
+                        value = codec.decode(event.value) if codec else event.value
+                        yield i, self._to_classified(i, messages[i], value, None, None), True
+        except LLMStreamError as e:
+            llm_error = str(e)
+        
+        missing = [i for i in range(len(messages)) if i not in emitted]
+        fallbacks = self._fallback_classify_batch([messages[i].message for i in missing])
+        for i, fallback in zip(missing, fallbacks):
+            yield i, self._to_classified(i, messages[i], None, fallback, llm_error), False
+    
+    def _fallback_classify(self, text: str) -> tuple:
+        """Fallback keyword-based classification"""
+        return self._fallback_types(CLASSIFIER_RULES.match(text))
+    
+    def _fallback_classify_batch(self, texts: List[str]) -> List[tuple]:
+        """Fallback keyword-based classification for many messages in one pass"""
+        return [self._fallback_types(hits) for hits in CLASSIFIER_RULES.match_batch(texts)]
+    
+    @staticmethod
+    def _fallback_types(hits: set) -> tuple:
+        types = [c for c in CLASSIFIER_RULES.categories if c in hits]
         if not types:
             types = ["OTHER"]
-            
         return (types, 0.4)
 
 
@@ -0,0 +1,157 @@
+"""
+Cross-request micro-batcher for classification.
+Collects /ai/classify requests that arrive within a short window and sends
+them to ClassifierService as one indexed batch, then splits the result back
+out to each caller.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.schemas.input import ChatMessage, ContextIn
+from app.schemas.output import ClassifyOut
+
+
+logger = logging.getLogger(__name__)
+
+ClassifyFn = Callable[[List[ChatMessage], Optional[ContextIn]], Awaitable[ClassifyOut]]
+
+
+class _Batch:
+    """Requests collected for one context during one window"""
+
+    def __init__(self, context: Optional[ContextIn]):
+        self.context = context
+        self.messages: List[ChatMessage] = []
+        # (future, offset, count) per caller
+        self.waiters: List[Tuple[asyncio.Future, int, int]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, messages: List[ChatMessage]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((future, len(self.messages), len(messages)))
+        self.messages.extend(messages)
+        return future
+
+
+class ClassifyBatcher:
+    """Merges concurrent classify requests that share the same context"""
+
+    def __init__(self, classify_fn: ClassifyFn, window_ms: float = 5.0, max_messages: int = 200):
+        self.classify_fn = classify_fn
+        self.window_ms = window_ms
+        self.max_messages = max_messages
+        self._open: Dict[str, _Batch] = {}
+        # Strong references to dispatched batches so they are not garbage-collected mid-flight
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.requests = 0
+        self.messages = 0
+        self.full_batches = 0
+        self.last_fill_ratio = 0.0
+
+    @staticmethod
+    def _context_key(context: Optional[ContextIn]) -> str:
+        # Only requests with identical context can share a prompt
+        return context.model_dump_json() if context else ""
+
+    async def classify(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> ClassifyOut:
+        """Classify messages, possibly merged with other callers' messages"""
+        if not messages or len(messages) >= self.max_messages:
+            return await self.classify_fn(messages, context)
+
+        key = self._context_key(context)
+        batch = self._open.get(key)
+        if batch is not None and len(batch.messages) + len(messages) > self.max_messages:
+            self._flush(key, batch)
+            batch = None
+        if batch is None:
+            batch = _Batch(context)
+            self._open[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.window_ms / 1000.0, self._flush, key, batch
+            )
+
+        future = batch.add(messages)
+        if len(batch.messages) >= self.max_messages:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: str, batch: _Batch) -> None:
+        """Close a batch and dispatch it"""
+        if self._open.get(key) is batch:
+            del self._open[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+
+        self.batches += 1
+        self.requests += len(batch.waiters)
+        self.messages += len(batch.messages)
+        self.last_fill_ratio = len(batch.messages) / self.max_messages
+        if len(batch.messages) >= self.max_messages:
+            self.full_batches += 1
+        logger.debug(
+            f"Flushing classify batch: {len(batch.waiters)} request(s), "
+            f"{len(batch.messages)}/{self.max_messages} messages"
+        )
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        try:
+            result = await self.classify_fn(batch.messages, batch.context)
+            total = len(batch.messages)
+            for future, offset, count in batch.waiters:
+                if future.done():
+                    continue
+                explanation = result.explanation or ""
+                if len(batch.waiters) > 1:
+                    explanation += f" [batched: {count} of {total} messages]"
+                future.set_result(ClassifyOut(
+                    messages=result.messages[offset:offset + count],
+                    explanation=explanation
+                ))
+        except Exception as e:
+            for future, _, _ in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancellation must not leave callers waiting forever
+            for future, _, _ in batch.waiters:
+                if not future.done():
+                    future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "open_batches": len(self._open),
+            "batches": self.batches,
+            "requests": self.requests,
+            "messages": self.messages,
+            "full_batches": self.full_batches,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "avg_fill_ratio": (
+                self.messages / (self.batches * self.max_messages) if self.batches else 0.0
+            ),
+            "last_fill_ratio": self.last_fill_ratio,
+        }
+
+
+def _classify(messages: List[ChatMessage], context: Optional[ContextIn]) -> Awaitable[ClassifyOut]:
+    from app.services.classifier_service import classifier_service
+    return classifier_service.classify(messages, context)
+
+
+# Singleton instance
+classify_batcher = ClassifyBatcher(
+    classify_fn=_classify,
+    window_ms=settings.CLASSIFY_BATCH_WINDOW_MS,
+    max_messages=settings.CLASSIFY_BATCH_MAX_MESSAGES,
+)
@@ -0,0 +1,153 @@
+"""
+Gemini context caching for static system prompts.
+Each service's prompt template is uploaded once as a cachedContents resource
+and referenced by name from generateContent, refreshed before it expires.
+If caching is unavailable (prompt below the model's minimum, API errors),
+callers fall back to sending the template inline as systemInstruction.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.config.settings import settings
+from app.services.http_client import gemini_url, get_http_client
+from app.utils.tokens import estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCache:
+    """Creates, refreshes and forgets cachedContents per (model, system prompt)"""
+
+    def __init__(self):
+        # key -> (cachedContents name, monotonic expiry)
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        # key -> monotonic time before which creation is not retried
+        self._unavailable_until: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.created = 0
+        self.refreshed = 0
+        self.failures = 0
+
+    @staticmethod
+    def key_for(system: str) -> str:
+        return hashlib.sha256(f"{settings.MODEL}\0{system}".encode("utf-8")).hexdigest()
+
+    async def get(self, system: Optional[str]) -> Optional[str]:
+        """
+        Name of a live cachedContents holding `system`, creating or refreshing
+        it as needed; None means send the prompt inline.
+        """
+        if not settings.GEMINI_CONTEXT_CACHE_ENABLED or not system:
+            return None
+        if estimate_tokens(system) < settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+            return None
+
+        key = self.key_for(system)
+        name = self._fresh(key)
+        if name is not None:
+            return name
+        if self._unavailable_until.get(key, 0.0) > time.monotonic():
+            return None
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        entry = self._entries.get(key)
+        if lock.locked() and entry and entry[1] > time.monotonic():
+            # Another request is refreshing; the current entry is still valid
+            return entry[0]
+
+        async with lock:
+            name = self._fresh(key)
+            if name is not None:
+                return name
+            if self._unavailable_until.get(key, 0.0) > time.monotonic():
+                return None
+
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic() and await self._refresh(entry[0]):
+                self._entries[key] = (entry[0], time.monotonic() + settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+                self.refreshed += 1
+                return entry[0]
+
+            name = await self._create(system)
+            if name is None:
+                self.failures += 1
+                self._entries.pop(key, None)
+                self._unavailable_until[key] = time.monotonic() + settings.GEMINI_CONTEXT_CACHE_RETRY_SECONDS
+                return None
+            self._entries[key] = (name, time.monotonic() + settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+            self._unavailable_until.pop(key, None)
+            self.created += 1
+            return name
+
+    def invalidate(self, system: str) -> None:
+        """Forget the cache for `system` (e.g. Gemini no longer recognizes its name)"""
+        self._entries.pop(self.key_for(system), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._unavailable_until.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+        }
+
+    def _fresh(self, key: str) -> Optional[str]:
+        """Cached name if it is not yet due for refresh"""
+        entry = self._entries.get(key)
+        if entry and entry[1] - time.monotonic() > settings.GEMINI_CONTEXT_CACHE_REFRESH_SECONDS:
+            return entry[0]
+        return None
+
+    async def _create(self, system: str) -> Optional[str]:
+        try:
+            response = await get_http_client().post(
+                gemini_url("cachedContents"),
+                headers={"Content-Type": "application/json"},
+                params={"key": settings.GEMINI_API_KEY},
+                json={
+                    "model": f"models/{settings.MODEL}",
+                    "systemInstruction": {"parts": [{"text": system}]},
+                    "ttl": f"{settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS}s",
+                },
+            )
+            if response.status_code != 200:
+                logger.warning(f"Context cache unavailable: HTTP {response.status_code} - {response.text[:300]}")
+                return None
+            name = response.json().get("name")
+            if name:
+                logger.info(f"Created Gemini context cache {name}")
+            return name
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Context cache creation failed: {e}")
+            return None
+
+    async def _refresh(self, name: str) -> bool:
+        try:
+            response = await get_http_client().patch(
+                gemini_url(name),
+                headers={"Content-Type": "application/json"},
+                params={"key": settings.GEMINI_API_KEY, "updateMask": "ttl"},
+                json={"ttl": f"{settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS}s"},
+            )
+            if response.status_code != 200:
+                logger.warning(f"Context cache refresh of {name} failed: HTTP {response.status_code}")
+                return False
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Context cache refresh of {name} failed: {e}")
+            return False
+
+
+# Singleton instance
+context_cache = ContextCache()
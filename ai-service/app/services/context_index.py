@@ -0,0 +1,88 @@
+"""
+Inverted index over prior context items for the fallback contradiction detector.
+Maps each topic token to the context items that contain it, so topic overlap
+with a new message is a few posting-list lookups instead of pairwise set
+intersections. Indexes are cached per distinct context.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.schemas.input import ContextIn
+
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Context kinds in the order they are indexed and reported
+KINDS = (
+    ("decision", "prior_decisions"),
+    ("constraint", "prior_constraints"),
+    ("assumption", "prior_assumptions"),
+    ("action", "prior_actions"),
+)
+
+
+def topic_tokens(text: str) -> Set[str]:
+    """Lowercased word tokens long enough to carry a topic"""
+    return {w for w in TOKEN_RE.findall(text.lower()) if len(w) > 3}
+
+
+class ContextIndex:
+    """Token -> context item ids over one ContextIn"""
+
+    def __init__(self, context: ContextIn):
+        # (kind, text) per item id
+        self.items: List[Tuple[str, str]] = []
+        self.counts: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        for kind, field in KINDS:
+            values = getattr(context, field) or []
+            self.counts[kind] = len(values)
+            for value in values:
+                item_id = len(self.items)
+                self.items.append((kind, value))
+                for token in topic_tokens(value):
+                    self.postings.setdefault(token, []).append(item_id)
+
+    def overlapping(self, tokens: Iterable[str], kinds: Optional[Set[str]] = None) -> List[int]:
+        """Ids (in index order) of items sharing at least one token"""
+        found: Set[int] = set()
+        for token in tokens:
+            found.update(self.postings.get(token, ()))
+        ids = sorted(found)
+        if kinds is not None:
+            ids = [i for i in ids if self.items[i][0] in kinds]
+        return ids
+
+
+class ContextIndexCache:
+    """Small LRU of ContextIndex objects keyed by a hash of the context"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ContextIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, context: ContextIn) -> ContextIndex:
+        key = hashlib.sha256(context.model_dump_json().encode("utf-8")).hexdigest()
+        index = self._entries.get(key)
+        if index is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return index
+        self.misses += 1
+        index = ContextIndex(context)
+        self._entries[key] = index
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return index
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton instance
+context_index_cache = ContextIndexCache()
@@ -4,10 +4,25 @@ Contradiction Service - Detects conflicts and inconsistencies in conversation.
 
 from typing import List, Optional, Tuple
 
+from app.config.settings import settings
+from app.schemas.context import RequestContext
 from app.schemas.input import ChatMessage, ContextIn
 from app.schemas.output import ContradictOut, Contradiction, ConfidenceScore
 from app.services.base import LLMClient
+from app.services.claim_store import claim_store
+from app.services.context_index import context_index_cache, topic_tokens
+from app.services.fallback_rules import CONFLICT_RULES
 from app.utils.confidence import normalize_confidence
+from app.utils.prompt_encoding import CompactCodec
+
+
+# Conflict marker category -> context kind it is checked against
+MARKER_KINDS = {
+    "DECISION_CONFLICT": "decision",
+    "CONSTRAINT_VIOLATION": "constraint",
+    "ASSUMPTION_CONFLICT": "assumption",
+    "REVERSAL": "action",
+}
 
 
 class ContradictionService(LLMClient[ContradictOut]):
@@ -15,6 +30,7 @@ class ContradictionService(LLMClient[ContradictOut]):
     
     def __init__(self):
         super().__init__(
+            name="contradiction",
             prompt_file="contradiction.txt",
             temperature=0.1,  # Very low for precise reasoning
             max_tokens=2048
@@ -23,20 +39,23 @@ class ContradictionService(LLMClient[ContradictOut]):
     def build_user_prompt(
         self,
         messages: List[ChatMessage],
-        context: Optional[ContextIn] = None
+        context: Optional[ContextIn] = None,
+        earlier_claims: Optional[List[str]] = None
     ) -> str:
         """Build contradiction detection prompt"""
         
         # Format new messages
-        new_messages = "\n".join([
-            f"[{msg.user}]: {msg.message}"
-            for msg in messages
-        ])
+        if settings.COMPACT_PROMPTS:
+            new_messages = CompactCodec(messages).encode(messages, index=False, timestamps=False)
+        else:
+            new_messages = "\n".join([
+                f"[{msg.user}]: {msg.message}"
+                for msg in messages
+            ])
         
         # Build prior context - this is critical for contradiction detection
-        context_str = "No prior context provided."
+        context_parts = []
         if context:
-            context_parts = []
             if context.prior_decisions:
                 for d in context.prior_decisions:
                     context_parts.append(f"DECISION: {d}")
@@ -49,8 +68,9 @@ class ContradictionService(LLMClient[ContradictOut]):
             if context.prior_constraints:
                 for c in context.prior_constraints:
                     context_parts.append(f"CONSTRAINT: {c}")
-            if context_parts:
-                context_str = "\n".join(context_parts)
+        for claim in earlier_claims or []:
+            context_parts.append(f"EARLIER MESSAGE: {claim}")
+        context_str = "\n".join(context_parts) if context_parts else "No prior context provided."
         
         return f"""
 PRIOR ESTABLISHED CONTEXT:
@@ -90,6 +110,8 @@ Return a JSON object:
         from app.services.base import logger
         logger.debug(f"Parsing contradiction response: {text}")
         parsed = self.parse_json(text)
+        if parsed is None:
+            self._metrics.parse_failures.inc()
         
         if parsed:
             contradictions = parsed.get("contradictions", [])
@@ -104,18 +126,65 @@ Return a JSON object:
     async def detect(
         self,
         messages: List[ChatMessage],
-        context: Optional[ContextIn] = None
+        context: Optional[ContextIn] = None,
+        request_context: Optional[RequestContext] = None
     ) -> ContradictOut:
-        """Detect contradictions in messages given prior context"""
+        """
+        Detect contradictions in messages given prior context.
+        With a conversation_id, only messages not yet checked in that
+        conversation are analysed, against the context accumulated across
+        calls, and contradictions reported before are suppressed.
+        """
+        conversation_id = request_context.conversation_id if request_context else None
+        if not conversation_id:
+            out, _ = await self._detect(messages, context)
+            return out
+        
+        from app.services.base import logger
+        claims = claim_store.get(conversation_id)
+        async with claims.lock:
+            merged = claims.merge_context(context)
+            new_messages = claims.unchecked(messages)
+            if not new_messages:
+                logger.info(f"No new messages to check for conversation {conversation_id}")
+                return ContradictOut(contradictions=[], is_consistent=True)
+            
+            logger.info(f"Checking {len(new_messages)}/{len(messages)} new messages for conversation {conversation_id}")
+            out, llm_ok = await self._detect(new_messages, merged, claims.earlier_claims())
+            if llm_ok:
+                # Fallback-only results are re-checked by the LLM next time
+                claims.mark_checked(new_messages)
+            fresh = [c for c in out.contradictions if claims.report(c)]
+            return ContradictOut(
+                contradictions=fresh,
+                is_consistent=out.is_consistent,
+                suppressed=len(out.contradictions) - len(fresh)
+            )
+    
+    async def _detect(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None,
+        earlier_claims: Optional[List[str]] = None
+    ) -> Tuple[ContradictOut, bool]:
+        """
+        Run one detection, with earlier messages of the conversation as prior
+        claims; also returns whether the LLM call succeeded
+        """
         from app.services.base import logger
         logger.info(f"Detecting contradictions in batch of {len(messages)} messages")
         
         # Build prompt and query LLM
-        user_prompt = self.build_user_prompt(messages, context)
+        with self.span("prompt"):
+            user_prompt = self.build_user_prompt(messages, context, earlier_claims)
         response = await self.query(user_prompt)
         
         # Parse response
-        contradiction_data, is_consistent, reasoning = self.parse_response(response)
+        with self.span("parse"):
+            contradiction_data, is_consistent, reasoning = self.parse_response(response)
+        if settings.COMPACT_PROMPTS:
+            codec = CompactCodec(messages)
+            contradiction_data, reasoning = codec.decode(contradiction_data), codec.decode(reasoning)
         
         # Build output
         contradictions = []
@@ -156,7 +225,7 @@ Return a JSON object:
         return ContradictOut(
             contradictions=contradictions,
             is_consistent=is_consistent if not contradictions else False
-        )
+        ), bool(response.get("success"))
     
     def _fallback_detect(
         self,
@@ -164,74 +233,75 @@ Return a JSON object:
         context: Optional[ContextIn]
     ) -> Tuple[List[Contradiction], bool]:
         """Fallback keyword-based contradiction detection"""
+        self._metrics.fallbacks.inc()
         contradictions = []
-        is_consistent = True
-        text_lower = text.lower()
         
-        # Conflict markers from contradiction.txt
-        conflict_markers = {
-            "DECISION_CONFLICT": ["instead", "changed mind", "actually", "no longer", "better yet", "instead of", "but now", "revert", "cancel"],
-            "CONSTRAINT_VIOLATION": ["more than", "exceeds", "bypass", "ignore", "skip", "violate", "over budget", "too much", "limit"],
-            "ASSUMPTION_CONFLICT": ["not true", "false", "incorrect", "wrong", "turns out", "mistake", "error", "misunderstanding"],
-            "REVERSAL": ["won't", "can't", "stop", "cancel", "revert", "undo", "not doing", "quit", "abandon"]
-        }
+        # Conflict markers from contradiction.txt, matched in one pass
+        markers = CONFLICT_RULES.match(text)
+        if not context or not markers:
+            return contradictions, True
         
-        if context:
-            # Check for Decision conflicts by looking for negations/changes related to prior decisions
-            if context.prior_decisions:
-                for decision in context.prior_decisions:
-                    decision_lower = decision.lower()
-                    if any(m in text_lower for m in conflict_markers["DECISION_CONFLICT"]):
-                        # Check for word overlap to see if same topic
-                        decision_words = set(w for w in decision_lower.split() if len(w) > 3)
-                        text_words = set(w for w in text_lower.split() if len(w) > 3)
-                        if decision_words & text_words:
-                            contradictions.append(
-                                Contradiction(
-                                    claim_a=text,
-                                    claim_b=f"Prior decision: {decision}",
-                                    severity="high",
-                                    confidence=ConfidenceScore(score=0.4, reason="Decision conflict keywords + topic overlap"),
-                                    explanation="Message may contradict a prior decision using change-of-mind keywords."
-                                )
-                            )
-                            is_consistent = False
-
-            # Check for Constraint violations
-            if context.prior_constraints:
-                for constraint in context.prior_constraints:
-                    constraint_lower = constraint.lower()
-                    if any(m in text_lower for m in conflict_markers["CONSTRAINT_VIOLATION"]):
-                        constraint_words = set(w for w in constraint_lower.split() if len(w) > 3)
-                        text_words = set(w for w in text_lower.split() if len(w) > 3)
-                        if constraint_words & text_words:
-                            contradictions.append(
-                                Contradiction(
-                                    claim_a=text,
-                                    claim_b=f"Prior constraint: {constraint}",
-                                    severity="critical",
-                                    confidence=ConfidenceScore(score=0.4, reason="Constraint violation keywords"),
-                                    explanation="Message appears to bypass or exceed an established constraint."
-                                )
-                            )
-                            is_consistent = False
-
-            # Check for Reversals of actions
-            if context.prior_actions:
-                if any(m in text_lower for m in conflict_markers["REVERSAL"]):
-                    # If it's a "can't" or "won't" message, it might be reversing an action
-                     contradictions.append(
-                        Contradiction(
-                            claim_a=text,
-                            claim_b="Prior actions",
-                            severity="medium",
-                            confidence=ConfidenceScore(score=0.3, reason="Reversal keyword detected"),
-                            explanation="This message sounds like a refusal or reversal of a committed task."
-                        )
+        # Which context kinds the detected markers can conflict with
+        kinds = {kind for marker, kind in MARKER_KINDS.items() if marker in markers}
+        
+        # Topic overlap via the cached inverted index over the context
+        index = context_index_cache.get(context)
+        for item_id in index.overlapping(topic_tokens(text), kinds):
+            kind, prior = index.items[item_id]
+            if kind == "decision":
+                contradictions.append(
+                    Contradiction(
+                        claim_a=text,
+                        claim_b=f"Prior decision: {prior}",
+                        severity="high",
+                        confidence=ConfidenceScore(score=0.4, reason="Decision conflict keywords + topic overlap"),
+                        explanation="Message may contradict a prior decision using change-of-mind keywords."
+                    )
+                )
+            elif kind == "constraint":
+                contradictions.append(
+                    Contradiction(
+                        claim_a=text,
+                        claim_b=f"Prior constraint: {prior}",
+                        severity="critical",
+                        confidence=ConfidenceScore(score=0.4, reason="Constraint violation keywords"),
+                        explanation="Message appears to bypass or exceed an established constraint."
+                    )
+                )
+            elif kind == "assumption":
+                contradictions.append(
+                    Contradiction(
+                        claim_a=text,
+                        claim_b=f"Prior assumption: {prior}",
+                        severity="medium",
+                        confidence=ConfidenceScore(score=0.35, reason="Assumption conflict keywords + topic overlap"),
+                        explanation="Message may invalidate a prior assumption."
+                    )
+                )
+            else:
+                contradictions.append(
+                    Contradiction(
+                        claim_a=text,
+                        claim_b=f"Prior action: {prior}",
+                        severity="medium",
+                        confidence=ConfidenceScore(score=0.35, reason="Reversal keyword + topic overlap"),
+                        explanation="This message sounds like a refusal or reversal of this committed task."
                     )
-                     is_consistent = False
+                )
+        
+        # If it's a "can't" or "won't" message, it might be reversing an action
+        if "action" in kinds and index.counts["action"] and not any(c.claim_b.startswith("Prior action:") for c in contradictions):
+            contradictions.append(
+                Contradiction(
+                    claim_a=text,
+                    claim_b="Prior actions",
+                    severity="medium",
+                    confidence=ConfidenceScore(score=0.3, reason="Reversal keyword detected"),
+                    explanation="This message sounds like a refusal or reversal of a committed task."
+                )
+            )
         
-        return contradictions, is_consistent
+        return contradictions, not contradictions
 
 
 # Singleton instance
@@ -0,0 +1,68 @@
+"""
+Keyword rules for the degraded-mode fallback paths.
+Compiled once at import and shared by every service's _fallback_* method.
+"""
+
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+# Ordered: fallback classifications list categories in this order
+CLASSIFIER_RULES = KeywordMatcher({
+    "DECISION": [
+        "decided", "choose", "go with", "confirmed", "agreed", "settled on", "final",
+        "approved", "decision", "resolv*", "finaliz*",
+    ],
+    "ACTION": [
+        "will do", "implement*", "build*", "creat*", "complete", "finish*", "deliver*",
+        "ship", "send", "deploy*", "by tomorrow", "task*", "follow up",
+    ],
+    "ASSUMPTION": [
+        "assum*", "probably", "think", "believe", "expect*", "likely", "should be",
+        "guess", "trust",
+    ],
+    "SUGGESTION": [
+        "suggest*", "maybe", "consider*", "could", "might", "try", "what if", "how about",
+        "perhaps", "proposal", "idea",
+    ],
+    "CONSTRAINT": [
+        "must", "should", "have to", "need to", "required", "cannot", "can't", "limit*",
+        "restriction*", "mandatory", "never", "only",
+    ],
+    "QUESTION": [
+        "?", "how", "why", "when", "who", "what", "where", "whether", "if",
+    ],
+})
+
+FILTER_RULES = KeywordMatcher({
+    "SUBSTANTIVE": [
+        "decid*", "action*", "must", "should", "will", "need*", "deadline*", "by",
+        "complet*", "build*", "implement*", "assum*", "think", "suggest*", "consider*",
+        "constraint*",
+    ],
+})
+
+SUMMARY_RULES = KeywordMatcher({
+    "DECISION": ["decided", "chose", "agreed", "confirmed"],
+    "ACTION": ["investigat*", "implement*", "build*", "send", "deliver*"],
+    "BLOCKER": ["must", "should", "blocked", "waiting", "cannot"],
+    "QUESTION": ["?"],
+})
+
+CONFLICT_RULES = KeywordMatcher({
+    "DECISION_CONFLICT": [
+        "instead", "changed mind", "actually", "no longer", "better yet", "instead of",
+        "but now", "revert*", "cancel*",
+    ],
+    "CONSTRAINT_VIOLATION": [
+        "more than", "exceed*", "bypass*", "ignor*", "skip*", "violat*", "over budget",
+        "too much", "limit",
+    ],
+    "ASSUMPTION_CONFLICT": [
+        "not true", "false", "incorrect", "wrong", "turns out", "mistake*", "error*",
+        "misunderstanding",
+    ],
+    "REVERSAL": [
+        "won't", "can't", "stop*", "cancel*", "revert*", "undo", "not doing", "quit",
+        "abandon*",
+    ],
+})
@@ -2,11 +2,42 @@
 Filter Service - Filters useful vs noise messages.
 """
 
-from typing import List, Optional
+import re
+from typing import List, Optional, Tuple
 
+from app.config.settings import settings
 from app.schemas.input import ChatMessage
 from app.services.base import LLMClient
+from app.services.fallback_rules import CLASSIFIER_RULES, FILTER_RULES
+from app.utils.chunking import gather_bounded
 from app.utils.confidence import normalize_confidence
+from app.utils.prompt_encoding import CompactCodec, decode_index
+
+
+# Whole-message acknowledgments and greetings
+NOISE_PATTERNS = frozenset([
+    "ok", "okay", "thanks", "thank you", "thx", "ty",
+    "hi", "hello", "hey", "bye", "later",
+    "lol", "haha", "😀", "👍", "sure", "yep", "yeah",
+    "got it", "sounds good", "makes sense", "agreed"
+])
+
+# Acknowledgments that can settle a decision; never noise for the pre-filter
+AGREEMENT_PATTERNS = frozenset(["sounds good", "makes sense", "agreed"])
+
+# Words that never carry signal on their own; a message made only of these is noise
+NOISE_WORDS = frozenset([
+    "ok", "okay", "k", "kk", "thanks", "thank", "you", "thx", "ty", "tysm",
+    "hi", "hello", "hey", "bye", "later", "cya", "lol", "lmao", "sure",
+    "yep", "yeah", "yup", "cool", "nice", "great", "awesome", "np",
+    "welcome", "gm", "gn", "morning", "night", "got", "it",
+    "good", "all", "so", "much", "a", "lot"
+])
+
+_WORD_RE = re.compile(r"\w")
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+_LAUGH_RE = re.compile(r"^(?:(?:ha|he|hi|ja)+h?|l+o+l+|x?d+)$")
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
 
 
 class FilterResult:
@@ -31,6 +62,7 @@ class FilterService(LLMClient[FilterResult]):
     
     def __init__(self):
         super().__init__(
+            name="filter",
             prompt_file="nano_filter.txt",
             temperature=0.1,
             max_tokens=256
@@ -39,16 +71,19 @@ class FilterService(LLMClient[FilterResult]):
     def build_user_prompt(self, messages: List[ChatMessage]) -> str:
         """Build filter prompt"""
         
-        messages_json = []
-        for i, msg in enumerate(messages):
-            messages_json.append({
-                "index": i,
-                "user": msg.user,
-                "message": msg.message
-            })
-        
-        import json
-        messages_str = json.dumps(messages_json, indent=2)
+        if settings.COMPACT_PROMPTS:
+            messages_str = CompactCodec(messages).encode(messages, timestamps=False)
+        else:
+            messages_json = []
+            for i, msg in enumerate(messages):
+                messages_json.append({
+                    "index": i,
+                    "user": msg.user,
+                    "message": msg.message
+                })
+            
+            import json
+            messages_str = json.dumps(messages_json, indent=2)
         
         return f"""
 MESSAGES TO FILTER:
@@ -75,6 +110,8 @@ Return a JSON object:
         """Parse LLM response into filter results"""
         text = response.get("response", "{}")
         parsed = self.parse_json(text)
+        if parsed is None:
+            self._metrics.parse_failures.inc()
         
         if parsed and "results" in parsed:
             return parsed["results"]
@@ -88,21 +125,49 @@ Return a JSON object:
         from app.services.base import logger
         logger.info(f"Filtering {len(messages)} messages for signal vs noise")
         
+        chunks = self.chunk_messages(messages)
+        if len(chunks) <= 1:
+            filter_results = await self._filter_batch(messages)
+        else:
+            logger.info(f"Splitting {len(messages)} messages into {len(chunks)} chunks (parallel={settings.CHUNK_MAX_PARALLEL})")
+            outputs = await gather_bounded(
+                [lambda chunk=chunk: self._filter_batch([messages[i] for i in chunk]) for chunk in chunks],
+                settings.CHUNK_MAX_PARALLEL
+            )
+            filter_results = [result for output in outputs for result in output]
+        
+        useful_count = sum(1 for r in filter_results if r.useful)
+        logger.info(f"Filtering complete: {useful_count}/{len(messages)} messages marked as useful")
+        return filter_results
+    
+    async def _filter_batch(
+        self,
+        messages: List[ChatMessage]
+    ) -> List[FilterResult]:
+        """Filter one batch with a single LLM call"""
+        from app.services.base import logger
+        
         # Build prompt and query LLM
-        user_prompt = self.build_user_prompt(messages)
+        with self.span("prompt"):
+            user_prompt = self.build_user_prompt(messages)
         response = await self.query(user_prompt)
         
         # Parse response
-        results = self.parse_response(response)
+        with self.span("parse"):
+            results = self.parse_response(response)
+        if settings.COMPACT_PROMPTS:
+            results = CompactCodec(messages).decode(results)
+        
+        # Index LLM results by their index field ("3", 3, "#3", ...)
+        by_index = {}
+        for r in results:
+            if isinstance(r, dict):
+                by_index.setdefault(decode_index(r.get("index"), len(messages)), r)
         
         # Build output
         filter_results = []
         for i, msg in enumerate(messages):
-            # Find matching result
-            result = next(
-                (r for r in results if str(r.get("index")) == str(i)),
-                None
-            )
+            result = by_index.get(i)
             
             if result:
                 useful = result.get("useful", True)
@@ -111,6 +176,7 @@ Return a JSON object:
                 logger.debug(f"Msg {i} filtered by LLM: useful={useful} ({reason})")
             else:
                 # Fallback
+                self._metrics.fallbacks.inc()
                 useful, reason, confidence = self._fallback_filter(msg.message)
                 logger.debug(f"Msg {i} using fallback filter: useful={useful}")
             
@@ -123,8 +189,6 @@ Return a JSON object:
                 )
             )
         
-        useful_count = sum(1 for r in filter_results if r.useful)
-        logger.info(f"Filtering complete: {useful_count}/{len(messages)} messages marked as useful")
         return filter_results
     
     async def filter_single(self, text: str) -> FilterResult:
@@ -133,30 +197,40 @@ Return a JSON object:
         results = await self.filter_messages([msg])
         return results[0] if results else FilterResult(True, "default", 0.5, text)
     
+    def noise_confidence(self, text: str) -> Tuple[float, str]:
+        """
+        Confidence (0-1) that a message is pure noise, from local rules only.
+        Stricter than _fallback_filter: short or unknown words, questions,
+        agreements and any keyword the classifier rules know never count as noise.
+        """
+        text_lower = text.lower().strip()
+        if not _WORD_RE.search(text_lower):
+            return (0.95, "Emoji or punctuation only") if text_lower else (0.95, "Empty message")
+        if "?" in text_lower or FILTER_RULES.match(text_lower) or CLASSIFIER_RULES.match(text_lower):
+            return 0.0, "Question or substantive keywords"
+        
+        # "okkk", "thanksss!!" -> "ok", "thanks"
+        normalized = _REPEAT_RE.sub(r"\1", text_lower).strip(" .!~")
+        if normalized in AGREEMENT_PATTERNS:
+            return 0.0, "Agreement may settle a decision"
+        if normalized in NOISE_PATTERNS:
+            return 0.9, "Short acknowledgment or greeting"
+        
+        words = _TOKEN_RE.findall(normalized)
+        if words and all(w in NOISE_WORDS or _LAUGH_RE.match(w) for w in words):
+            return 0.85, "Only acknowledgment or greeting words"
+        return 0.0, "Not obvious noise"
+    
     def _fallback_filter(self, text: str) -> tuple:
         """Fallback keyword-based filtering"""
         text_lower = text.lower().strip()
         
-        # Noise patterns
-        noise_patterns = [
-            "ok", "okay", "thanks", "thank you", "thx", "ty",
-            "hi", "hello", "hey", "bye", "later",
-            "lol", "haha", "😀", "👍", "sure", "yep", "yeah",
-            "got it", "sounds good", "makes sense", "agreed"
-        ]
-        
         # Check if message is just noise
-        if text_lower in noise_patterns or len(text_lower) < 3:
+        if text_lower in NOISE_PATTERNS or len(text_lower) < 3:
             return False, "Short acknowledgment or greeting", 0.8
         
         # Check for substantive content
-        substantive_markers = [
-            "decide", "action", "must", "should", "will", "need",
-            "deadline", "by", "complete", "build", "implement",
-            "assume", "think", "suggest", "consider", "constraint"
-        ]
-        
-        if any(marker in text_lower for marker in substantive_markers):
+        if FILTER_RULES.match(text_lower):
             return True, "Contains substantive keywords", 0.75
         
         # Default to useful if not obvious noise
@@ -0,0 +1,75 @@
+"""
+Shared HTTP client for outbound Gemini calls.
+The FastAPI lifespan owns it; scripts and tests get a lazily created one.
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+
+from app.config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def gemini_url(path: str) -> str:
+    """Absolute URL for a Gemini API path (e.g. "cachedContents") under GEMINI_BASE_URL"""
+    return f"{settings.GEMINI_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def _build_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Create a pooled keep-alive client from Settings"""
+    return httpx.AsyncClient(
+        transport=transport,
+        http2=settings.HTTP2_ENABLED,
+        timeout=httpx.Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_WRITE_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def start_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Open the shared client (called from the app lifespan).
+    A transport (e.g. httpx.MockTransport or an ASGI app) replaces the network,
+    which lets tests and local runs point the service at a fake Gemini.
+    """
+    global _client
+    if transport is not None:
+        await close_http_client()
+    if _client is None or _client.is_closed:
+        _client = _build_client(transport)
+        logger.info(
+            f"Opened shared HTTP client (http2={settings.HTTP2_ENABLED}, "
+            f"max_connections={settings.HTTP_MAX_CONNECTIONS})"
+        )
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use outside the app"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and drop its pooled connections"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Closed shared HTTP client")
+    _client = None
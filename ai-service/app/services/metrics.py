@@ -0,0 +1,235 @@
+"""
+In-process metrics exposed in Prometheus text format at /ai/metrics.
+Metric families and their label values are registered up front; hot paths
+hold bound children and only add to numbers. Text is produced on scrape,
+together with the stats of the caches, stores and Gemini guards.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Seconds; LLM calls can take tens of seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Characters of prompt / response text
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Values of LLMClient result["error_kind"], plus "other" for results without one
+ERROR_KINDS = ("http", "timeout", "network", "unexpected", "rate_limited", "circuit_open", "other")
+
+# (labels, value) pairs produced by a collector for one metric name
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Value:
+    """A counter or gauge child"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramValue:
+    """A histogram child; bucket counts are cumulated on scrape"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """One metric name with a fixed set of label names"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str] = (), buckets=None):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Child for these label values, created on first use; bind it once and reuse it"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = HistogramValue(self.buckets) if self.kind == "histogram" else Value()
+            self._children[values] = child
+        return child
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            if self.kind != "histogram":
+                out.append(f"{self.name}{_label_text(labels)} {_number(child.value)}")
+                continue
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                running += count
+                out.append(f"{self.name}_bucket{_label_text({**labels, 'le': _number(bound)})} {running}")
+            out.append(f"{self.name}_sum{_label_text(labels)} {_number(child.sum)}")
+            out.append(f"{self.name}_count{_label_text(labels)} {child.count}")
+
+
+class MetricsRegistry:
+    """Registered metric families plus collectors read at scrape time"""
+
+    def __init__(self, prefix: str = "signaldesk"):
+        self.prefix = prefix
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(f"{self.prefix}_{name}", help_text, "counter", labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(f"{self.prefix}_{name}", help_text, "gauge", labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> MetricFamily:
+        return self._register(MetricFamily(f"{self.prefix}_{name}", help_text, "histogram", labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callable yielding (name, kind, help, samples) on each scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        out: List[str] = []
+        for family in self._families.values():
+            family.render(out)
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                full = f"{self.prefix}_{name}"
+                out.append(f"# HELP {full} {help_text}")
+                out.append(f"# TYPE {full} {kind}")
+                for labels, value in samples:
+                    out.append(f"{full}{_label_text(labels)} {_number(value)}")
+        return "\n".join(out) + "\n"
+
+
+# Singleton instance
+metrics = MetricsRegistry()
+
+HTTP_LATENCY = metrics.histogram("http_request_duration_seconds", "Time to complete an HTTP request", ("endpoint",))
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by endpoint and status", ("endpoint", "status"))
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being served", ("endpoint",))
+
+LLM_LATENCY = metrics.histogram(
+    "llm_query_duration_seconds", "LLMClient.query time per service, including cache hits and retries", ("service",)
+)
+LLM_IN_FLIGHT = metrics.gauge("llm_queries_in_flight", "LLMClient.query calls in progress", ("service",))
+GEMINI_LATENCY = metrics.histogram("gemini_roundtrip_seconds", "Gemini generateContent HTTP round trip", ("service",))
+GEMINI_ERRORS = metrics.counter("gemini_errors_total", "Failed Gemini calls by error kind", ("service", "kind"))
+PROMPT_CHARS = metrics.histogram(
+    "llm_prompt_chars", "Characters sent to Gemini per call (system + user prompt)", ("service",), SIZE_BUCKETS
+)
+RESPONSE_CHARS = metrics.histogram(
+    "llm_response_chars", "Characters of response text received from Gemini", ("service",), SIZE_BUCKETS
+)
+PROMPT_TOKENS = metrics.counter("llm_prompt_tokens_total", "Estimated prompt tokens sent to Gemini", ("service",))
+RESPONSE_TOKENS = metrics.counter("llm_response_tokens_total", "Estimated response tokens received", ("service",))
+PARSE_FAILURES = metrics.counter("llm_parse_failures_total", "LLM responses with no usable JSON", ("service",))
+FALLBACKS = metrics.counter(
+    "fallback_total", "Keyword fallback uses (per message for classify/filter, per call otherwise)", ("service",)
+)
+
+
+class ServiceMetrics:
+    """Children of the LLM metric families bound to one service name"""
+
+    def __init__(self, service: str):
+        self.latency = LLM_LATENCY.labels(service)
+        self.in_flight = LLM_IN_FLIGHT.labels(service)
+        self.roundtrip = GEMINI_LATENCY.labels(service)
+        self.errors = {kind: GEMINI_ERRORS.labels(service, kind) for kind in ERROR_KINDS}
+        self.prompt_chars = PROMPT_CHARS.labels(service)
+        self.response_chars = RESPONSE_CHARS.labels(service)
+        self.prompt_tokens = PROMPT_TOKENS.labels(service)
+        self.response_tokens = RESPONSE_TOKENS.labels(service)
+        self.parse_failures = PARSE_FAILURES.labels(service)
+        self.fallbacks = FALLBACKS.labels(service)
+
+    def error(self, kind: Optional[str]) -> None:
+        (self.errors.get(kind) or self.errors["other"]).inc()
+
+
+class EndpointMetrics:
+    """Children of the HTTP metric families bound to one route path"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.latency = HTTP_LATENCY.labels(endpoint)
+        self.in_flight = HTTP_IN_FLIGHT.labels(endpoint)
+        self._statuses: Dict[int, Value] = {}
+
+    def status(self, code: int) -> Value:
+        child = self._statuses.get(code)
+        if child is None:
+            child = self._statuses[code] = HTTP_REQUESTS.labels(self.endpoint, str(code))
+        return child
+
+
+def stats_collector(sources: Dict[str, Callable[[], dict]]) -> Collector:
+    """
+    Collector exposing every numeric field of each source's stats() as a
+    gauge named `<source>_<field>`; string fields become a one-hot
+    `<source>_<field>` gauge with the value as a label.
+    """
+    def collect():
+        for source, stats in sources.items():
+            for field, value in stats().items():
+                if isinstance(value, bool):
+                    value = float(value)
+                if isinstance(value, (int, float)):
+                    yield f"{source}_{field}", "gauge", f"{source} {field}", [({}, value)]
+                elif isinstance(value, str):
+                    yield f"{source}_{field}", "gauge", f"{source} {field}", [({field: value}, 1)]
+    return collect
@@ -0,0 +1,157 @@
+"""
+Content-addressed store for message windows and context blocks.
+Lets callers send "stored window + new messages" and "stored context"
+instead of resending full payloads. Messages are stored once by content hash
+and shared between overlapping windows; windows and contexts are LRU-bounded.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Response
+
+from app.config.settings import settings
+from app.schemas.input import ChatMessage, ContextIn, WindowRequest
+
+
+logger = logging.getLogger(__name__)
+
+WINDOW_HANDLE_HEADER = "X-Window-Handle"
+CONTEXT_HANDLE_HEADER = "X-Context-Handle"
+
+
+class UnknownHandleError(Exception):
+    """A window or context handle is not (or no longer) in the store"""
+
+    def __init__(self, kind: str, handle: str):
+        super().__init__(f"Unknown {kind} handle: {handle}")
+        self.kind = kind
+        self.handle = handle
+
+
+def _digest(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class PayloadStore:
+    """LRU of windows (tuples of message hashes) and context blocks, with refcounted messages"""
+
+    def __init__(self, max_windows: int = 2000, max_contexts: int = 2000):
+        self.max_windows = max_windows
+        self.max_contexts = max_contexts
+        self._messages: Dict[str, ChatMessage] = {}
+        self._refs: Dict[str, int] = {}
+        self._windows: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._contexts: "OrderedDict[str, ContextIn]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def message_key(msg: ChatMessage) -> str:
+        return _digest(msg.model_dump_json())
+
+    def put_window(self, messages: List[ChatMessage]) -> str:
+        keys = tuple(self.message_key(msg) for msg in messages)
+        handle = "w_" + _digest("\x00".join(keys))
+        if handle in self._windows:
+            self._windows.move_to_end(handle)
+            return handle
+        for key, msg in zip(keys, messages):
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._messages.setdefault(key, msg)
+        self._windows[handle] = keys
+        while len(self._windows) > self.max_windows:
+            _, evicted = self._windows.popitem(last=False)
+            for key in evicted:
+                self._refs[key] -= 1
+                if not self._refs[key]:
+                    del self._refs[key]
+                    del self._messages[key]
+        return handle
+
+    def get_window(self, handle: str) -> List[ChatMessage]:
+        keys = self._windows.get(handle)
+        if keys is None:
+            self.misses += 1
+            raise UnknownHandleError("window", handle)
+        self._windows.move_to_end(handle)
+        self.hits += 1
+        return [self._messages[key] for key in keys]
+
+    def put_context(self, context: ContextIn) -> str:
+        handle = "c_" + _digest(context.model_dump_json())
+        self._contexts[handle] = context
+        self._contexts.move_to_end(handle)
+        while len(self._contexts) > self.max_contexts:
+            self._contexts.popitem(last=False)
+        return handle
+
+    def get_context(self, handle: str) -> ContextIn:
+        context = self._contexts.get(handle)
+        if context is None:
+            self.misses += 1
+            raise UnknownHandleError("context", handle)
+        self._contexts.move_to_end(handle)
+        self.hits += 1
+        return context
+
+    def resolve(
+        self,
+        req: WindowRequest,
+        response: Optional[Response] = None
+    ) -> Tuple[List[ChatMessage], Optional[ContextIn]]:
+        """
+        Expand a request's handles into its full message window and context,
+        store both, and put their handles on the response headers.
+        Raises UnknownHandleError if a handle is not in the store.
+        """
+        if not settings.PAYLOAD_STORE_ENABLED:
+            if req.window_handle:
+                raise UnknownHandleError("window", req.window_handle)
+            if req.context is None and req.context_handle:
+                raise UnknownHandleError("context", req.context_handle)
+            return req.messages, req.context
+
+        messages = list(req.messages)
+        if req.window_handle:
+            # Without a cap, "previous window + new messages" would grow forever;
+            # only stored messages are trimmed, never the ones sent in this request
+            limit = req.max_window or settings.PAYLOAD_STORE_MAX_WINDOW_MESSAGES
+            stored = self.get_window(req.window_handle)
+            keep = max(limit - len(messages), 0)
+            messages = (stored[-keep:] if keep else []) + messages
+        context = req.context
+        if context is None and req.context_handle:
+            context = self.get_context(req.context_handle)
+
+        window_handle = self.put_window(messages)
+        context_handle = self.put_context(context) if context is not None else None
+        if response is not None:
+            response.headers[WINDOW_HANDLE_HEADER] = window_handle
+            if context_handle:
+                response.headers[CONTEXT_HANDLE_HEADER] = context_handle
+        return messages, context
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._refs.clear()
+        self._windows.clear()
+        self._contexts.clear()
+
+    def stats(self) -> dict:
+        return {
+            "windows": len(self._windows),
+            "contexts": len(self._contexts),
+            "messages": len(self._messages),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Singleton instance
+payload_store = PayloadStore(
+    max_windows=settings.PAYLOAD_STORE_MAX_WINDOWS,
+    max_contexts=settings.PAYLOAD_STORE_MAX_CONTEXTS,
+)
@@ -0,0 +1,158 @@
+"""
+Adaptive outbound rate limiter for Gemini.
+Token buckets for requests/min and tokens/min whose rate follows AIMD:
+additive increase on success, multiplicative decrease on 429/503.
+"""
+
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from app.config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when capacity does not free up within the caller's wait budget"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Process-wide requests/tokens per minute limiter with AIMD rate control"""
+
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        min_rpm: float = 10.0,
+        increase_rpm: float = 5.0,
+        decrease_factor: float = 0.5,
+        burst_seconds: float = 5.0,
+        max_wait_seconds: float = 10.0,
+    ):
+        self.max_rpm = rpm
+        self.max_tpm = tpm
+        self.min_rpm = min_rpm
+        self.increase_rpm = increase_rpm
+        self.decrease_factor = decrease_factor
+        self.burst_seconds = burst_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+        self.rpm = rpm
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+
+        self.throttled = 0
+        self.waits = 0
+        self.rejected = 0
+
+    @property
+    def tpm(self) -> float:
+        # Token rate scales with the adaptive request rate
+        return self.max_tpm * (self.rpm / self.max_rpm)
+
+    @property
+    def _request_capacity(self) -> float:
+        return max(1.0, self.rpm / 60.0 * self.burst_seconds)
+
+    @property
+    def _token_capacity(self) -> float:
+        return max(1.0, self.tpm / 60.0 * self.burst_seconds)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self._request_capacity, self._requests + elapsed * self.rpm / 60.0)
+        self._tokens = min(self._token_capacity, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _wait_time(self, now: float, tokens: float) -> float:
+        wait = max(0.0, self._blocked_until - now)
+        if self._requests < 1.0:
+            wait = max(wait, (1.0 - self._requests) * 60.0 / self.rpm)
+        if self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait (FIFO) until one request and `tokens` tokens are available"""
+        tokens = min(float(tokens), self._token_capacity)
+        deadline = time.monotonic() + self.max_wait_seconds
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._requests -= 1.0
+                    self._tokens -= tokens
+                    return
+                if now + wait > deadline:
+                    self.rejected += 1
+                    raise RateLimitExceeded(
+                        f"Gemini rate limit: no capacity within {self.max_wait_seconds:.1f}s"
+                    )
+                self.waits += 1
+                await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """Additive increase"""
+        self.rpm = min(self.max_rpm, self.rpm + self.increase_rpm)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease, and pause until Retry-After if given"""
+        now = time.monotonic()
+        self.throttled += 1
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+        # One decrease per burst of throttled responses
+        if now - self._last_decrease >= 1.0:
+            self._last_decrease = now
+            self.rpm = max(self.min_rpm, self.rpm * self.decrease_factor)
+            self._requests = min(self._requests, self._request_capacity)
+            self._tokens = min(self._tokens, self._token_capacity)
+            logger.warning(f"Gemini throttled us; rate lowered to {self.rpm:.1f} rpm (retry_after={retry_after})")
+
+    def stats(self) -> dict:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "max_rpm": self.max_rpm,
+            "throttled": self.throttled,
+            "waits": self.waits,
+            "rejected": self.rejected,
+            "blocked_for": max(0.0, self._blocked_until - time.monotonic()),
+        }
+
+
+# Singleton instance shared by all LLM services
+gemini_rate_limiter = AdaptiveRateLimiter(
+    rpm=settings.RATE_LIMIT_RPM,
+    tpm=settings.RATE_LIMIT_TPM,
+    min_rpm=settings.RATE_LIMIT_MIN_RPM,
+    increase_rpm=settings.RATE_LIMIT_INCREASE_RPM,
+    decrease_factor=settings.RATE_LIMIT_DECREASE_FACTOR,
+    burst_seconds=settings.RATE_LIMIT_BURST_SECONDS,
+    max_wait_seconds=settings.RATE_LIMIT_MAX_WAIT_SECONDS,
+)
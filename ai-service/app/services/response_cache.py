@@ -0,0 +1,84 @@
+"""
+Response cache for LLM calls.
+Bounded LRU with a TTL, keyed on a hash of (model, temperature, max_tokens, prompt).
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+
+
+class ResponseCache:
+    """LRU + TTL cache of successful LLM responses"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.by_service: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+        """Stable hash of everything that determines the model output"""
+        digest = hashlib.sha256()
+        digest.update(f"{model}\x00{temperature!r}\x00{max_tokens}\x00".encode("utf-8"))
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _count(self, service: str, field: str) -> None:
+        counts = self.by_service.get(service)
+        if counts is None:
+            counts = self.by_service[service] = {"hits": 0, "misses": 0}
+        counts[field] += 1
+
+    def get(self, key: str, service: str = "default") -> Optional[dict]:
+        """Return a copy of the cached response, or None on miss/expiry"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(service, "hits")
+                return dict(value)
+            del self._entries[key]
+        self.misses += 1
+        self._count(service, "misses")
+        return None
+
+    def set(self, key: str, value: dict) -> None:
+        """Store a response, evicting the least recently used entries"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "by_service": {k: dict(v) for k, v in self.by_service.items()},
+        }
+
+
+# Singleton instance
+response_cache = ResponseCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,76 @@
+"""
+Retry policies and latency tracking for outbound LLM calls.
+"""
+
+import random
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from app.config.settings import settings
+
+
+class RetryPolicy:
+    """Max attempts, jittered exponential backoff and which failures are retryable"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+        retry_on_timeout: bool = True,
+        retry_on_network_error: bool = True,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_on_timeout = retry_on_timeout
+        self.retry_on_network_error = retry_on_network_error
+
+    @classmethod
+    def for_service(cls, name: str) -> "RetryPolicy":
+        """Settings defaults, with LLM_RETRY_OVERRIDES[name] applied on top"""
+        options: Dict[str, Any] = {
+            "max_attempts": settings.LLM_RETRY_MAX_ATTEMPTS,
+            "base_delay": settings.LLM_RETRY_BASE_DELAY,
+            "max_delay": settings.LLM_RETRY_MAX_DELAY,
+            "retry_statuses": settings.LLM_RETRY_STATUSES,
+        }
+        options.update(settings.LLM_RETRY_OVERRIDES.get(name, {}))
+        return cls(**options)
+
+    def is_retryable(self, result: dict) -> bool:
+        """Decide from a failed _post() result whether another attempt may help"""
+        kind = result.get("error_kind")
+        if kind == "http":
+            return result.get("status_code") in self.retry_statuses
+        if kind == "timeout":
+            return self.retry_on_timeout
+        if kind == "network":
+            return self.retry_on_network_error
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+        return ordered[rank]
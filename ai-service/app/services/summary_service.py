@@ -2,12 +2,23 @@
 Summary Service - Generates concise summaries of conversations.
 """
 
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
+from app.config.settings import settings
 from app.schemas.input import ChatMessage, ContextIn
-from app.schemas.output import SummarizeOut, ConfidenceScore
-from app.services.base import LLMClient
+from app.schemas.output import SummarizeOut, ConfidenceScore, TimelineItem
+from app.services.base import LLMClient, LLMStreamError
+from app.services.fallback_rules import SUMMARY_RULES
 from app.utils.confidence import normalize_confidence
+from app.utils.json_stream import JsonStreamParser
+from app.utils.message_hash import message_key
+from app.utils.prompt_encoding import CompactCodec
+
+
+# Timeline events from the previous summary repeated in an incremental prompt
+SUMMARY_TIMELINE_TAIL = 5
+# Trailing messages fingerprinted in a watermark, so repeated messages ("ok") still locate it
+WATERMARK_TAIL = 8
 
 
 class SummaryService(LLMClient[SummarizeOut]):
@@ -15,6 +26,7 @@ class SummaryService(LLMClient[SummarizeOut]):
     
     def __init__(self):
         super().__init__(
+            name="summary",
             prompt_file="summary.txt",
             temperature=0.2,
             max_tokens=2048
@@ -26,16 +38,64 @@ class SummaryService(LLMClient[SummarizeOut]):
         context: Optional[ContextIn] = None
     ) -> str:
         """Build summary prompt with data"""
+        return f"""
+CONVERSATION DATA:
+{self._format_conversation(messages)}
+
+PRIOR CONTEXT:
+{self._format_context(context)}
+
+Please generate the detailed summary and high-fidelity sequential timeline now.
+"""
+    
+    def build_incremental_prompt(
+        self,
+        previous: SummarizeOut,
+        new_messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> str:
+        """Build the delta prompt: current summary plus only the messages since it"""
+        key_points = "\n".join(f"- {p}" for p in previous.key_points) or "None"
+        recent = "\n".join(
+            f"- [{t.timestamp or 'N/A'}] {t.type}: {t.event}"
+            for t in previous.timeline[-SUMMARY_TIMELINE_TAIL:]
+        ) or "None"
+        return f"""
+CURRENT SUMMARY:
+{previous.summary}
+
+CURRENT KEY POINTS:
+{key_points}
+
+LATEST TIMELINE EVENTS:
+{recent}
+
+NEW MESSAGES SINCE THE CURRENT SUMMARY:
+{self._format_conversation(new_messages)}
+
+PRIOR CONTEXT:
+{self._format_context(context)}
+
+Update the summary to account for the new messages. Use the same JSON format, where
+"summary" is the full updated summary, "key_points" is the full updated list (keep
+points that still hold, revise or drop outdated ones, add new ones), and "timeline"
+contains ONLY events from the new messages.
+"""
+    
+    @staticmethod
+    def _format_conversation(messages: List[ChatMessage]) -> str:
+        if settings.COMPACT_PROMPTS:
+            return CompactCodec(messages).encode(messages, index=False)
         
         # Format conversation with metadata
         conversation_lines = []
         for msg in messages:
             timestamp = f"[{msg.timestamp}] " if msg.timestamp else ""
             conversation_lines.append(f"{timestamp}{msg.user}: {msg.message}")
-        
-        conversation = "\n".join(conversation_lines)
-        
-        # Build context
+        return "\n".join(conversation_lines)
+    
+    @staticmethod
+    def _format_context(context: Optional[ContextIn]) -> str:
         context_str = "None"
         if context:
             parts = []
@@ -43,16 +103,7 @@ class SummaryService(LLMClient[SummarizeOut]):
             if context.prior_actions: parts.append(f"Actions: {context.prior_actions}")
             if parts:
                 context_str = "\n".join(parts)
-        
-        return f"""
-CONVERSATION DATA:
-{conversation}
-
-PRIOR CONTEXT:
-{context_str}
-
-Please generate the detailed summary and high-fidelity sequential timeline now.
-"""
+        return context_str
     
     def parse_response(self, response: dict) -> dict:
         """Parse LLM response into summary result"""
@@ -60,6 +111,8 @@ Please generate the detailed summary and high-fidelity sequential timeline now.
         from app.services.base import logger
         logger.debug(f"Parsing summary response: {text}")
         parsed = self.parse_json(text)
+        if parsed is None:
+            self._metrics.parse_failures.inc()
         
         if not parsed:
             logger.warning(f"Failed to parse summary JSON from: {text}")
@@ -91,35 +144,50 @@ Please generate the detailed summary and high-fidelity sequential timeline now.
     async def summarize(
         self,
         messages: List[ChatMessage],
-        context: Optional[ContextIn] = None
+        context: Optional[ContextIn] = None,
+        previous: Optional[SummarizeOut] = None
     ) -> SummarizeOut:
-        """Generate high-fidelity summary of messages"""
+        """
+        Generate high-fidelity summary of messages.
+        With `previous`, only messages after its watermark are sent to the LLM;
+        if the watermark is not in `messages` (a gap), the summary is rebuilt.
+        """
         from app.services.base import logger
+        
+        if previous is not None:
+            delta = self._messages_since(previous.watermark, messages)
+            if delta is None:
+                logger.info("Summary watermark not found in messages, rebuilding from scratch")
+            elif not delta:
+                return previous
+            else:
+                return await self._summarize_incremental(previous, delta, messages, context)
+        
         logger.info(f"Generating advanced summary for {len(messages)} messages")
         
         # Build prompt and query LLM
-        user_prompt = self.build_user_prompt(messages, context)
+        with self.span("prompt"):
+            user_prompt = self.build_user_prompt(messages, context)
         response = await self.query(user_prompt)
         
         # Parse response
-        result = self.parse_response(response)
-        
-        from app.schemas.output import TimelineItem
+        with self.span("parse"):
+            result = self.parse_response(response)
+        if settings.COMPACT_PROMPTS:
+            result = CompactCodec(messages).decode(result)
+        return self._build_summary(result, messages)
+    
+    def _build_summary(self, result: dict, messages: List[ChatMessage]) -> SummarizeOut:
+        """SummarizeOut from a parsed LLM result, or the keyword fallback if it has no summary"""
+        from app.services.base import logger
         
         if result and result.get("summary"):
             summary = result["summary"]
             key_points = result.get("key_points", [])
-            raw_timeline = result.get("timeline", [])
+            timeline = self._timeline(result.get("timeline", []))
             confidence = float(result.get("confidence", 0.75))
             reason = "LLM-generated detailed summary"
-            
-            # Map raw timeline to objects
-            timeline = []
-            for item in raw_timeline:
-                try:
-                    timeline.append(TimelineItem(**item))
-                except Exception:
-                    continue
+            llm_ok = True
             
             logger.debug(f"LLM Summary Length: {len(summary)} chars")
         else:
@@ -131,43 +199,196 @@ Please generate the detailed summary and high-fidelity sequential timeline now.
             timeline = [] # Fallback doesn't support complex timelines yet
             confidence = result["confidence"]
             reason = "Fallback summary (LLM failure)"
+            llm_ok = False
         
         return SummarizeOut(
             summary=summary,
-            key_points=key_points,
-            timeline=timeline,
+            key_points=key_points[-settings.SUMMARY_MAX_KEY_POINTS:],
+            timeline=timeline[-settings.SUMMARY_MAX_TIMELINE_ITEMS:],
             confidence=ConfidenceScore(
                 score=normalize_confidence(confidence),
                 reason=reason
-            )
+            ),
+            # No watermark after a fallback, so the next call rebuilds with the LLM
+            watermark=self.watermark_for(messages) if llm_ok else None
         )
     
+    async def _summarize_incremental(
+        self,
+        previous: SummarizeOut,
+        delta: List[ChatMessage],
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None
+    ) -> SummarizeOut:
+        """Fold the new messages into the previous summary with one small LLM call"""
+        from app.services.base import logger
+        logger.info(f"Updating summary with {len(delta)} new of {len(messages)} messages")
+        
+        with self.span("prompt"):
+            user_prompt = self.build_incremental_prompt(previous, delta, context)
+        response = await self.query(user_prompt)
+        with self.span("parse"):
+            result = self.parse_response(response)
+        if settings.COMPACT_PROMPTS:
+            result = CompactCodec(delta).decode(result)
+        return self._build_update(result, previous, delta, messages)
+    
+    def _build_update(
+        self,
+        result: dict,
+        previous: SummarizeOut,
+        delta: List[ChatMessage],
+        messages: List[ChatMessage]
+    ) -> SummarizeOut:
+        """Updated SummarizeOut from a parsed incremental result, or `previous` plus keyword hints"""
+        from app.services.base import logger
+        
+        if result and result.get("summary"):
+            summary = result["summary"]
+            key_points = result.get("key_points") or previous.key_points
+            timeline = previous.timeline + self._timeline(result.get("timeline", []))
+            confidence = float(result.get("confidence", previous.confidence.score))
+            reason = f"LLM incremental update ({len(delta)} new message(s))"
+            watermark = self.watermark_for(messages)
+        else:
+            # Keep the previous state as is: keyword hints would be fed back into the
+            # next delta prompt as real key points, and the old watermark makes the
+            # next call send these messages to the LLM again
+            logger.info("LLM incremental summary failed, keeping previous summary")
+            self._metrics.fallbacks.inc()
+            summary = previous.summary
+            key_points = previous.key_points
+            timeline = previous.timeline
+            confidence = min(previous.confidence.score, 0.4)
+            reason = f"Previous summary kept, {len(delta)} new message(s) not yet summarized (LLM failure)"
+            watermark = previous.watermark
+        
+        return SummarizeOut(
+            summary=summary,
+            key_points=key_points[-settings.SUMMARY_MAX_KEY_POINTS:],
+            timeline=timeline[-settings.SUMMARY_MAX_TIMELINE_ITEMS:],
+            confidence=ConfidenceScore(
+                score=normalize_confidence(confidence),
+                reason=reason
+            ),
+            watermark=watermark
+        )
+    
+    async def summarize_stream(
+        self,
+        messages: List[ChatMessage],
+        context: Optional[ContextIn] = None,
+        previous: Optional[SummarizeOut] = None
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Generate a summary, yielding (event, payload) pairs as Gemini streams it:
+        ("summary_delta", str) for each piece of summary text, ("key_point", str)
+        and ("timeline_item", TimelineItem) as each one completes, and finally
+        ("done", SummarizeOut) with the same result summarize() would return.
+        If the stream fails, the fallback is sent as the "done" event.
+        """
+        from app.services.base import logger
+        
+        delta = None
+        if previous is not None:
+            delta = self._messages_since(previous.watermark, messages)
+            if delta is None:
+                logger.info("Summary watermark not found in messages, rebuilding from scratch")
+            elif not delta:
+                yield "done", previous
+                return
+        
+        batch = messages if delta is None else delta
+        if delta is None:
+            logger.info(f"Streaming advanced summary for {len(messages)} messages")
+            user_prompt = self.build_user_prompt(messages, context)
+        else:
+            logger.info(f"Streaming summary update with {len(delta)} new of {len(messages)} messages")
+            user_prompt = self.build_incremental_prompt(previous, delta, context)
+        codec = CompactCodec(batch) if settings.COMPACT_PROMPTS else None
+        parser = JsonStreamParser()
+        
+        try:
+            async for text in self.query_stream(user_prompt):
+                for event in parser.feed(text):
+                    value = codec.decode(event.value) if codec else event.value
+                    if event.kind == "delta" and event.key == "summary":
+                        yield "summary_delta", value
+                    elif event.kind == "item" and event.key == "key_points" and isinstance(value, str):
+                        yield "key_point", value
+                    elif event.kind == "item" and event.key == "timeline":
+                        for item in self._timeline([value]):
+                            yield "timeline_item", item
+            result = self.parse_response({"response": parser.buffer})
+            if codec:
+                result = codec.decode(result)
+        except LLMStreamError as e:
+            logger.warning(f"Summary stream failed: {e}")
+            result = {}
+        
+        if delta is None:
+            yield "done", self._build_summary(result, messages)
+        else:
+            yield "done", self._build_update(result, previous, delta, messages)
+    
+    @staticmethod
+    def _short_key(msg: ChatMessage) -> str:
+        return message_key(msg)[:12]
+    
+    @classmethod
+    def watermark_for(cls, messages: List[ChatMessage]) -> Optional[str]:
+        """Short content hashes of the last WATERMARK_TAIL messages a summary covers"""
+        return "-".join(cls._short_key(m) for m in messages[-WATERMARK_TAIL:]) if messages else None
+    
+    @classmethod
+    def _messages_since(cls, watermark: Optional[str], messages: List[ChatMessage]) -> Optional[List[ChatMessage]]:
+        """
+        Messages after the watermark position, or None if it is not in the window.
+        The position is the first one whose preceding messages match the
+        watermark's tail (as far as the window reaches back), so an ambiguous
+        match re-sends messages rather than skipping any.
+        """
+        if not watermark:
+            return None
+        tail = watermark.split("-")
+        keys = [cls._short_key(m) for m in messages]
+        for i in range(len(keys)):
+            overlap = min(len(tail), i + 1)
+            if keys[i + 1 - overlap:i + 1] == tail[-overlap:]:
+                return messages[i + 1:]
+        return None
+    
+    @staticmethod
+    def _timeline(raw_timeline: list) -> List[TimelineItem]:
+        """Map raw timeline entries to objects, skipping malformed ones"""
+        timeline = []
+        for item in raw_timeline:
+            try:
+                timeline.append(TimelineItem(**item))
+            except Exception:
+                continue
+        return timeline
+    
     def _fallback_summarize(self, messages: List[ChatMessage]) -> dict:
         """Fallback simple summarization with key point extraction"""
+        self._metrics.fallbacks.inc()
         if not messages:
             return {"summary": "No messages to summarize.", "key_points": [], "confidence": 0.4}
         
         combined = " ".join([m.message for m in messages])
-        text_lower = combined.lower()
+        hits = SUMMARY_RULES.match(combined)
         
         # Extract potential key points using markers
         key_points = []
         
-        # Decision markers
-        if any(w in text_lower for w in ["decided", "chose", "agreed", "confirmed"]):
+        if "DECISION" in hits:
             key_points.append("DECISION: Potentially made (keyword detected)")
-            
-        # Action markers
-        if any(w in text_lower for w in ["investigate", "implement", "build", "send", "deliver"]):
-             key_points.append("ACTION: Work item mentioned")
-             
-        # Blocker markers
-        if any(w in text_lower for w in ["must", "should", "blocked", "waiting", "cannot"]):
-             key_points.append("BLOCKER/CONSTRAINT: Limitation identified")
-             
-        # Question markers
-        if "?" in text_lower:
-             key_points.append("QUESTION: Open item remaining")
+        if "ACTION" in hits:
+            key_points.append("ACTION: Work item mentioned")
+        if "BLOCKER" in hits:
+            key_points.append("BLOCKER/CONSTRAINT: Limitation identified")
+        if "QUESTION" in hits:
+            key_points.append("QUESTION: Open item remaining")
 
         summary = combined[:197] + "..." if len(combined) > 200 else combined
         
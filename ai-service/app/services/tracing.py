@@ -0,0 +1,196 @@
+"""
+Lightweight per-request tracing.
+The tracing middleware opens a Trace for each HTTP request in a contextvar;
+span() records timed stages into it (and is a no-op outside a request).
+Stage totals are returned in the Server-Timing header, and finished traces
+can be exported as OTLP/JSON to a local file or an OTLP/HTTP collector.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set
+
+from app.config.settings import settings
+from app.services.http_client import get_http_client
+
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+class Span:
+    """One timed stage; times are perf_counter seconds"""
+    __slots__ = ("name", "span_id", "parent_id", "start", "end")
+
+    def __init__(self, name: str, span_id: str, parent_id: Optional[str], start: float):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end: Optional[float] = None
+
+
+class Trace:
+    """Spans recorded while serving one request"""
+
+    def __init__(self, name: str):
+        self.trace_id = os.urandom(16).hex()
+        self.wall_start_ns = time.time_ns()
+        self.root = Span(name, os.urandom(8).hex(), None, time.perf_counter())
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        """Server-Timing value: total ms per stage name (summed over repeats), then the request total"""
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            if span.end is not None:
+                entry = totals.setdefault(span.name, [0.0, 0])
+                entry[0] += span.end - span.start
+                entry[1] += 1
+        parts = []
+        for name, (seconds, count) in totals.items():
+            desc = f';desc="x{count}"' if count > 1 else ""
+            parts.append(f"{name};dur={seconds * 1000:.2f}{desc}")
+        parts.append(f"total;dur={(time.perf_counter() - self.root.start) * 1000:.2f}")
+        return ", ".join(parts)
+
+    def to_otlp(self) -> dict:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        def nanos(t: float) -> str:
+            return str(self.wall_start_ns + int((t - self.root.start) * 1e9))
+
+        def encode(span: Span, kind: int) -> dict:
+            out = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": kind,
+                "startTimeUnixNano": nanos(span.start),
+                "endTimeUnixNano": nanos(span.end if span.end is not None else span.start),
+            }
+            if span.parent_id:
+                out["parentSpanId"] = span.parent_id
+            return out
+
+        spans = [encode(self.root, 2)] + [encode(s, 1) for s in self.spans]
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "app.services.tracing"}, "spans": spans}],
+        }]}
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_parent: ContextVar[Optional[str]] = ContextVar("trace_parent", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as a stage of the current request's trace"""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    record = Span(name, os.urandom(8).hex(), _parent.get() or trace.root.span_id, time.perf_counter())
+    trace.spans.append(record)
+    token = _parent.set(record.span_id)
+    try:
+        yield
+    finally:
+        _parent.reset(token)
+        record.end = time.perf_counter()
+
+
+class TraceExporter:
+    """Writes finished traces as OTLP/JSON lines to a file and/or POSTs them to a collector"""
+
+    def __init__(self):
+        self.exported = 0
+        self.failures = 0
+        # Strong references to exports in flight so they are not garbage-collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.TRACE_EXPORT_FILE or settings.TRACE_EXPORT_ENDPOINT)
+
+    def export(self, trace: Trace) -> None:
+        """Schedule the export without delaying the response"""
+        task = asyncio.ensure_future(self._export(trace.to_otlp()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _export(self, payload: dict) -> None:
+        try:
+            if settings.TRACE_EXPORT_FILE:
+                line = json.dumps(payload, separators=(",", ":")) + "\n"
+                await asyncio.get_running_loop().run_in_executor(None, self._append, line)
+            if settings.TRACE_EXPORT_ENDPOINT:
+                response = await get_http_client().post(
+                    settings.TRACE_EXPORT_ENDPOINT.rstrip("/") + "/v1/traces",
+                    json=payload,
+                    timeout=5.0,
+                )
+                response.raise_for_status()
+            self.exported += 1
+        except Exception as e:
+            # File errors, collector errors, or no HTTP client outside the app lifespan
+            self.failures += 1
+            logger.warning(f"Trace export failed: {e}")
+
+    @staticmethod
+    def _append(line: str) -> None:
+        with open(settings.TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def stats(self) -> dict:
+        return {"exported": self.exported, "failures": self.failures}
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request and adds a Server-Timing
+    header. For streaming responses the header only covers stages finished
+    before the first chunk; the exported trace covers the whole stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        token = _trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((SERVER_TIMING_HEADER, trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            trace.root.end = time.perf_counter()
+            if trace_exporter.enabled:
+                trace_exporter.export(trace)
+
+
+# Singleton instance
+trace_exporter = TraceExporter()
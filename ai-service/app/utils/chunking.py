@@ -0,0 +1,39 @@
+import asyncio
+from typing import Awaitable, Callable, List, Sequence, TypeVar
+
+
+T = TypeVar("T")
+
+
+def chunk_indices(costs: Sequence[int], budget: int, max_items: int = 0) -> List[List[int]]:
+    """
+    Split items into consecutive chunks whose summed cost stays within budget.
+    
+    Each chunk holds at most max_items items (0 = unlimited). An item that is
+    larger than the budget on its own gets a chunk to itself.
+    Returns lists of original indices, in order.
+    """
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, cost in enumerate(costs):
+        full = max_items and len(current) >= max_items
+        if current and (used + cost > budget or full):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def gather_bounded(factories: Sequence[Callable[[], Awaitable[T]]], limit: int) -> List[T]:
+    """Run coroutine factories concurrently, at most `limit` at a time, preserving order"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(*(run(f) for f in factories))
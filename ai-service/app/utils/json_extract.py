@@ -0,0 +1,138 @@
+import json
+import re
+from typing import Any, Optional, Tuple
+
+try:  # Optional fast backend
+    import orjson
+
+    def _loads(text: str) -> Any:
+        return orjson.loads(text)
+
+    JSON_BACKEND = "orjson"
+except ImportError:  # pragma: no cover - depends on the environment
+    _loads = json.loads
+    JSON_BACKEND = "json"
+
+
+# A complete JSON string (escape-aware) or a single bracket
+_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_OPEN_RE = re.compile(r"[{\[]")
+_CLOSE = {"{": "}", "[": "]"}
+_RAW_DECODE = json.JSONDecoder().raw_decode
+
+_MISSING = object()
+
+
+def loads(text: str) -> Any:
+    """json.loads through the fastest available backend (raises ValueError)"""
+    return _loads(text)
+
+
+def _try(text: str) -> Any:
+    try:
+        return _loads(text)
+    except ValueError:
+        return _MISSING
+
+
+def _scan(text: str, pos: int, end: int) -> Any:
+    """
+    Find the first complete JSON object/array in text[pos:end].
+    
+    Single pass over the brackets outside JSON strings (strings are skipped
+    whole by the tokenizer, so a '}' inside a quoted reason is ignored).
+    Each balanced candidate is parsed once; on failure the scan resumes
+    after it, so the total work stays linear in the input size.
+    """
+    while True:
+        opener = _OPEN_RE.search(text, pos, end)
+        if opener is None:
+            return _MISSING
+        start = opener.start()
+        stack = []
+        # Segments that closed one level inside an opener that never closed
+        inner = []
+        inner_start = None
+        resume = end
+        for m in _TOKEN_RE.finditer(text, start, end):
+            token = m.group()
+            if token[0] == '"':
+                continue
+            if token == "{" or token == "[":
+                stack.append(token)
+                if len(stack) == 2:
+                    inner_start = m.start()
+                continue
+            if not stack or _CLOSE[stack.pop()] != token:
+                resume = m.end()
+                break
+            if not stack:
+                value = _try(text[start:m.end()])
+                if value is not _MISSING:
+                    return value
+                resume = m.end()
+                break
+            if len(stack) == 1 and inner_start is not None:
+                inner.append((inner_start, m.end()))
+                inner_start = None
+        else:
+            # Reached the end with an unclosed opener (stray '{' before the JSON)
+            for seg_start, seg_end in inner:
+                value = _try(text[seg_start:seg_end])
+                if value is not _MISSING:
+                    return value
+            return _MISSING
+        pos = resume
+
+
+def _fence(text: str) -> Optional[Tuple[int, int]]:
+    """Bounds of the body of the first markdown code fence, if any"""
+    open_idx = text.find("```")
+    if open_idx == -1:
+        return None
+    start = open_idx + 3
+    newline = text.find("\n", start)
+    # Skip a language tag ("```json")
+    if newline != -1 and text[start:newline].strip().isalpha():
+        start = newline + 1
+    end = text.find("```", start)
+    return (start, end) if end != -1 else None
+
+
+def extract_json(text: Optional[str]) -> Optional[Any]:
+    """
+    Pull the first complete JSON object or array out of an LLM response.
+    
+    Tries, in order: the whole (stripped) text, the contents of the first
+    markdown fence, a decode from the first bracket, then a string-aware
+    bracket scan of the full text.
+    Returns None if nothing parses.
+    """
+    if not text:
+        return None
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        value = _try(stripped)
+        if value is not _MISSING:
+            return value
+
+    fence = _fence(stripped)
+    if fence:
+        value = _try(stripped[fence[0]:fence[1]].strip())
+        if value is _MISSING:
+            value = _scan(stripped, fence[0], fence[1])
+        if value is not _MISSING:
+            return value
+
+    # Common case: chatter, then valid JSON, then more chatter. raw_decode
+    # parses from the first bracket and ignores whatever follows, in C.
+    opener = _OPEN_RE.search(stripped)
+    if opener is None:
+        return None
+    try:
+        return _RAW_DECODE(stripped, opener.start())[0]
+    except ValueError:
+        pass
+
+    value = _scan(stripped, opener.start(), len(stripped))
+    return None if value is _MISSING else value
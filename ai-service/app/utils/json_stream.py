@@ -0,0 +1,163 @@
+import json
+import re
+from typing import Any, List, Optional
+
+
+class StreamEvent:
+    """A value completed while parsing a streamed JSON document"""
+
+    def __init__(self, kind: str, key: Optional[str], value: Any):
+        self.kind = kind  # "item" or "delta"
+        self.key = key  # top-level key of the enclosing array or string (None for a bare array)
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"StreamEvent({self.kind!r}, {self.key!r}, {self.value!r})"
+
+
+# Trailing "\u", "\u12", ... or a high surrogate still waiting for its pair
+_PARTIAL_ESCAPE_RE = re.compile(r"\\u(?:[0-9a-fA-F]{0,3}|[dD][89abAB][0-9a-fA-F]{2})$")
+
+
+def _complete_prefix(raw: str) -> str:
+    """Longest prefix of a JSON string body that does not end mid-escape"""
+    slashes = len(raw) - len(raw.rstrip("\\"))
+    if slashes % 2:
+        raw = raw[:-1]
+    m = _PARTIAL_ESCAPE_RE.search(raw)
+    while m:
+        head = raw[:m.start()]
+        if (len(head) - len(head.rstrip("\\"))) % 2:
+            break
+        raw = head
+        m = _PARTIAL_ESCAPE_RE.search(raw)
+    return raw
+
+
+class JsonStreamParser:
+    """
+    Incremental, string-aware parser for LLM JSON output.
+    
+    Feed text chunks as they arrive; every element of a top-level array
+    (e.g. the objects in {"classifications": [...]}) is emitted as an "item"
+    event the moment it closes, and the text of top-level string values
+    (e.g. {"summary": "..."}) is emitted as decoded "delta" events while it
+    is still arriving. Text before the first bracket (such as a markdown
+    fence) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._pending_key: Optional[str] = None
+        self._key: Optional[str] = None
+        self._array_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._expect_value = False
+        self._value_key: Optional[str] = None
+        self._delta_pos = 0
+
+    def _in_item_array(self) -> bool:
+        stack = self._stack
+        return stack == ["{", "["] or stack == ["["]
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """Consume a chunk and return the events it completed"""
+        events: List[StreamEvent] = []
+        self.buffer += chunk
+        buf = self.buffer
+        stack = self._stack
+
+        for i in range(self._pos, len(buf)):
+            if self.done:
+                break
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._value_key is not None:
+                        self._emit_delta(events, buf[self._delta_pos:i])
+                        self._value_key = None
+                    else:
+                        self._on_string(i, events)
+                continue
+
+            if not stack:
+                if ch == "{" or ch == "[":
+                    stack.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                if self._expect_value and len(stack) == 1:
+                    self._value_key = self._key
+                    self._delta_pos = i + 1
+                    self._expect_value = False
+            elif ch == "{" or ch == "[":
+                self._expect_value = False
+                if self._in_item_array() and self._item_start is None:
+                    self._item_start = i
+                if stack == ["{"] and ch == "[":
+                    self._array_key = self._key
+                stack.append(ch)
+            elif ch == "}" or ch == "]":
+                stack.pop()
+                if not stack:
+                    self.done = True
+                elif self._in_item_array() and self._item_start is not None:
+                    self._emit(events, buf[self._item_start:i + 1])
+                    self._item_start = None
+            elif len(stack) == 1 and stack[0] == "{":
+                if ch == ":":
+                    self._key = self._pending_key
+                    self._expect_value = True
+                elif ch == ",":
+                    self._key = None
+                    self._expect_value = False
+
+        if self._in_string and self._value_key is not None:
+            end = self._delta_pos + len(_complete_prefix(buf[self._delta_pos:]))
+            if self._emit_delta(events, buf[self._delta_pos:end]):
+                self._delta_pos = end
+
+        self._pos = len(buf)
+        return events
+
+    def _on_string(self, end: int, events: List[StreamEvent]) -> None:
+        raw = self.buffer[self._string_start:end + 1]
+        if self._in_item_array() and self._item_start is None:
+            self._emit(events, raw)
+        elif self._stack == ["{"]:
+            try:
+                self._pending_key = json.loads(raw)
+            except ValueError:
+                self._pending_key = None
+
+    def _emit_delta(self, events: List[StreamEvent], raw: str) -> bool:
+        if not raw:
+            return False
+        try:
+            text = json.loads('"' + raw + '"')
+        except ValueError:
+            return False
+        events.append(StreamEvent("delta", self._value_key, text))
+        return True
+
+    def _emit(self, events: List[StreamEvent], raw: str) -> None:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        key = self._array_key if self._stack and self._stack[0] == "{" else None
+        events.append(StreamEvent("item", key, value))
@@ -0,0 +1,112 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+
+# Bound on remembered matched-text -> categories lookups
+_LOOKUP_CACHE_SIZE = 10000
+
+
+class KeywordMatcher:
+    """
+    Precompiled keyword rules: every phrase of every category is merged into
+    one trie-shaped regex, so a text is scanned once for all categories.
+    
+    Phrases match on word boundaries ("how" does not match "show").
+    A trailing "*" makes a phrase a prefix ("resolv*" matches "resolved").
+    Phrases that start or end with punctuation ("?") match anywhere.
+    """
+
+    def __init__(self, rules: Dict[str, Iterable[str]]):
+        self.categories = list(rules)
+        self._phrases: Dict[str, Set[str]] = {}
+        for category, words in rules.items():
+            for word in words:
+                self._phrases.setdefault(word.lower(), set()).add(category)
+
+        # Single-phrase patterns, used to resolve what a match contains
+        self._singles = [
+            (re.compile(self._single_pattern(p)), frozenset(cats))
+            for p, cats in self._phrases.items()
+        ]
+        self._lookup_cache: Dict[str, FrozenSet[str]] = {}
+
+        word_trie: dict = {}
+        other_trie: dict = {}
+        for phrase in self._phrases:
+            text = phrase.rstrip("*")
+            node = word_trie if text[:1].isalnum() else other_trie
+            for ch in text:
+                node = node.setdefault(ch, {})
+            node["" if phrase.endswith("*") else None] = True
+
+        parts = []
+        if word_trie:
+            parts.append(r"\b" + self._trie_pattern(word_trie))
+        if other_trie:
+            parts.append(self._trie_pattern(other_trie))
+        self._regex = re.compile("|".join(parts))
+
+    @staticmethod
+    def _single_pattern(phrase: str) -> str:
+        text = phrase.rstrip("*")
+        src = re.escape(text)
+        if text[:1].isalnum():
+            src = r"\b" + src
+        if phrase.endswith("*"):
+            src += r"\w*"
+        elif text[-1:].isalnum():
+            src += r"\b"
+        return src
+
+    @classmethod
+    def _trie_pattern(cls, node: dict, last: str = "") -> str:
+        # Children before terminals so the longest phrase wins
+        branches = [
+            re.escape(ch) + cls._trie_pattern(child, ch)
+            for ch, child in sorted(node.items(), key=lambda kv: kv[0] or "")
+            if ch
+        ]
+        if "" in node:
+            branches.append(r"\w*")
+        elif None in node:
+            branches.append(r"\b" if last.isalnum() else "")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    def _lookup(self, matched: str) -> FrozenSet[str]:
+        """
+        Categories for a matched span, including shorter phrases inside it
+        ("how about" is a SUGGESTION and also contains the QUESTION word "how").
+        """
+        hits = self._lookup_cache.get(matched)
+        if hits is None:
+            found: Set[str] = set()
+            for single, cats in self._singles:
+                if single.search(matched):
+                    found |= cats
+            hits = frozenset(found)
+            if len(self._lookup_cache) < _LOOKUP_CACHE_SIZE:
+                self._lookup_cache[matched] = hits
+        return hits
+
+    def match(self, text: str) -> Set[str]:
+        """All categories with at least one phrase in text"""
+        hits: Set[str] = set()
+        for matched in self._regex.findall(text.lower()):
+            hits |= self._lookup(matched)
+        return hits
+
+    def match_batch(self, texts: List[str]) -> List[Set[str]]:
+        """match() for a whole message list, with lookups hoisted out of the loop"""
+        findall = self._regex.findall
+        cache = self._lookup_cache
+        lookup = self._lookup
+        results: List[Set[str]] = []
+        for text in texts:
+            hits: Set[str] = set()
+            for matched in findall(text.lower()):
+                found = cache.get(matched)
+                hits |= found if found is not None else lookup(matched)
+            results.append(hits)
+        return results
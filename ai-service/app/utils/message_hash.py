@@ -0,0 +1,9 @@
+import hashlib
+
+from app.schemas.input import ChatMessage
+
+
+def message_key(msg: ChatMessage) -> str:
+    """Content hash of the fields that identify a message (user, message, timestamp)"""
+    raw = f"{msg.user}\x00{msg.message}\x00{msg.timestamp or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
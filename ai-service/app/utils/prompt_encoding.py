@@ -0,0 +1,139 @@
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from app.schemas.input import ChatMessage
+
+
+_OFFSET_RE = re.compile(r"^([+-])(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$")
+_INDEX_RE = re.compile(r"#?\d+")
+_UNITS = (("d", 86400), ("h", 3600), ("m", 60), ("s", 1))
+# Response fields whose values are user names; aliases are only decoded there
+USER_FIELDS = frozenset({"user", "assignee", "owner"})
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _format_time(value: datetime) -> str:
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def format_offset(seconds: int) -> str:
+    """Compact signed offset: 3725 -> '+1h2m5s', 0 -> '+0s'"""
+    sign = "-" if seconds < 0 else "+"
+    seconds = abs(seconds)
+    parts = []
+    for unit, size in _UNITS:
+        if seconds >= size:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    return sign + ("".join(parts) or "0s")
+
+
+def parse_offset(value: str) -> Optional[int]:
+    """Inverse of format_offset; None if value is not an offset"""
+    m = _OFFSET_RE.match(value.strip())
+    if not m or not any(m.group(2, 3, 4, 5)):
+        return None
+    seconds = sum(int(n or 0) * size for n, (_, size) in zip(m.group(2, 3, 4, 5), _UNITS))
+    return -seconds if m.group(1) == "-" else seconds
+
+
+def decode_index(value: Any, count: int) -> Optional[int]:
+    """
+    Message index returned by the model (0, "0", "#0") as an int, or None if
+    it is missing, malformed ("m0", -1, 1.7, "12b") or out of range.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        i = value
+    elif isinstance(value, str) and _INDEX_RE.fullmatch(value.strip()):
+        i = int(value.strip().lstrip("#"))
+    else:
+        return None
+    return i if 0 <= i < count else None
+
+
+class CompactCodec:
+    """
+    Token-lean encoding of a message batch for prompts, and the decoder for
+    what the model sends back.
+
+    Messages become one `index|user|time|text` line each instead of indented
+    JSON objects. Repeated user names get short aliases (u1, u2, ...) declared
+    once in a header, and timestamps become offsets from the first one.
+    Names containing "|" or a newline are always aliased so every record
+    keeps its field layout. decode() maps aliases in USER_FIELDS and offsets
+    in "timestamp" back to real names and ISO timestamps, so callers see the
+    same values as with the verbose prompts; free text is left untouched.
+    """
+
+    def __init__(self, messages: List[ChatMessage]):
+        counts = Counter(msg.user for msg in messages)
+        self.aliases: Dict[str, str] = {}
+        for name in counts:
+            alias = f"u{len(self.aliases) + 1}"
+            unsafe = "|" in name or "\n" in name
+            if unsafe or (counts[name] > 1 and len(name) > len(alias)):
+                self.aliases[name] = alias
+        self.names = {alias: name for name, alias in self.aliases.items()}
+        self._alias_re = (
+            re.compile(r"\b(?:" + "|".join(self.names) + r")\b") if self.names else None
+        )
+        self.base = next((t for t in map(_parse_time, (m.timestamp for m in messages)) if t), None)
+
+    def encode(
+        self,
+        messages: List[ChatMessage],
+        index: bool = True,
+        timestamps: bool = True
+    ) -> str:
+        """Render messages as a header plus one record per line"""
+        fields = (["index"] if index else []) + ["user"] + (["time"] if timestamps else []) + ["text"]
+        header = [f"FORMAT: one message per line as {'|'.join(fields)}"]
+        if self.aliases:
+            names = ", ".join(f"{a}={n}" for n, a in self.aliases.items()).replace("\n", " ")
+            header.append(f"USERS (aliases for user fields; write real names in prose): {names}")
+        use_times = timestamps and self.base is not None
+        if use_times:
+            header.append(f"TIME: offsets from T0={_format_time(self.base)}")
+
+        lines = []
+        for i, msg in enumerate(messages):
+            record = [str(i)] if index else []
+            record.append(self.aliases.get(msg.user, msg.user))
+            if timestamps:
+                when = _parse_time(msg.timestamp) if use_times else None
+                if when is not None:
+                    record.append(format_offset(int((when - self.base).total_seconds())))
+                else:
+                    record.append(msg.timestamp or "-")
+            record.append(msg.message.replace("\n", "\\n"))
+            lines.append("|".join(record))
+        return "\n".join(header + lines)
+
+    def decode(self, value: Any, key: Optional[str] = None) -> Any:
+        """Replace aliases in user fields and offsets in timestamps, recursively"""
+        if isinstance(value, str):
+            if key == "timestamp" and self.base is not None:
+                offset = parse_offset(value)
+                if offset is not None:
+                    return _format_time(self.base + timedelta(seconds=offset))
+            if key in USER_FIELDS and self._alias_re is not None:
+                return self._alias_re.sub(lambda m: self.names[m.group()], value)
+            return value
+        if isinstance(value, dict):
+            return {k: self.decode(v, k) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.decode(v, key) for v in value)
+        return value
@@ -0,0 +1,5 @@
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for Gemini prompts (~4 characters per token)"""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
@@ -0,0 +1,91 @@
+"""
+Benchmark LLMClient.parse_json against the previous implementation on large,
+malformed LLM responses.
+
+Run from ai-service/:  python -m benchmarks.bench_parse_json
+"""
+
+import json
+import re
+import time
+
+from app.utils.json_extract import JSON_BACKEND, extract_json
+
+
+def legacy_parse_json(text):
+    """The pre-extractor implementation (direct, fence regex, bracket count)."""
+    if not text:
+        return None
+    cleaned_text = text.strip()
+    try:
+        return json.loads(cleaned_text)
+    except json.JSONDecodeError:
+        pass
+    markdown_match = re.search(r"```(?:json)?\s*(\{.*\}|\[.*\])\s*```", cleaned_text, re.DOTALL | re.IGNORECASE)
+    if markdown_match:
+        try:
+            return json.loads(markdown_match.group(1).strip())
+        except json.JSONDecodeError:
+            pass
+    start_idx = cleaned_text.find('{')
+    if start_idx == -1:
+        start_idx = cleaned_text.find('[')
+    if start_idx != -1:
+        bracket_type = cleaned_text[start_idx]
+        close_type = '}' if bracket_type == '{' else ']'
+        stack = 0
+        for i in range(start_idx, len(cleaned_text)):
+            if cleaned_text[i] == bracket_type:
+                stack += 1
+            elif cleaned_text[i] == close_type:
+                stack -= 1
+                if stack == 0:
+                    try:
+                        return json.loads(cleaned_text[start_idx:i + 1])
+                    except json.JSONDecodeError:
+                        pass
+    return None
+
+
+def _classifications(n):
+    return json.dumps({"classifications": [
+        {"index": i, "types": ["DECISION"], "confidence": 0.9,
+         "reason": "closes {the} debate on [option %d]" % i}
+        for i in range(n)
+    ]})
+
+
+def _cases(n):
+    body = _classifications(n)
+    return {
+        "fenced + chatter": f"Sure, here you go:\n```json\n{body}\n```\nLet me know!",
+        "preamble braces": "Classified {as requested} below.\n" + body,
+        "trailing garbage": body + "\n\n} extra ] tokens {",
+        "trailing comma": body[:-2] + ",]} and then " + body,
+        "truncated": body[: len(body) // 2],
+    }
+
+
+def _time(fn, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(text)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    print(f"backend: {JSON_BACKEND}")
+    for n in (200, 2000):
+        for name, text in _cases(n).items():
+            repeat = 20 if n <= 200 else 3
+            old_ms, old = _time(legacy_parse_json, text, repeat)
+            new_ms, new = _time(extract_json, text, repeat)
+            print(
+                f"{n:>5} items  {name:<17} {len(text) / 1024:8.1f} KiB  "
+                f"legacy {old_ms:9.2f} ms ({'ok' if old is not None else 'none'})  "
+                f"extract {new_ms:8.2f} ms ({'ok' if new is not None else 'none'})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-request input token savings of COMPACT_PROMPTS for each prompt builder.
+
+Tokens are estimated with app.utils.tokens.estimate_tokens (~4 chars/token);
+"request" includes the prompt template sent with every call.
+
+Run from ai-service/:  python -m benchmarks.bench_prompt_tokens
+"""
+
+from datetime import datetime, timedelta
+
+from app.config.settings import settings
+from app.schemas.input import ChatMessage, ContextIn
+from app.services.action_service import action_service
+from app.services.ask_service import ask_service
+from app.services.classifier_service import classifier_service
+from app.services.contradiction_service import contradiction_service
+from app.services.filter_service import filter_service
+from app.services.summary_service import summary_service
+from app.utils.tokens import estimate_tokens
+
+USERS = ["priya.raman", "marcus.oyelaran", "jordan", "sofia.castellanos", "li.wei"]
+TEXTS = [
+    "We decided to go with Postgres for the event store",
+    "I'll have the migration script ready by Thursday",
+    "Assuming the staging cluster still has 64GB, we should be fine",
+    "What if we shard by workspace id instead?",
+    "We must keep p99 under 200ms for the feed endpoint",
+    "ok",
+]
+CONTEXT = ContextIn(prior_decisions=["Use MySQL for the event store"], prior_actions=["Marcus sets up CI"])
+
+
+def _conversation(n):
+    start = datetime(2024, 1, 19, 9, 0, 0)
+    return [
+        ChatMessage(
+            user=USERS[i % len(USERS)],
+            message=TEXTS[i % len(TEXTS)],
+            timestamp=(start + timedelta(seconds=47 * i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        )
+        for i in range(n)
+    ]
+
+
+BUILDERS = {
+    "classifier": (classifier_service, lambda m: classifier_service.build_user_prompt(m, CONTEXT)),
+    "filter": (filter_service, lambda m: filter_service.build_user_prompt(m)),
+    "summary": (summary_service, lambda m: summary_service.build_user_prompt(m, CONTEXT)),
+    "contradiction": (contradiction_service, lambda m: contradiction_service.build_user_prompt(m, CONTEXT)),
+    "action": (action_service, lambda m: action_service.build_user_prompt(m, CONTEXT)),
+    "ask": (ask_service, lambda m: ask_service.build_user_prompt("DECISION", m, None, CONTEXT)),
+}
+
+
+def main():
+    for n in (20, 200):
+        messages = _conversation(n)
+        print(f"{n} messages")
+        for name, (service, build) in BUILDERS.items():
+            template = estimate_tokens(service.prompt_template)
+            settings.COMPACT_PROMPTS = False
+            verbose = estimate_tokens(build(messages))
+            settings.COMPACT_PROMPTS = True
+            compact = estimate_tokens(build(messages))
+            settings.COMPACT_PROMPTS = False
+            saved = verbose - compact
+            print(
+                f"  {name:<14} prompt {verbose:6d} -> {compact:6d} tokens ({saved / verbose:5.1%} saved)  "
+                f"request {verbose + template:6d} -> {compact + template:6d} "
+                f"({saved / (verbose + template):5.1%})"
+            )
+
+
+if __name__ == "__main__":
+    main()
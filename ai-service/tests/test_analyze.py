@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services.summary_service import summary_service
+
+BODY = {"messages": [
+    {"user": "alice", "message": "We decided to use Postgres", "timestamp": "2024-01-19T10:00:00Z"},
+    {"user": "bob", "message": "ok", "timestamp": "2024-01-19T10:01:00Z"},
+    {"user": "bob", "message": "I'll write the migration by Friday", "timestamp": "2024-01-19T10:05:00Z"},
+], "context": {"prior_decisions": ["Use MySQL"]}}
+
+
+def test_analyze_runs_all_stages_with_timings(monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    out = TestClient(app).post("/ai/analyze", json=BODY).json()
+    assert set(out["timings_ms"]) == {"filter", "classify", "actions", "contradictions", "summary", "total"}
+    assert [m["useful"] for m in out["filter"]] == [True, False, True]
+    assert out["classify"]["messages"][0]["type"] == ["decision"]
+    assert out["summary"]["summary"] and out["errors"] == {}
+
+
+def test_analyze_subset_and_stage_failure(monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(summary_service, "summarize", broken)
+    out = TestClient(app).post("/ai/analyze", json={**BODY, "stages": ["classify", "summary"]}).json()
+    assert out["filter"] is None and out["actions"] is None
+    assert out["classify"] is not None and out["summary"] is None
+    assert out["errors"] == {"summary": "boom"}
+    assert TestClient(app).post("/ai/analyze", json={**BODY, "stages": ["nope"]}).status_code == 422
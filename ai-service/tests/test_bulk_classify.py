@@ -0,0 +1,38 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from app.agents import classifier as classifier_agent
+from app.config.settings import settings
+from app.main import app
+from app.schemas.output import ClassifyOut
+
+
+def test_bulk_classify_streams_one_line_per_conversation(monkeypatch):
+    in_flight = []
+    peak = []
+
+    async def fake_classify(messages, context=None):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        if messages[0].message == "boom":
+            raise RuntimeError("classifier exploded")
+        return ClassifyOut(messages=[], explanation=messages[0].message)
+
+    monkeypatch.setattr(settings, "BULK_CLASSIFY_MAX_PARALLEL", 2)
+    monkeypatch.setattr(classifier_agent, "classify_messages", fake_classify)
+
+    items = [
+        {"conversation_id": f"g{i}", "messages": [{"user": "a", "message": "boom" if i == 1 else f"m{i}"}]}
+        for i in range(5)
+    ]
+    res = TestClient(app).post("/ai/classify/bulk", json={"items": items})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+
+    assert sorted(l["conversation_id"] for l in lines) == [f"g{i}" for i in range(5)]
+    by_id = {l["conversation_id"]: l for l in lines}
+    assert by_id["g1"]["error"] == "classifier exploded" and by_id["g1"]["result"] is None
+    assert by_id["g3"]["result"]["explanation"] == "m3" and by_id["g3"]["index"] == 3
+    assert max(peak) == 2
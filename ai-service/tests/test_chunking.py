@@ -0,0 +1,38 @@
+import asyncio
+import json
+import re
+from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.services.classifier_service import classifier_service
+from app.utils.chunking import chunk_indices
+
+
+def test_chunk_indices_respects_budget_and_item_cap():
+    assert chunk_indices([3, 3, 3, 10, 1], budget=6) == [[0, 1], [2], [3], [4]]
+    assert chunk_indices([1] * 5, budget=100, max_items=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_large_batch_is_chunked_and_merged_in_order(monkeypatch):
+    prompts = []
+
+    async def fake_query(user_prompt):
+        prompts.append(user_prompt)
+        batch = json.loads(re.search(r"INPUT MESSAGES:\n(\[.*?\n\])", user_prompt, re.S).group(1))
+        return {
+            "response": json.dumps({"classifications": [
+                {"index": m["index"], "types": ["QUESTION" if "?" in m["message"] else "DECISION"]}
+                for m in batch
+            ]}),
+            "success": True,
+        }
+
+    monkeypatch.setattr(settings, "CLASSIFY_MEMO_ENABLED", False)
+    monkeypatch.setattr(settings, "CHUNK_OUTPUT_TOKENS_PER_MESSAGE", classifier_service.max_tokens // 3)
+    monkeypatch.setattr(classifier_service, "query", fake_query)
+
+    messages = [ChatMessage(user="u", message=f"msg {i}" + ("?" if i % 2 else "")) for i in range(7)]
+    res = asyncio.get_event_loop().run_until_complete(classifier_service.classify(messages))
+
+    assert len(prompts) == 3
+    assert [m.message for m in res.messages] == [m.message for m in messages]
+    assert [m.type[0].name for m in res.messages] == ["DECISION", "QUESTION"] * 3 + ["DECISION"]
@@ -0,0 +1,27 @@
+from app.services.circuit_breaker import CircuitBreaker
+
+
+def test_breaker_opens_short_circuits_and_recovers():
+    breaker = CircuitBreaker(min_calls=4, error_rate_threshold=0.5, open_seconds=0, half_open_probes=2)
+    for ok in (True, False, True, False):
+        assert breaker.allow_request()
+        breaker.record(ok, latency=0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # open_seconds elapsed: two probes are let through, a third waits
+    assert breaker.allow_request() and breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_rejects_without_waiting():
+    breaker = CircuitBreaker(min_calls=2, open_seconds=60)
+    for _ in range(2):
+        breaker.allow_request()
+        breaker.record(False, 0.1)
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["state"] == "open"
+    assert breaker.snapshot()["short_circuited"] == 1
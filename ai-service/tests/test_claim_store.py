@@ -0,0 +1,82 @@
+import asyncio
+import json
+from app.config.settings import settings
+from app.schemas.context import RequestContext
+from app.schemas.input import ChatMessage, ContextIn
+from app.services.claim_store import claim_store
+from app.services.contradiction_service import contradiction_service
+from app.services.response_cache import response_cache
+
+CONTEXT = ContextIn(prior_decisions=["Use Postgres"])
+CONTRADICTION = {"new_claim": "Let's use MySQL", "prior_claim": "Use Postgres", "severity": "high", "confidence": 0.9}
+
+
+def test_only_new_messages_are_checked_and_known_contradictions_suppressed(monkeypatch):
+    sent = []
+
+    async def fake_send(prompt):
+        sent.append(prompt)
+        return {"response": json.dumps({"contradictions": [CONTRADICTION], "is_consistent": False}), "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(contradiction_service, "_send", fake_send)
+    response_cache.clear()
+    claim_store.clear()
+    run = asyncio.get_event_loop().run_until_complete
+    rc = RequestContext(conversation_id="group-1")
+    window = [ChatMessage(user="a", message="Let's use MySQL"), ChatMessage(user="b", message="hmm")]
+
+    first = run(contradiction_service.detect(window, CONTEXT, rc))
+    assert len(first.contradictions) == 1 and first.suppressed == 0
+
+    # Same window again: nothing new, no LLM call
+    again = run(contradiction_service.detect(window, CONTEXT, rc))
+    assert again.contradictions == [] and again.is_consistent and len(sent) == 1
+
+    # One new message, no context resent: checked against the stored context; repeat is suppressed
+    later = run(contradiction_service.detect(window + [ChatMessage(user="a", message="MySQL it is")], None, rc))
+    assert "MySQL it is" in sent[1] and "Let's use MySQL" not in sent[1].split("NEW MESSAGES")[1]
+    assert "Use Postgres" in sent[1]
+    assert later.contradictions == [] and later.suppressed == 1 and not later.is_consistent
+
+    # Without a conversation_id nothing is stored or suppressed
+    stateless = run(contradiction_service.detect(window, CONTEXT))
+    assert len(stateless.contradictions) == 1
+
+
+def test_new_messages_are_checked_against_earlier_ones(monkeypatch):
+    sent = []
+    replies = [
+        {"contradictions": [], "is_consistent": True},
+        {"contradictions": [{"new_claim": "Deploy to GCP instead", "prior_claim": "We deploy on AWS",
+                             "severity": "high", "confidence": 0.9}], "is_consistent": False},
+    ]
+
+    async def fake_send(prompt):
+        sent.append(prompt)
+        return {"response": json.dumps(replies.pop(0)), "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(contradiction_service, "_send", fake_send)
+    response_cache.clear()
+    claim_store.clear()
+    run = asyncio.get_event_loop().run_until_complete
+    rc = RequestContext(conversation_id="group-2")
+    a = ChatMessage(user="a", message="We deploy on AWS")
+
+    first = run(contradiction_service.detect([a], None, rc))
+    assert first.is_consistent
+
+    # A later request with only B: A is sent as a prior claim, not as a new message
+    later = run(contradiction_service.detect([ChatMessage(user="b", message="Deploy to GCP instead")], None, rc))
+    prior, new = sent[1].split("NEW MESSAGES")
+    assert "EARLIER MESSAGE: [a]: We deploy on AWS" in prior and "We deploy on AWS" not in new
+    assert len(later.contradictions) == 1 and later.contradictions[0].claim_b == "We deploy on AWS"
+
+
+def test_earlier_claims_are_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "CLAIM_STORE_MAX_CLAIMS", 2)
+    claim_store.clear()
+    claims = claim_store.get("group-3")
+    claims.mark_checked([ChatMessage(user="a", message=str(i)) for i in range(4)])
+    assert claims.earlier_claims() == ["[a]: 2", "[a]: 3"]
@@ -0,0 +1,39 @@
+import asyncio
+from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.services.classification_memo import classification_memo
+from app.services.classifier_service import classifier_service
+
+
+def test_overlapping_batches_only_classify_new_messages(monkeypatch):
+    prompts = []
+
+    async def fake_query(user_prompt):
+        prompts.append(user_prompt)
+        return {
+            "response": '{"classifications": [{"index": 0, "types": ["DECISION"], "confidence": 0.9}, '
+                        '{"index": 1, "types": ["ACTION"], "confidence": 0.9}]}',
+            "success": True,
+        }
+
+    monkeypatch.setattr(settings, "CLASSIFY_MEMO_ENABLED", True)
+    monkeypatch.setattr(classifier_service, "query", fake_query)
+    classification_memo.clear()
+
+    a = ChatMessage(user="alice", message="We picked Postgres", timestamp="t1")
+    b = ChatMessage(user="bob", message="I will migrate it", timestamp="t2")
+    c = ChatMessage(user="carol", message="Ship it Friday", timestamp="t3")
+    loop = asyncio.get_event_loop()
+
+    loop.run_until_complete(classifier_service.classify([a, b]))
+    res = loop.run_until_complete(classifier_service.classify([a, b, c]))
+
+    assert len(prompts) == 2
+    assert "Ship it Friday" in prompts[1] and "We picked Postgres" not in prompts[1]
+    assert [m.message for m in res.messages] == [a.message, b.message, c.message]
+    assert [t.name for t in res.messages[1].type] == ["ACTION"]
+    assert [t.name for t in res.messages[2].type] == ["DECISION"]
+
+    assert classifier_service.invalidate([b]) == 1
+    loop.run_until_complete(classifier_service.classify([a, b]))
+    assert "I will migrate it" in prompts[2] and "We picked Postgres" not in prompts[2]
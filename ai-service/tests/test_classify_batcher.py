@@ -0,0 +1,61 @@
+import asyncio
+from app.schemas.input import ChatMessage
+from app.schemas.output import ClassifyOut, ClassifiedMessage, ConfidenceScore, MessageType
+from app.services.classify_batcher import ClassifyBatcher
+
+
+def test_concurrent_requests_share_one_classify_call():
+    calls = []
+
+    async def fake_classify(messages, context):
+        calls.append(len(messages))
+        return ClassifyOut(messages=[
+            ClassifiedMessage(
+                user=m.user, message=m.message, type=[MessageType.OTHER],
+                confidence=ConfidenceScore(score=0.5)
+            ) for m in messages
+        ])
+
+    batcher = ClassifyBatcher(fake_classify, window_ms=5, max_messages=4)
+
+    def msgs(prefix, n):
+        return [ChatMessage(user=prefix, message=f"{prefix}-{i}") for i in range(n)]
+
+    async def run():
+        return await asyncio.gather(
+            batcher.classify(msgs("a", 1)),
+            batcher.classify(msgs("b", 2)),
+            batcher.classify(msgs("c", 3)),  # does not fit, starts a new batch
+        )
+
+    a, b, c = asyncio.get_event_loop().run_until_complete(run())
+    assert calls == [3, 3]
+    assert [m.message for m in a.messages] == ["a-0"]
+    assert [m.message for m in b.messages] == ["b-0", "b-1"]
+    assert [m.message for m in c.messages] == ["c-0", "c-1", "c-2"]
+    assert batcher.stats()["requests"] == 3
+
+
+def test_cancelled_batch_releases_its_waiters():
+    started = []
+
+    async def slow_classify(messages, context):
+        started.append(1)
+        await asyncio.sleep(10)
+
+    batcher = ClassifyBatcher(slow_classify, window_ms=1, max_messages=4)
+
+    async def run():
+        waiter = asyncio.ensure_future(batcher.classify([ChatMessage(user="a", message="hi")]))
+        while not started:
+            await asyncio.sleep(0.001)
+        assert len(batcher._tasks) == 1
+        for task in list(batcher._tasks):
+            task.cancel()
+        try:
+            await asyncio.wait_for(waiter, 1)
+        except asyncio.CancelledError:
+            return "cancelled"
+
+    assert asyncio.get_event_loop().run_until_complete(run()) == "cancelled"
+    assert not batcher._tasks
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import httpx
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services import http_client
+from app.services.classification_memo import classification_memo
+from app.utils.json_stream import JsonStreamParser
+
+
+def test_parser_emits_items_as_objects_close():
+    parser = JsonStreamParser()
+    assert parser.feed('```json\n{"classifications": [{"index": 0, "reason": "a } b') == []
+    events = parser.feed('"}, {"index": 1}]}')
+    assert [e.value for e in events] == [{"index": 0, "reason": "a } b"}, {"index": 1}]
+    assert parser.done
+
+
+def test_classify_stream_endpoint_emits_ndjson(monkeypatch):
+    text = json.dumps({"classifications": [
+        {"index": 1, "types": ["ACTION"], "confidence": 0.9},
+        {"index": 0, "types": ["DECISION"], "confidence": 0.9},
+    ]})
+    pieces = [text[:40], text[40:]]
+    sse = "".join(
+        "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": p}]}}]}) + "\r\n\r\n"
+        for p in pieces
+    )
+
+    def handler(request):
+        assert request.url.path.endswith(":streamGenerateContent")
+        return httpx.Response(200, content=sse.encode())
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    classification_memo.clear()
+
+    res = TestClient(app).post("/ai/classify/stream", json={"messages": [
+        {"user": "a", "message": "We go with Postgres"},
+        {"user": "b", "message": "I'll write the migration"},
+        {"user": "c", "message": "lunch?"},
+    ]})
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert res.headers["X-Window-Handle"].startswith("w_")
+    assert [l["message"] for l in lines] == ["I'll write the migration", "We go with Postgres", "lunch?"]
+    assert lines[2]["confidence"]["reason"].startswith("Fallback")
+
+
+def test_failed_chunk_still_streams_fallbacks(monkeypatch):
+    from app.services.classifier_service import classifier_service
+    from app.schemas.input import ChatMessage
+
+    async def broken_batch(batch, context=None):
+        yield 0, classifier_service._to_classified(0, batch[0], {"types": ["DECISION"], "confidence": 0.9}, None, None), False
+        raise RuntimeError("parser bug")
+
+    monkeypatch.setattr(settings, "CLASSIFY_MEMO_ENABLED", False)
+    monkeypatch.setattr(classifier_service, "_stream_batch", broken_batch)
+
+    async def collect():
+        return [item async for item in classifier_service.classify_stream([
+            ChatMessage(user="a", message="We go with Postgres"),
+            ChatMessage(user="b", message="I'll write the migration"),
+        ])]
+
+    items = asyncio.get_event_loop().run_until_complete(collect())
+    assert [i.message for i in items] == ["We go with Postgres", "I'll write the migration"]
+    assert "parser bug" in items[1].confidence.reason
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import httpx
+from app.config.settings import settings
+from app.services import http_client
+from app.services.action_service import action_service
+from app.services.context_cache import context_cache
+from app.services.response_cache import response_cache
+from app.services.summary_service import summary_service
+
+
+def _fake_gemini(monkeypatch, create_status=200, reject_cached=False):
+    """Serve a fake Gemini on a local base URL; returns the list of requests seen"""
+    seen = []
+
+    def handler(request):
+        body = json.loads(request.content) if request.content else {}
+        seen.append((request.method, request.url.path, body))
+        if request.url.path.endswith("/cachedContents"):
+            return httpx.Response(create_status, json={"name": "cachedContents/c1"})
+        if request.method == "PATCH":
+            return httpx.Response(200, json={"name": "cachedContents/c1"})
+        if reject_cached and "cachedContent" in body:
+            return httpx.Response(404, json={"error": {"message": "not found"}})
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": '{"summary": "ok"}'}]}}]})
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "GEMINI_BASE_URL", "http://fake-gemini.local/v1beta")
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "GEMINI_CONTEXT_CACHE_MIN_TOKENS", 0)
+    response_cache.clear()
+    context_cache.clear()
+    asyncio.get_event_loop().run_until_complete(http_client.start_http_client(httpx.MockTransport(handler)))
+    return seen
+
+
+def _run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def test_template_goes_in_system_instruction(monkeypatch):
+    seen = _fake_gemini(monkeypatch)
+    _run(summary_service.query("window"))
+    method, path, body = seen[0]
+    assert path == f"/v1beta/models/{settings.MODEL}:generateContent"
+    assert body["systemInstruction"]["parts"][0]["text"] == summary_service.prompt_template
+    assert body["contents"][0]["parts"][0]["text"] == "window"
+
+    seen = _fake_gemini(monkeypatch)
+    _run(action_service.query("formatted prompt"))
+    assert "systemInstruction" not in seen[0][2]
+    _run(http_client.close_http_client())
+
+
+def test_cached_contents_create_reuse_refresh_and_fallback(monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_CONTEXT_CACHE_ENABLED", True)
+    seen = _fake_gemini(monkeypatch)
+    _run(summary_service.query("a"))
+    _run(summary_service.query("b"))
+    assert [m for m, _, _ in seen] == ["POST", "POST", "POST"]
+    assert seen[1][2]["cachedContent"] == "cachedContents/c1" and "systemInstruction" not in seen[1][2]
+
+    # Inside the refresh window the TTL is extended instead of re-creating
+    monkeypatch.setattr(settings, "GEMINI_CONTEXT_CACHE_REFRESH_SECONDS", settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+    _run(summary_service.query("c"))
+    assert seen[3][0] == "PATCH" and context_cache.refreshed == 1
+
+    # Creation fails: send inline and do not retry creation right away
+    seen = _fake_gemini(monkeypatch, create_status=400)
+    _run(summary_service.query("d"))
+    _run(summary_service.query("e"))
+    assert [p.rsplit("/", 1)[-1] for _, p, _ in seen] == [
+        "cachedContents", f"{settings.MODEL}:generateContent", f"{settings.MODEL}:generateContent"
+    ]
+    assert "systemInstruction" in seen[-1][2]
+
+    # Gemini forgot the cache: resend inline in the same call
+    seen = _fake_gemini(monkeypatch, reject_cached=True)
+    result = _run(summary_service.query("f"))
+    assert result["success"] and "systemInstruction" in seen[-1][2]
+    _run(http_client.close_http_client())
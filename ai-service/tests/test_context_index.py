@@ -0,0 +1,34 @@
+from app.schemas.input import ContextIn
+from app.services.context_index import ContextIndex, context_index_cache, topic_tokens
+from app.services.contradiction_service import contradiction_service
+
+
+def test_index_posting_lookup():
+    context = ContextIn(
+        prior_decisions=["Use PostgreSQL for storage"],
+        prior_constraints=["Budget cannot exceed 5000"],
+    )
+    index = ContextIndex(context)
+    assert index.overlapping(topic_tokens("postgresql is slow")) == [0]
+    assert index.overlapping(topic_tokens("budget talk"), {"decision"}) == []
+    assert context_index_cache.get(context) is context_index_cache.get(context.model_copy())
+
+
+def test_fallback_detect_matches_topics_per_kind():
+    context = ContextIn(
+        prior_decisions=["We will deploy on Kubernetes"],
+        prior_constraints=["Budget cannot exceed 5000"],
+        prior_actions=["Bob writes the migration"],
+    )
+    found, consistent = contradiction_service._fallback_detect(
+        "Actually let's skip Kubernetes, it exceeds the budget", context
+    )
+    claims = [c.claim_b for c in found]
+    assert not consistent
+    assert claims == [
+        "Prior decision: We will deploy on Kubernetes",
+        "Prior constraint: Budget cannot exceed 5000",
+    ]
+
+    found, _ = contradiction_service._fallback_detect("I can't do the migration", context)
+    assert [c.claim_b for c in found] == ["Prior action: Bob writes the migration"]
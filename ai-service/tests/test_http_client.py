@@ -0,0 +1,12 @@
+import asyncio
+from app.services import http_client
+
+
+def test_shared_client_lifecycle():
+    loop = asyncio.get_event_loop()
+    client = loop.run_until_complete(http_client.start_http_client())
+    assert http_client.get_http_client() is client
+    loop.run_until_complete(http_client.close_http_client())
+    assert client.is_closed
+    assert http_client.get_http_client() is not client
+    loop.run_until_complete(http_client.close_http_client())
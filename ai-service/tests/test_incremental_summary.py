@@ -0,0 +1,102 @@
+import asyncio
+import json
+from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.services.response_cache import response_cache
+from app.services.summary_service import summary_service
+
+WINDOW = [ChatMessage(user="a", message=f"message {i}", timestamp=f"2024-01-19T10:0{i}:00Z") for i in range(6)]
+
+
+def _llm(monkeypatch, payloads):
+    sent = []
+
+    async def fake_send(prompt):
+        sent.append(prompt)
+        payload = payloads.pop(0)
+        return {"response": json.dumps(payload), "success": payload is not None}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(summary_service, "_send", fake_send)
+    response_cache.clear()
+    return sent
+
+
+def test_incremental_update_sends_only_the_delta(monkeypatch):
+    sent = _llm(monkeypatch, [
+        {"summary": "v1", "key_points": ["p1"], "timeline": [{"event": "e1", "type": "decision"}]},
+        {"summary": "v2", "key_points": ["p1", "p2"], "timeline": [{"event": "e2", "type": "action"}]},
+    ])
+    run = asyncio.get_event_loop().run_until_complete
+    first = run(summary_service.summarize(WINDOW[:4]))
+    assert first.watermark == summary_service.watermark_for(WINDOW[:4])
+
+    # Sliding window: older messages dropped, two new ones appended
+    second = run(summary_service.summarize(WINDOW[2:], previous=first))
+    assert "message 4" in sent[1] and "message 5" in sent[1] and "message 3" not in sent[1]
+    assert second.summary == "v2" and [t.event for t in second.timeline] == ["e1", "e2"]
+    assert second.watermark == summary_service.watermark_for(WINDOW[2:])
+
+    # Nothing new: no LLM call
+    assert run(summary_service.summarize(WINDOW[2:], previous=second)) is second
+    assert len(sent) == 2
+
+
+def test_gap_rebuilds_and_failure_keeps_previous(monkeypatch):
+    sent = _llm(monkeypatch, [{"summary": "v1"}, {"summary": "rebuilt"}, None])
+    run = asyncio.get_event_loop().run_until_complete
+    first = run(summary_service.summarize(WINDOW[:2]))
+
+    # Watermark (message 1) is not in the window: full rebuild
+    rebuilt = run(summary_service.summarize(WINDOW[3:], previous=first))
+    assert rebuilt.summary == "rebuilt" and "CURRENT SUMMARY" not in sent[1]
+
+    # Failed update: nothing from the keyword scan is carried into the state
+    kept = run(summary_service.summarize(WINDOW[3:] + [ChatMessage(user="b", message="we decided")], previous=rebuilt))
+    assert kept.summary == "rebuilt" and kept.key_points == rebuilt.key_points
+    assert kept.watermark == rebuilt.watermark
+
+
+def test_repeated_message_does_not_move_the_watermark(monkeypatch):
+    sent = _llm(monkeypatch, [{"summary": "v1"}, {"summary": "v2"}])
+    run = asyncio.get_event_loop().run_until_complete
+    ok = ChatMessage(user="a", message="ok")
+    window = [WINDOW[0], ok]
+    first = run(summary_service.summarize(window, previous=None))
+
+    # The same "ok" again after new messages: the delta starts after the first one
+    new = [ChatMessage(user="b", message="we pick Redis"), ChatMessage(user="c", message="ship it"), ok]
+    run(summary_service.summarize(window + new, previous=first))
+    assert "we pick Redis" in sent[1] and "ship it" in sent[1]
+
+
+def test_fallback_does_not_advance_the_watermark(monkeypatch):
+    sent = _llm(monkeypatch, [None, {"summary": "v1"}, None, {"summary": "v2"}])
+    run = asyncio.get_event_loop().run_until_complete
+
+    # Full summary fails: no watermark, so the next call rebuilds with the LLM
+    failed = run(summary_service.summarize(WINDOW[:2]))
+    assert failed.confidence.reason.startswith("Fallback") and failed.watermark is None
+    first = run(summary_service.summarize(WINDOW[:2], previous=failed))
+    assert first.summary == "v1" and "CURRENT SUMMARY" not in sent[1]
+
+    # Incremental update fails: the watermark stays, so the same messages are retried
+    kept = run(summary_service.summarize(WINDOW[:4], previous=first))
+    assert kept.summary == "v1" and kept.watermark == first.watermark
+    second = run(summary_service.summarize(WINDOW[:4], previous=kept))
+    assert second.summary == "v2" and "message 2" in sent[3] and "message 3" in sent[3]
+    assert second.watermark == summary_service.watermark_for(WINDOW[:4])
+
+
+def test_carried_key_points_and_timeline_are_capped(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_MAX_KEY_POINTS", 2)
+    monkeypatch.setattr(settings, "SUMMARY_MAX_TIMELINE_ITEMS", 2)
+    _llm(monkeypatch, [
+        {"summary": "v1", "key_points": ["p1", "p2", "p3"], "timeline": [{"event": "e1", "type": "decision"}]},
+        {"summary": "v2", "timeline": [{"event": "e2", "type": "action"}, {"event": "e3", "type": "action"}]},
+    ])
+    run = asyncio.get_event_loop().run_until_complete
+    first = run(summary_service.summarize(WINDOW[:2]))
+    assert first.key_points == ["p2", "p3"]
+    second = run(summary_service.summarize(WINDOW[:4], previous=first))
+    assert [t.event for t in second.timeline] == ["e2", "e3"]
@@ -0,0 +1,17 @@
+from app.services.base import LLMClient
+from app.utils.json_extract import extract_json
+
+
+def test_extracts_from_fences_and_surrounding_text():
+    assert extract_json('Sure!\n```json\n{"reason": "a } inside"}\n```') == {"reason": "a } inside"}
+    assert extract_json('Here is {your} result: {"a": [1, 2]} thanks') == {"a": [1, 2]}
+    assert extract_json('Note {x then {"ok": true} and more') == {"ok": True}
+    assert extract_json('[1, {"b": "]\\"["}] tail') == [1, {"b": ']"['}]
+
+
+def test_malformed_and_truncated_responses():
+    assert extract_json('{"a": 1,} then {"b": 2}') == {"b": 2}
+    assert extract_json('{"classifications": [{"index": 0') is None
+    assert extract_json("no json here") is None
+    assert LLMClient.parse_json("") is None
+    assert LLMClient.parse_json('```\n[1, 2]\n```') == [1, 2]
@@ -0,0 +1,22 @@
+from app.services.classifier_service import classifier_service
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+def test_word_boundaries_prefixes_and_overlaps():
+    matcher = KeywordMatcher({
+        "QUESTION": ["?", "how"],
+        "SUGGESTION": ["how about"],
+        "DECISION": ["resolv*"],
+    })
+    assert matcher.match("Can you show me") == set()
+    assert matcher.match("How about Redis") == {"QUESTION", "SUGGESTION"}
+    assert matcher.match("we resolved it?") == {"DECISION", "QUESTION"}
+    assert matcher.match_batch(["show", "how", "", "resolving"]) == [
+        set(), {"QUESTION"}, set(), {"DECISION"}
+    ]
+
+
+def test_fallback_classify_uses_compiled_rules():
+    types, score = classifier_service._fallback_classify("We decided to implement it. Why?")
+    assert types == ["DECISION", "ACTION", "QUESTION"] and score == 0.4
+    assert classifier_service._fallback_classify("please show the slides")[0] == ["OTHER"]
@@ -0,0 +1,62 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.schemas.input import ChatMessage
+from app.services.classifier_service import classifier_service
+from app.services.classification_memo import classification_memo
+from app.services.metrics import MetricsRegistry
+from app.services.response_cache import response_cache
+
+
+def _value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry(prefix="t")
+    latency = registry.histogram("latency_seconds", "Latency", ("service",), buckets=(0.1, 1.0))
+    child = latency.labels("a")
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+    text = registry.render()
+    assert 't_latency_seconds_bucket{service="a",le="0.1"} 1' in text
+    assert 't_latency_seconds_bucket{service="a",le="1"} 2' in text
+    assert 't_latency_seconds_bucket{service="a",le="+Inf"} 3' in text
+    assert 't_latency_seconds_count{service="a"} 3' in text
+    assert latency.labels("a") is child
+
+
+def test_metrics_endpoint_reports_requests_fallbacks_and_caches(monkeypatch):
+    async def failing_send(prompt):
+        return {"response": "not json", "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "CLASSIFY_BATCH_ENABLED", False)
+    monkeypatch.setattr(classifier_service, "_send", failing_send)
+    response_cache.clear()
+    classification_memo.clear()
+    client = TestClient(app)
+
+    before = client.get("/ai/metrics").text
+    client.post("/ai/classify", json={"messages": [
+        {"user": "a", "message": "We decided to ship on Friday"},
+        {"user": "b", "message": "I will write the release notes"},
+    ]})
+    res = client.get("/ai/metrics")
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+
+    fallback = 'signaldesk_fallback_total{service="classifier"}'
+    parse = 'signaldesk_llm_parse_failures_total{service="classifier"}'
+    assert _value(text, fallback) - _value(before, fallback) == 2
+    assert _value(text, parse) - _value(before, parse) >= 1
+    assert _value(text, 'signaldesk_http_requests_total{endpoint="/ai/classify",status="200"}') >= 1
+    assert 'signaldesk_http_request_duration_seconds_count{endpoint="/ai/classify"}' in text
+    assert 'signaldesk_llm_queries_in_flight{service="classifier"} 0' in text
+    assert "signaldesk_response_cache_size " in text
+    assert "signaldesk_payload_store_windows " in text
+    assert 'signaldesk_gemini_circuit_state{state="closed"} 1' in text
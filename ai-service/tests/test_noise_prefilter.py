@@ -0,0 +1,69 @@
+import asyncio
+import json
+from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.schemas.output import MessageType
+from app.services.classifier_service import classifier_service
+from app.services.filter_service import filter_service
+from app.services.response_cache import response_cache
+
+
+def test_noise_confidence_is_strict():
+    assert filter_service.noise_confidence("👍👍")[0] == 0.95
+    assert filter_service.noise_confidence("Okkk!!")[0] == 0.9
+    assert filter_service.noise_confidence("thank you so much")[0] == 0.85
+    for text in ("no", "yes", "ok?", "ok but we must ship friday", "sure, I'll do it", "Agreed!", "sounds good"):
+        assert filter_service.noise_confidence(text)[0] == 0.0
+
+
+def test_prefilter_skips_llm_for_noise_and_remaps_indices(monkeypatch):
+    sent = []
+
+    async def fake_send(prompt):
+        sent.append(prompt)
+        return {"response": json.dumps({"classifications": [
+            {"index": 0, "types": ["DECISION"], "confidence": 0.9},
+            {"index": 1, "types": ["ACTION"], "confidence": 0.9},
+        ]}), "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "CLASSIFY_PREFILTER_ENABLED", True)
+    monkeypatch.setattr(settings, "CLASSIFY_MEMO_ENABLED", False)
+    monkeypatch.setattr(classifier_service, "_send", fake_send)
+    response_cache.clear()
+
+    messages = [ChatMessage(user="a", message=m) for m in
+                ["hi", "We go with Postgres", "👍", "I'll migrate by Friday", "thanks!"]]
+    out = asyncio.get_event_loop().run_until_complete(classifier_service.classify(messages))
+    assert [m.type for m in out.messages] == [
+        [MessageType.OTHER], [MessageType.DECISION], [MessageType.OTHER], [MessageType.ACTION], [MessageType.OTHER]
+    ]
+    assert len(sent) == 1 and "We go with Postgres" in sent[0] and '"hi"' not in sent[0]
+    assert "3 tagged as noise locally" in out.explanation
+
+    # Below the threshold the message still goes to the LLM
+    monkeypatch.setattr(settings, "CLASSIFY_PREFILTER_THRESHOLD", 0.99)
+    asyncio.get_event_loop().run_until_complete(classifier_service.classify(messages[:2]))
+    assert '"hi"' in sent[-1]
+
+
+def test_prefilter_sends_agreements_to_the_classifier(monkeypatch):
+    sent = []
+
+    async def fake_send(prompt):
+        sent.append(prompt)
+        return {"response": json.dumps({"classifications": [
+            {"index": 0, "types": ["DECISION"], "confidence": 0.9},
+            {"index": 1, "types": ["DECISION", "ACTION"], "confidence": 0.9},
+        ]}), "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "CLASSIFY_PREFILTER_ENABLED", True)
+    monkeypatch.setattr(settings, "CLASSIFY_MEMO_ENABLED", False)
+    monkeypatch.setattr(classifier_service, "_send", fake_send)
+    response_cache.clear()
+
+    messages = [ChatMessage(user="a", message=m) for m in ["Agreed!", "sounds good, let's ship Friday"]]
+    out = asyncio.get_event_loop().run_until_complete(classifier_service.classify(messages))
+    assert len(sent) == 1 and "Agreed!" in sent[0] and "let's ship Friday" in sent[0]
+    assert [m.type for m in out.messages] == [[MessageType.DECISION], [MessageType.DECISION, MessageType.ACTION]]
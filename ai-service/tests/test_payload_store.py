@@ -0,0 +1,97 @@
+from fastapi import Response
+from fastapi.testclient import TestClient
+from app.api import classify as classify_api
+from app.api import summarize as summarize_api
+from app.config.settings import settings
+from app.main import app
+from app.schemas.input import ChatMessage, ContextIn, WindowRequest
+from app.schemas.output import ClassifiedMessage, ClassifyOut, SummarizeOut
+from app.services.payload_store import PayloadStore, payload_store
+
+
+def _msgs(*texts):
+    return [{"user": "a", "message": t} for t in texts]
+
+
+def test_window_and_context_handles_round_trip(monkeypatch):
+    seen = []
+
+    async def fake_summarize(messages, context=None, previous=None):
+        seen.append(([m.message for m in messages], context))
+        return SummarizeOut(summary="ok", confidence={"score": 0.9})
+
+    monkeypatch.setattr(summarize_api, "summarize_text", fake_summarize)
+    payload_store.clear()
+    client = TestClient(app)
+
+    first = client.post("/ai/summarize", json={"messages": _msgs("one", "two"), "context": {"prior_decisions": ["Use Postgres"]}})
+    window, context = first.headers["X-Window-Handle"], first.headers["X-Context-Handle"]
+
+    second = client.post("/ai/summarize", json={
+        "messages": _msgs("three"), "window_handle": window, "context_handle": context, "max_window": 2,
+    })
+    assert second.status_code == 200
+    assert seen[1][0] == ["two", "three"]
+    assert seen[1][1].prior_decisions == ["Use Postgres"]
+    assert second.headers["X-Window-Handle"] != window
+    assert second.headers["X-Context-Handle"] == context
+
+
+def test_unknown_handle_is_a_conflict():
+    payload_store.clear()
+    client = TestClient(app)
+    res = client.post("/ai/summarize", json={"messages": _msgs("x"), "window_handle": "w_missing"})
+    assert res.status_code == 409
+    assert res.json() == {"error": "unknown_handle", "kind": "window", "handle": "w_missing"}
+
+
+def test_window_is_capped_without_max_window(monkeypatch):
+    monkeypatch.setattr(settings, "PAYLOAD_STORE_MAX_WINDOW_MESSAGES", 3)
+    payload_store.clear()
+    response = Response()
+    messages, _ = payload_store.resolve(WindowRequest(messages=_msgs("0", "1")), response)
+    for i in range(2, 6):
+        handle = response.headers["X-Window-Handle"]
+        response = Response()
+        messages, _ = payload_store.resolve(WindowRequest(messages=_msgs(str(i)), window_handle=handle), response)
+    assert [m.message for m in messages] == ["3", "4", "5"]
+
+
+def test_full_request_keeps_every_message(monkeypatch):
+    async def fake_classify(messages, context=None):
+        return ClassifyOut(messages=[
+            ClassifiedMessage(user=m.user, message=m.message, type=["other"], confidence={"score": 0.5})
+            for m in messages
+        ])
+
+    monkeypatch.setattr(classify_api, "classify_messages", fake_classify)
+    monkeypatch.setattr(settings, "PAYLOAD_STORE_MAX_WINDOW_MESSAGES", 500)
+    payload_store.clear()
+    client = TestClient(app)
+    texts = [str(i) for i in range(650)]
+    res = client.post("/ai/classify", json={"messages": _msgs(*texts)})
+    assert res.status_code == 200
+    assert [m["message"] for m in res.json()["messages"]] == texts
+
+    # Extending a handle trims only the stored part, never the sent messages
+    res = client.post("/ai/classify", json={
+        "messages": _msgs("a", "b"), "window_handle": res.headers["X-Window-Handle"], "max_window": 1,
+    })
+    assert [m["message"] for m in res.json()["messages"]] == ["a", "b"]
+
+
+def test_eviction_releases_unshared_messages():
+    store = PayloadStore(max_windows=1, max_contexts=1)
+    shared = ChatMessage(user="a", message="shared")
+    first = store.put_window([shared, ChatMessage(user="a", message="old")])
+    store.put_window([shared, ChatMessage(user="a", message="new")])
+    assert store.stats()["messages"] == 2
+    try:
+        store.get_window(first)
+        assert False, "evicted window should be unknown"
+    except Exception as e:
+        assert e.kind == "window"
+
+    store.put_context(ContextIn(prior_decisions=["a"]))
+    store.put_context(ContextIn(prior_decisions=["b"]))
+    assert store.stats()["contexts"] == 1
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from app.config.settings import settings
+from app.schemas.input import ChatMessage
+from app.services.action_service import action_service
+from app.services.classifier_service import classifier_service
+from app.services.response_cache import response_cache
+from app.utils.prompt_encoding import CompactCodec, decode_index, format_offset, parse_offset
+
+MESSAGES = [
+    ChatMessage(user="alice.smith", message="We decided to use Postgres", timestamp="2024-01-19T10:00:00Z"),
+    ChatMessage(user="bob", message="ok", timestamp="2024-01-19T10:05:30Z"),
+    ChatMessage(user="alice.smith", message="I'll write the\nmigration", timestamp="2024-01-19T11:05:30Z"),
+]
+
+
+def test_encode_records_aliases_and_offsets():
+    codec = CompactCodec(MESSAGES)
+    assert codec.encode(MESSAGES).split("\n") == [
+        "FORMAT: one message per line as index|user|time|text",
+        "USERS (aliases for user fields; write real names in prose): u1=alice.smith",
+        "TIME: offsets from T0=2024-01-19T10:00:00Z",
+        "0|u1|+0s|We decided to use Postgres",
+        "1|bob|+5m30s|ok",
+        "2|u1|+1h5m30s|I'll write the\\nmigration",
+    ]
+    assert codec.encode(MESSAGES, index=False, timestamps=False).split("\n")[-1] == "u1|I'll write the\\nmigration"
+
+
+def test_pipe_in_user_names_is_always_aliased():
+    messages = [ChatMessage(user="ops|oncall", message="rolling back"), ChatMessage(user="bob", message="ok")]
+    codec = CompactCodec(messages)
+    lines = codec.encode(messages, timestamps=False).split("\n")
+    assert lines[-2:] == ["0|u1|rolling back", "1|bob|ok"]
+    assert codec.decode({"user": "u1", "reason": "u1 rolled back"}) == {"user": "ops|oncall", "reason": "u1 rolled back"}
+
+
+def test_decoder_restores_names_times_and_indices():
+    codec = CompactCodec(MESSAGES)
+    decoded = codec.decode({"actions": [{"assignee": "u1", "task": "u1 writes it"}],
+                            "timeline": [{"timestamp": "+1h5m30s", "user": "u1"}]})
+    assert decoded["actions"][0] == {"assignee": "alice.smith", "task": "u1 writes it"}
+    assert decoded["timeline"][0] == {"timestamp": "2024-01-19T11:05:30Z", "user": "alice.smith"}
+    assert parse_offset(format_offset(-93784)) == -93784 and parse_offset("+") is None
+    assert [decode_index(v, 3) for v in (2, "2", "#2", " 1 ", 3, None, True, "x")] == [2, 2, 2, 1, None, None, None, None]
+    # Malformed indices fall back rather than landing on the wrong message
+    assert [decode_index(v, 20) for v in (-1, "-1", 1.7, 2.0, "msg 12b", "m0", "1#")] == [None] * 7
+
+
+def test_compact_prompts_round_trip_through_services(monkeypatch):
+    sent = []
+
+    async def fake_send(full_prompt):
+        sent.append(full_prompt)
+        if "index|user|time|text" in full_prompt:
+            payload = {"classifications": [{"index": "#1", "types": ["OTHER"], "reason": "u1 agrees"}]}
+        else:
+            payload = {"actions": [{"task": "migration", "assignee": "u1", "priority": "high"}], "summary": "s"}
+        return {"response": json.dumps(payload), "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "COMPACT_PROMPTS", True)
+    monkeypatch.setattr(settings, "CLASSIFY_MEMO_ENABLED", False)
+    monkeypatch.setattr(classifier_service, "_send", fake_send)
+    monkeypatch.setattr(action_service, "_send", fake_send)
+    response_cache.clear()
+
+    loop = asyncio.get_event_loop()
+    out = loop.run_until_complete(classifier_service.classify(MESSAGES))
+    assert out.messages[1].confidence.reason == "u1 agrees"
+    actions = loop.run_until_complete(action_service.extract_actions(MESSAGES))
+    assert actions.actions[0].assignee == "alice.smith"
+    assert all("alice.smith:" not in prompt for prompt in sent)
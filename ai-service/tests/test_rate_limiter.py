@@ -0,0 +1,30 @@
+import asyncio
+import pytest
+from app.services.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, parse_retry_after
+
+
+def test_aimd_and_retry_after():
+    limiter = AdaptiveRateLimiter(rpm=600, tpm=60000, min_rpm=10, increase_rpm=5, decrease_factor=0.5)
+    limiter.on_throttle(retry_after=None)
+    assert limiter.rpm == 300
+    limiter.on_throttle(retry_after=None)  # same burst: no second decrease
+    assert limiter.rpm == 300
+    limiter.on_success()
+    assert limiter.rpm == 305
+
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("garbage") is None
+
+
+def test_callers_wait_then_fail_past_budget():
+    limiter = AdaptiveRateLimiter(rpm=600, tpm=10 ** 9, burst_seconds=0.1, max_wait_seconds=0.5)
+
+    async def run():
+        await limiter.acquire()
+        await limiter.acquire()  # waits ~0.1s for the bucket to refill
+        assert limiter.waits >= 1
+        limiter.on_throttle(retry_after=5)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire()
+
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,36 @@
+import asyncio
+from app.config.settings import settings
+from app.services.response_cache import ResponseCache, response_cache
+from app.services.summary_service import summary_service
+
+
+def test_cache_lru_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"response": "1"})
+    cache.set("b", {"response": "2"})
+    assert cache.get("a") == {"response": "1"}
+    cache.set("c", {"response": "3"})  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.hits == 1 and cache.misses == 1 and cache.evictions == 1
+
+    expired = ResponseCache(max_entries=2, ttl_seconds=0)
+    expired.set("a", {"response": "1"})
+    assert expired.get("a") is None
+
+
+def test_identical_prompt_skips_second_round_trip(monkeypatch):
+    calls = []
+
+    async def fake_send(full_prompt):
+        calls.append(full_prompt)
+        return {"response": '{"summary": "ok"}', "success": True}
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(summary_service, "_send", fake_send)
+    response_cache.clear()
+
+    loop = asyncio.get_event_loop()
+    first = loop.run_until_complete(summary_service.query("same window"))
+    second = loop.run_until_complete(summary_service.query("same window"))
+    assert first == second
+    assert len(calls) == 1
@@ -0,0 +1,55 @@
+import asyncio
+from app.config.settings import settings
+from app.services.action_service import action_service
+from app.services.retry import LatencyTracker, RetryPolicy
+
+
+def test_retryable_failures_are_retried(monkeypatch):
+    results = [
+        {"success": False, "error": "503", "error_kind": "http", "status_code": 503},
+        {"success": False, "error": "timeout", "error_kind": "timeout"},
+        {"success": True, "response": "{}"},
+    ]
+
+    async def fake_post(full_prompt):
+        return results.pop(0)
+
+    monkeypatch.setattr(action_service, "_post", fake_post)
+    monkeypatch.setattr(action_service, "_retry_policy", RetryPolicy(max_attempts=3, base_delay=0))
+    res = asyncio.get_event_loop().run_until_complete(action_service._send("prompt"))
+    assert res["success"] and not results
+
+    policy = RetryPolicy(max_attempts=3)
+    assert not policy.is_retryable({"error_kind": "http", "status_code": 400})
+
+
+def test_hedged_request_wins_and_loser_is_cancelled(monkeypatch):
+    cancelled = []
+    calls = []
+
+    async def fake_post(full_prompt):
+        calls.append(1)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+        return {"success": True, "response": "hedge"}
+
+    latency = LatencyTracker()
+    for _ in range(20):
+        latency.record(0.01)
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.01)
+    monkeypatch.setattr(action_service, "_latency", latency)
+    monkeypatch.setattr(action_service, "_post", fake_post)
+
+    async def run():
+        res = await action_service._send("prompt")
+        await asyncio.sleep(0)
+        return res
+
+    res = asyncio.get_event_loop().run_until_complete(run())
+    assert res["response"] == "hedge"
+    assert len(calls) == 2 and cancelled == [1]
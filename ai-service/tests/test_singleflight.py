@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"response": "ok"}
+
+    async def run():
+        return await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+
+    results = asyncio.get_event_loop().run_until_complete(run())
+    assert len(calls) == 1
+    assert all(r == {"response": "ok"} for r in results)
+    assert flight.leaders == 1 and flight.coalesced == 4 and flight.in_flight == 0
+
+
+def test_errors_and_cancellation_propagate():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def run():
+        results = await asyncio.gather(
+            flight.do("err", boom), flight.do("err", boom), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        leader = asyncio.ensure_future(flight.do("slow", slow))
+        follower = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        assert not follower.done()  # the shared call survives one caller leaving
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert flight.in_flight == 0
+
+    asyncio.get_event_loop().run_until_complete(run())
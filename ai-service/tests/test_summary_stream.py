@@ -0,0 +1,74 @@
+import json
+import httpx
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services import http_client
+from app.utils.json_stream import JsonStreamParser
+
+MESSAGES = [
+    {"user": "a", "message": "We go with Postgres"},
+    {"user": "b", "message": "I'll write the migration"},
+]
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_emits_string_deltas_across_escapes():
+    parser = JsonStreamParser()
+    events = []
+    for piece in ['{"summary": "caf', '\\u00', 'e9 \\"ok', '\\"", "key_points": ["x"]}']:
+        events += parser.feed(piece)
+    assert "".join(e.value for e in events if e.kind == "delta") == 'café "ok"'
+    assert [(e.kind, e.key, e.value) for e in events if e.kind == "item"] == [("item", "key_points", "x")]
+
+
+def test_summarize_stream_emits_partials_then_done(monkeypatch):
+    text = json.dumps({
+        "summary": "Team picked Postgres and assigned the migration.",
+        "key_points": ["Postgres chosen", "Migration owned by b"],
+        "timeline": [{"event": "Postgres chosen", "type": "decision"}],
+        "confidence": 0.9,
+    })
+    sse = "".join(
+        "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": text[i:i + 25]}]}}]}) + "\r\n\r\n"
+        for i in range(0, len(text), 25)
+    )
+
+    def handler(request):
+        assert request.url.path.endswith(":streamGenerateContent")
+        return httpx.Response(200, content=sse.encode())
+
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    res = TestClient(app).post("/ai/summarize/stream", json={"messages": MESSAGES})
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert "X-Window-Handle" in res.headers
+    events = _events(res.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds.count("summary_delta") > 1 and kinds[-1] == "done"
+    assert "".join(d["text"] for k, d in events if k == "summary_delta") == json.loads(text)["summary"]
+    assert [d["text"] for k, d in events if k == "key_point"] == ["Postgres chosen", "Migration owned by b"]
+    assert [d["event"] for k, d in events if k == "timeline_item"] == ["Postgres chosen"]
+    done = events[-1][1]
+    assert done["summary"] == json.loads(text)["summary"] and len(done["timeline"]) == 1
+
+
+def test_summarize_stream_failure_sends_fallback_once(monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(
+        http_client, "_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500, content=b"boom")))
+    )
+
+    res = TestClient(app).post("/ai/summarize/stream", json={"messages": MESSAGES})
+    events = _events(res.text)
+    assert [kind for kind, _ in events] == ["done"]
+    assert events[0][1]["confidence"]["reason"].startswith("Fallback")
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services.classifier_service import classifier_service
+from app.services.classification_memo import classification_memo
+from app.services.response_cache import response_cache
+from app.services.tracing import span, trace_exporter
+
+
+def test_span_outside_a_request_is_a_no_op():
+    with span("anything"):
+        pass
+
+
+def test_classify_returns_server_timing_and_exports_otlp(monkeypatch, tmp_path):
+    async def fake_send(prompt):
+        return {"response": json.dumps([{"index": 0, "types": ["DECISION"], "confidence": 0.9}]), "success": True}
+
+    export_file = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "CLASSIFY_BATCH_ENABLED", False)
+    monkeypatch.setattr(settings, "TRACE_EXPORT_FILE", str(export_file))
+    monkeypatch.setattr(classifier_service, "_send", fake_send)
+    response_cache.clear()
+    classification_memo.clear()
+
+    with TestClient(app) as client:
+        res = client.post("/ai/classify", json={"messages": [{"user": "a", "message": "We go with Postgres"}]})
+        for _ in range(50):
+            if trace_exporter.exported:
+                break
+            client.get("/ai/health")
+
+    timing = dict(entry.split(";", 1)[0:2] for entry in res.headers["Server-Timing"].split(", "))
+    for stage in ("classifier.prompt", "classifier.query", "classifier.parse", "classifier.build", "total"):
+        assert timing[stage].startswith("dur=")
+
+    exported = [json.loads(line) for line in export_file.read_text().splitlines()]
+    spans = [s for t in exported for s in t["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    root = next(s for s in spans if s["name"] == "POST /ai/classify")
+    children = [s for s in spans if s["traceId"] == root["traceId"] and s is not root]
+    assert {s["name"] for s in children} >= {"classifier.prompt", "classifier.query", "classifier.build"}
+    assert all(s["parentSpanId"] for s in children)
+
+
+def test_export_failures_are_counted_not_raised(monkeypatch):
+    from app.services import tracing
+
+    def no_client():
+        raise RuntimeError("HTTP client not started")
+
+    monkeypatch.setattr(settings, "TRACE_EXPORT_FILE", "")
+    monkeypatch.setattr(settings, "TRACE_EXPORT_ENDPOINT", "http://collector:4318")
+    monkeypatch.setattr(tracing, "get_http_client", no_client)
+    exporter = tracing.TraceExporter()
+
+    async def run():
+        exporter.export(tracing.Trace("GET /x"))
+        assert len(exporter._tasks) == 1
+        await asyncio.gather(*exporter._tasks)
+
+    asyncio.get_event_loop().run_until_complete(run())
+    assert exporter.failures == 1 and not exporter._tasks